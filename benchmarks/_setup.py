@@ -0,0 +1,56 @@
+# configuración común de los benchmarks: Django apuntando a una base sqlite temporal
+#
+# los benchmarks nunca tocan db.sqlite3; cada ejecución migra una base nueva en un
+# directorio temporal que se elimina al terminar
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(db_path=None, **overrides):
+    """Inicializa Django con una base temporal y devuelve su ruta.
+
+    `db_path` reutiliza una base ya creada (por ejemplo la de un proceso padre
+    que lanza un servidor); `overrides` se aplica sobre core.settings antes de
+    django.setup().
+    """
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+    import django
+    from django.conf import settings
+
+    if db_path is None:
+        tmp_dir = tempfile.mkdtemp(prefix='ivolucion-bench-')
+        atexit.register(shutil.rmtree, tmp_dir, ignore_errors=True)
+        db_path = Path(tmp_dir) / 'bench.sqlite3'
+
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return db_path
+
+
+def create_fixtures():
+    """Roles, estados y categorías mínimos para crear tareas"""
+    from users.models import Role
+    from tasks.models import Category, Status
+
+    for name in ('admin', 'client'):
+        Role.objects.get_or_create(name=name)
+    for name in ('pendiente', 'cancelada', 'completada'):
+        Status.objects.get_or_create(name=name)
+    for name in ('trabajo', 'personal', 'otros'):
+        Category.objects.get_or_create(name=name)
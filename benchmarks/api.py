@@ -0,0 +1,199 @@
+"""Latencia, consultas por petición y throughput de cada endpoint de la API, en JSON.
+
+siembra una base temporal con `seed_data` y recorre los endpoints con el
+cliente de pruebas de Django (sin servidor ni red), autenticado con JWT como
+un cliente real. El resultado es un JSON con p50/p95/p99, consultas y
+peticiones por segundo por endpoint; con --baseline se compara contra un
+resultado guardado y el proceso termina con código 1 si algo empeoró.
+
+uso:
+    python -m benchmarks.api --users 10 --tasks 200 --output baseline.json
+    python -m benchmarks.api --users 10 --tasks 200 --baseline baseline.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from itertools import count
+
+from ._setup import setup_django
+
+BENCH_SETTINGS = {
+    'ALLOWED_HOSTS': ['testserver'],
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'TASK_AUDIT_LOG': {'BACKEND': 'sync'},
+}
+
+# el hasher rápido saca el costo de PBKDF2 de register/token (--fast-passwords)
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(latencies, queries):
+    total = sum(latencies)
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(statistics.median(latencies) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(total / len(latencies) * 1000, 3),
+        'rps': round(len(latencies) / total, 1),
+        'queries': round(statistics.mean(queries), 2),
+        'max_queries': max(queries),
+    }
+
+
+class Runner:
+    """Ejecuta cada endpoint y mide latencia y consultas por petición"""
+
+    def __init__(self, iterations):
+        from rest_framework.test import APIClient
+
+        self.iterations = iterations
+        self.anonymous = APIClient()
+        self.results = {}
+        self._emails = count()
+
+    def measure(self, name, request, expected):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        latencies, queries = [], []
+        for i in range(self.iterations):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = request(i)
+                latencies.append(time.perf_counter() - start)
+            assert response.status_code == expected, f'{name}: {response.status_code} {response.content[:200]!r}'
+            queries.append(len(ctx.captured_queries))
+        self.results[name] = summarize(latencies, queries)
+
+    def client_for(self, email, password):
+        from rest_framework.test import APIClient
+
+        response = self.anonymous.post('/api/users/token/', {'email': email, 'password': password})
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+        return client
+
+    def run(self, password):
+        from tasks.models import Category, Task
+        from tasks.management.commands.seed_data import SEED_ADMIN
+
+        email = 'seed-user-0@example.com'
+        client = self.client_for(email, password)
+        admin = self.client_for(SEED_ADMIN, password)
+        own = list(Task.objects.filter(user__email=email).order_by('pk').values_list('pk', flat=True))
+        category = Category.objects.order_by('pk').first().pk
+
+        self.measure('register', lambda i: self.anonymous.post('/api/users/register/', {
+            'email': f'bench-{next(self._emails)}@example.com', 'password': 'benchpass123',
+        }), 201)
+        self.measure('token', lambda i: self.anonymous.post('/api/users/token/', {
+            'email': email, 'password': password,
+        }), 200)
+        self.measure('me', lambda i: client.get('/api/users/me/'), 200)
+        self.measure('tasks_list', lambda i: client.get('/api/tasks/'), 200)
+        self.measure('tasks_list_page', lambda i: client.get('/api/tasks/', {'page_size': 50}), 200)
+        self.measure('tasks_list_narrow', lambda i: client.get('/api/tasks/', {'fields': 'id,title'}), 200)
+        self.measure('tasks_list_expand', lambda i: client.get('/api/tasks/', {'expand': 'user,status,category'}), 200)
+        self.measure('tasks_detail', lambda i: client.get(f'/api/tasks/{own[i % len(own)]}/'), 200)
+        self.measure('tasks_create', lambda i: client.post('/api/tasks/', {
+            'title': f'Benchmark {i}', 'category_id': category,
+        }), 201)
+        self.measure('tasks_update', lambda i: client.patch(f'/api/tasks/{own[i % len(own)]}/', {
+            'description': f'editada {i}',
+        }), 200)
+        deletable = list(Task.objects.filter(user__email=email, title__startswith='Benchmark ').values_list('pk', flat=True))
+        self.measure('tasks_delete', lambda i: client.delete(f'/api/tasks/{deletable[i]}/'), 204)
+        self.measure('logs_list', lambda i: admin.get('/api/logs/'), 200)
+        self.measure('logs_list_expand', lambda i: admin.get('/api/logs/', {'expand': 'task.user,task.status,task.category'}), 200)
+        return self.results
+
+
+def compare(results, baseline, threshold):
+    """Endpoints que empeoraron: p95 más de `threshold` (proporción) o más consultas"""
+    regressions = []
+    for name, current in results['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous is None:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(f'{name}: p95 {previous["p95_ms"]} -> {current["p95_ms"]} ms')
+        if current['queries'] > previous['queries']:
+            regressions.append(f'{name}: consultas {previous["queries"]} -> {current["queries"]}')
+    return regressions
+
+
+def print_table(endpoints, baseline=None, file=sys.stderr):
+    print(f'{"endpoint":<18} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"req/s":>8} {"consultas":>10} {"base p95":>9}', file=file)
+    for name, row in endpoints.items():
+        previous = (baseline or {}).get('endpoints', {}).get(name, {}).get('p95_ms', '')
+        print(f'{name:<18} {row["p50_ms"]:>8.2f} {row["p95_ms"]:>8.2f} {row["p99_ms"]:>8.2f} '
+              f'{row["rps"]:>8.0f} {row["queries"]:>10} {previous!s:>9}', file=file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=10, help='usuarios sembrados')
+    parser.add_argument('--tasks', type=int, default=200, help='tareas por usuario')
+    parser.add_argument('--iterations', type=int, default=50, help='peticiones por endpoint')
+    parser.add_argument('--fast-passwords', action='store_true', help='usar un hasher rápido (register/token sin PBKDF2)')
+    parser.add_argument('--output', help='archivo donde guardar el JSON (por defecto stdout)')
+    parser.add_argument('--baseline', help='JSON de una ejecución anterior para comparar')
+    parser.add_argument('--threshold', type=float, default=0.25, help='empeoramiento de p95 tolerado (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    overrides = dict(BENCH_SETTINGS)
+    if args.fast_passwords:
+        overrides['PASSWORD_HASHERS'] = FAST_HASHERS
+    setup_django(**overrides)
+
+    from django.conf import settings
+    from django.core.management import call_command
+    from tasks.management.commands.seed_data import SEED_PASSWORD
+
+    # el resumen de seed_data va a stderr para no mezclarse con el JSON
+    call_command('seed_data', users=args.users, tasks=args.tasks, stdout=sys.stderr)
+    results = {
+        'meta': {
+            'users': args.users,
+            'tasks_per_user': args.tasks,
+            'iterations': args.iterations,
+            'fast_passwords': args.fast_passwords,
+            'sqlite_profile': settings.SQLITE_PROFILE,
+            'python': platform.python_version(),
+        },
+        'endpoints': Runner(args.iterations).run(SEED_PASSWORD),
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+    print_table(results['endpoints'], baseline)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f'REGRESIÓN {line}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
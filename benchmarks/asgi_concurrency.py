@@ -0,0 +1,187 @@
+"""Latencia con muchos clientes concurrentes: vistas sync bajo WSGI frente a vistas async bajo ASGI.
+
+levanta un servidor local por modo en un proceso aparte, sobre la misma base
+temporal, y lanza --clients clientes que piden a la vez la lista de tareas,
+el detalle de una tarea y /api/users/me/:
+ - wsgi: servidor con un hilo por conexión (el de runserver) y las vistas DRF
+ - asgi: uvicorn con ASYNC_READ_VIEWS (core/asyncviews.py); requiere
+   `pip install uvicorn`, si no está instalado ese modo se omite
+
+la cache de listas se desactiva para medir las consultas de cada petición.
+
+uso:
+    python -m benchmarks.asgi_concurrency --clients 100 --requests 10
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from ._setup import BASE_DIR, setup_django, create_fixtures
+
+SERVER_SETTINGS = {
+    'ALLOWED_HOSTS': ['127.0.0.1'],
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'TASK_LIST_CACHE': {'ENABLED': False},
+    'TASK_AUDIT_LOG': {'BACKEND': 'sync'},
+}
+
+
+def serve(mode, port, db_path):
+    setup_django(db_path=db_path, ASYNC_READ_VIEWS=(mode == 'asgi'), **SERVER_SETTINGS)
+
+    if mode == 'asgi':
+        import uvicorn
+        from django.core.asgi import get_asgi_application
+
+        uvicorn.run(get_asgi_application(), host='127.0.0.1', port=port, log_level='warning', backlog=2048)
+        return
+
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadedWSGIServer):
+        # el valor por defecto (10) rechaza conexiones con 100 clientes a la vez
+        request_queue_size = 2048
+
+    server = Server(('127.0.0.1', port), QuietHandler)
+    server.set_app(WSGIHandler())
+    server.serve_forever()
+
+
+def seed(tasks):
+    from users.models import Role, User
+    from users.tokens import RoleRefreshToken
+    from tasks.models import Category, Status, Task
+
+    user = User.objects.create_user(
+        email='bench-asgi@example.com', password='benchpass123', role=Role.objects.get(name='client'),
+    )
+    pending = Status.objects.get(name='pendiente')
+    category = Category.objects.get(name='trabajo')
+    created = Task.objects.bulk_create([
+        Task(title=f'Tarea {i}', description='descripción', user=user, status=pending, category=category)
+        for i in range(tasks)
+    ])
+    return str(RoleRefreshToken.for_user(user).access_token), created[0].pk
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'el servidor no respondió en el puerto {port}')
+
+
+async def fetch(port, path, token):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n'
+        f'Accept: application/json\r\nConnection: close\r\n\r\n'.encode()
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(response.split(b' ', 2)[1])
+
+
+async def load(port, paths, token, clients, requests):
+    latencies, errors = [], 0
+
+    async def client(index):
+        nonlocal errors
+        for i in range(requests):
+            path = paths[(index + i) % len(paths)]
+            start = time.perf_counter()
+            try:
+                status = await fetch(port, path, token)
+            except OSError:
+                status = None
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(clients)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=100, help='clientes concurrentes')
+    parser.add_argument('--requests', type=int, default=10, help='peticiones por cliente')
+    parser.add_argument('--tasks', type=int, default=50, help='tareas del usuario de prueba')
+    parser.add_argument('--mode', choices=('wsgi', 'asgi'), action='append', help='modo a medir (por defecto ambos)')
+    parser.add_argument('--serve', choices=('wsgi', 'asgi'), help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.db)
+        return
+
+    db_path = setup_django(**SERVER_SETTINGS)
+    create_fixtures()
+    token, task_id = seed(args.tasks)
+    from django.db import connection
+    connection.close()
+
+    paths = ['/api/tasks/', f'/api/tasks/{task_id}/', '/api/users/me/']
+    modes = args.mode or ['wsgi', 'asgi']
+    print(f'{"modo":<6} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errores":>8}')
+    for mode in modes:
+        if mode == 'asgi':
+            try:
+                import uvicorn  # noqa: F401
+            except ImportError:
+                print('asgi   omitido: uvicorn no está instalado (pip install uvicorn)')
+                continue
+
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.asgi_concurrency', '--serve', mode, '--port', str(port), '--db', str(db_path)],
+            cwd=BASE_DIR, env=os.environ.copy(),
+        )
+        try:
+            wait_for_port(port)
+            # una vuelta de calentamiento para cargar catálogos y conexiones
+            asyncio.run(load(port, paths, token, 1, len(paths)))
+            latencies, errors, elapsed = asyncio.run(load(port, paths, token, args.clients, args.requests))
+        finally:
+            server.terminate()
+            server.wait()
+
+        print(
+            f'{mode:<6} {len(latencies) / elapsed:>8.0f} {statistics.median(latencies) * 1000:>8.1f} '
+            f'{percentile(latencies, 0.95) * 1000:>8.1f} {percentile(latencies, 0.99) * 1000:>8.1f} {errors:>8}'
+        )
+
+
+if __name__ == '__main__':
+    main()
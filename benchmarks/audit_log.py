@@ -0,0 +1,63 @@
+"""Throughput de escritura de tareas según el modo de auditoría (tasks/audit.py).
+
+uso:
+    python -m benchmarks.audit_log --tasks 2000
+"""
+
+import argparse
+import time
+
+from ._setup import setup_django, create_fixtures
+
+MODES = {
+    'sync': {'BACKEND': 'sync'},
+    'buffered': {'BACKEND': 'buffered', 'BATCH_SIZE': 100, 'FLUSH_INTERVAL': 0},
+    'buffered-on-commit': {'BACKEND': 'buffered', 'BATCH_SIZE': 100, 'FLUSH_INTERVAL': 0, 'FLUSH_ON_COMMIT': True},
+}
+
+
+def run(mode, tasks):
+    from django.test.utils import override_settings
+    from users.models import Role, User
+    from tasks import audit
+    from tasks.models import Category, Status, Task, logTask
+
+    user = User.objects.create_user(
+        email=f'bench-{mode}@example.com', password='benchpass123',
+        role=Role.objects.get(name='client'),
+    )
+    pending = Status.objects.get(name='pendiente')
+    category = Category.objects.get(name='trabajo')
+
+    with override_settings(TASK_AUDIT_LOG=MODES[mode]):
+        start = time.perf_counter()
+        for i in range(tasks):
+            task = Task.objects.create(title=f'{mode} {i}', user=user, status=pending, category=category)
+            task.description = 'actualizada'
+            task.save()
+        audit.flush()
+        elapsed = time.perf_counter() - start
+
+    logs = logTask.objects.filter(task__user=user).count()
+    assert logs == tasks * 2, f'{mode}: se esperaban {tasks * 2} logs y hay {logs}'
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=2000, help='tareas creadas (y actualizadas) por modo')
+    parser.add_argument('--mode', choices=sorted(MODES), action='append', help='modo a medir (por defecto todos)')
+    args = parser.parse_args()
+
+    setup_django()
+    create_fixtures()
+
+    writes = args.tasks * 2
+    print(f'{"modo":<20} {"segundos":>10} {"escrituras/s":>14}')
+    for mode in args.mode or MODES:
+        elapsed = run(mode, args.tasks)
+        print(f'{mode:<20} {elapsed:>10.3f} {writes / elapsed:>14.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Bytes en la red y CPU por respuesta al comprimir listas de tareas con gzip y zstd.
+
+siembra --tasks tareas y pide /api/tasks/ al cliente de pruebas de Django con
+distintos tamaños (?page_size= de la paginación keyset y la lista completa,
+con y sin ?expand=); para cada cuerpo y cada codificación/nivel disponible
+mide los bytes comprimidos, la razón y el tiempo de compresión (mejor de
+--repeat). Sirve para elegir RESPONSE_COMPRESSION['MIN_SIZE'] y los niveles.
+zstd solo aparece si está disponible (Python 3.14 o `pip install zstandard`).
+
+uso:
+    python -m benchmarks.compression --tasks 5000 --repeat 20
+"""
+
+import argparse
+import time
+
+from ._setup import setup_django, create_fixtures
+
+BENCH_SETTINGS = {
+    'ALLOWED_HOSTS': ['testserver'],
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'TASK_AUDIT_LOG': {'BACKEND': 'sync'},
+    'REQUEST_TIMING': {'ENABLED': False},
+    # se mide el cuerpo sin comprimir; la compresión se aplica acá para aislar su costo
+    'RESPONSE_COMPRESSION': {'ENABLED': False},
+}
+
+# (nombre, query string)
+CASES = [
+    ('1 tarea', 'page_size=1'),
+    ('10 tareas', 'page_size=10'),
+    ('50 tareas', 'page_size=50'),
+    ('200 tareas', 'page_size=200'),
+    ('200 expand', 'page_size=200&expand=user,status,category'),
+    ('todas', ''),
+    ('todas expand', 'expand=user,status,category'),
+]
+
+LEVELS = {'gzip': (1, 6, 9), 'zstd': (1, 3, 9)}
+
+
+def seed(tasks):
+    from users.models import Role, User
+    from tasks.models import Category, Status, Task
+
+    user = User.objects.create_user(
+        email='bench-compression@example.com', password='benchpass123', role=Role.objects.get(name='client'),
+    )
+    statuses = list(Status.objects.all())
+    categories = list(Category.objects.all())
+    Task.objects.bulk_create([
+        Task(title=f'Tarea {i}', description=f'descripción de la tarea número {i}', user=user,
+             status=statuses[i % len(statuses)], category=categories[i % len(categories)] if i % 4 else None)
+        for i in range(tasks)
+    ])
+    return user
+
+
+def best(repeat, func, data):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(data)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=5000, help='tareas del usuario (tamaño de la lista completa)')
+    parser.add_argument('--repeat', type=int, default=20, help='repeticiones por compresión (se toma la mejor)')
+    args = parser.parse_args()
+
+    setup_django(**BENCH_SETTINGS)
+    create_fixtures()
+    user = seed(args.tasks)
+
+    from rest_framework.test import APIClient
+    from core.compression import COMPRESSORS, get_options
+
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    print(f'codificaciones: {", ".join(COMPRESSORS)} (MIN_SIZE actual: {get_options()["MIN_SIZE"]} bytes)')
+    print(f'{"caso":<14} {"bytes":>10} {"codificación":>13} {"comprimido":>11} {"razón":>7} {"ms":>8} {"MB/s":>8}')
+    for name, query in CASES:
+        response = client.get(f'/api/tasks/?{query}')
+        assert response.status_code == 200, response.status_code
+        body = response.content
+        print(f'{name:<14} {len(body):>10}')
+        for encoding, (compress, _) in COMPRESSORS.items():
+            for level in LEVELS[encoding]:
+                elapsed, compressed = best(args.repeat, lambda data: compress(data, level), body)
+                print(
+                    f'{"":<14} {"":>10} {f"{encoding} -{level}":>13} {len(compressed):>11} '
+                    f'{len(body) / len(compressed):>7.1f} {elapsed * 1000:>8.3f} '
+                    f'{len(body) / elapsed / 1e6:>8.1f}'
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+"""Conexiones en espera (SSE o long-poll) frente a memoria, hilos y CPU del servidor, y latencia del aviso a todas.
+
+para cada --mode y cada cantidad de --connections levanta un uvicorn nuevo (en
+un proceso aparte, con ASYNC_READ_VIEWS) sobre la misma base temporal y:
+ - abre esa cantidad de conexiones del mismo usuario: streams
+   /api/tasks/events/ (sse) o peticiones /api/tasks/events/poll/?after= que
+   quedan esperando un cambio (poll)
+ - mide la memoria residente y los hilos del servidor antes y después, y su CPU
+   durante --idle segundos sin cambios (watcher y heartbeats)
+ - escribe un logTask desde este proceso y mide cuánto tarda el aviso en
+   llegar a cada conexión (incluye POLL_INTERVAL del watcher)
+si las conexiones en espera no ocupan hilos, la columna de hilos no crece con
+ellas. Requiere `pip install uvicorn` y Linux (lee /proc/<pid>); las cantidades
+que superan el límite de archivos abiertos (ulimit -n) se omiten.
+
+uso:
+    python -m benchmarks.push --connections 100 --connections 1000 --idle 5
+    python -m benchmarks.push --mode poll --connections 500
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from ._setup import BASE_DIR, setup_django, create_fixtures
+from .asgi_concurrency import free_port, percentile, wait_for_port
+
+SERVER_SETTINGS = {
+    'ALLOWED_HOSTS': ['127.0.0.1'],
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'TASK_AUDIT_LOG': {'BACKEND': 'sync'},
+    # sin Server-Timing: se mide el costo de las conexiones
+    'REQUEST_TIMING': {'ENABLED': False},
+}
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+# modo: (ruta, marca de un aviso de tareas en la respuesta, si la cabecera llega enseguida)
+MODES = {
+    'sse': ('/api/tasks/events/', b'event: tasks', True),
+    'poll': ('/api/tasks/events/poll/?after={after}', b'"tasks"', False),
+}
+
+
+def serve(port, db_path, poll_interval):
+    push = {'POLL_INTERVAL': poll_interval, 'STREAM_TIMEOUT': 3600, 'LONG_POLL_TIMEOUT': 3600}
+    setup_django(db_path=db_path, ASYNC_READ_VIEWS=True, TASK_PUSH=push, **SERVER_SETTINGS)
+
+    import uvicorn
+    from django.core.asgi import get_asgi_application
+
+    # los streams siguen abiertos del lado del servidor: al terminar no se espera a que cierren
+    uvicorn.run(get_asgi_application(), host='127.0.0.1', port=port, log_level='warning', backlog=8192,
+                timeout_graceful_shutdown=1)
+
+
+def seed():
+    from users.models import Role, User
+    from users.tokens import RoleRefreshToken
+    from tasks.models import Category, Status, Task, logTask
+
+    user = User.objects.create_user(
+        email='bench-push@example.com', password='benchpass123', role=Role.objects.get(name='client'),
+    )
+    task = Task.objects.create(
+        title='Tarea', description='descripción', user=user,
+        status=Status.objects.get(name='pendiente'), category=Category.objects.get(name='trabajo'),
+    )
+    return str(RoleRefreshToken.for_user(user).access_token), task, logTask.objects.latest('pk').pk
+
+
+def proc_status(pid, field):
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith(f'{field}:'):
+                return int(line.split()[1])
+    return 0
+
+
+def rss_kb(pid):
+    return proc_status(pid, 'VmRSS')
+
+
+def threads(pid):
+    return proc_status(pid, 'Threads')
+
+
+def cpu_seconds(pid):
+    with open(f'/proc/{pid}/stat') as stat:
+        # después del nombre del proceso (entre paréntesis): utime y stime son los campos 14 y 15
+        fields = stat.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def raise_open_files_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+class Stream:
+    """Una conexión en espera; `received` es el momento en que llegó el primer aviso de tareas"""
+
+    def __init__(self, path, marker, streaming):
+        self.path = path
+        self.marker = marker
+        self.streaming = streaming
+        self.received = None
+        self.writer = None
+        self.reader_task = None
+
+    async def open(self, port, token):
+        reader, self.writer = await asyncio.open_connection('127.0.0.1', port)
+        self.writer.write(
+            f'GET {self.path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n'
+            f'Accept: text/event-stream, application/json\r\n\r\n'.encode()
+        )
+        await self.writer.drain()
+        # el long-poll no envía la cabecera hasta que hay cambios
+        if self.streaming:
+            head = await reader.readuntil(b'\r\n\r\n')
+            if b' 200 ' not in head.split(b'\r\n', 1)[0]:
+                raise RuntimeError(head.split(b'\r\n', 1)[0].decode())
+        self.reader_task = asyncio.create_task(self.read(reader))
+
+    async def read(self, reader):
+        data = b''
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                return
+            data = data[-len(self.marker):] + chunk
+            if self.received is None and self.marker in data:
+                self.received = time.perf_counter()
+
+    def close(self):
+        self.reader_task.cancel()
+        self.writer.close()
+
+
+async def settle(pid, interval=0.25, timeout=30):
+    """Espera a que el servidor deje de usar CPU (terminó de atender las conexiones nuevas)"""
+    deadline = time.perf_counter() + timeout
+    used = cpu_seconds(pid)
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(interval)
+        previous, used = used, cpu_seconds(pid)
+        if used - previous < interval * 0.1:
+            return
+
+
+async def measure(port, pid, token, task, mode, path, connections, idle):
+    from asgiref.sync import sync_to_async
+    from tasks.models import logTask
+
+    base_rss, base_threads = rss_kb(pid), threads(pid)
+    _, marker, streaming = MODES[mode]
+    streams = [Stream(path, marker, streaming) for _ in range(connections)]
+    # de a tandas para no desbordar el backlog del servidor
+    for start in range(0, connections, 200):
+        await asyncio.gather(*(stream.open(port, token) for stream in streams[start:start + 200]))
+    # sin respuesta que esperar en el long-poll: se espera a que todas se suscriban
+    await settle(pid)
+    open_rss, open_threads = rss_kb(pid), threads(pid)
+
+    cpu_start = cpu_seconds(pid)
+    await asyncio.sleep(idle)
+    idle_cpu = (cpu_seconds(pid) - cpu_start) / idle
+
+    written = time.perf_counter()
+    await sync_to_async(logTask.objects.create, thread_sensitive=False)(task=task, action='UPDATED')
+    deadline = written + 30
+    while any(stream.received is None for stream in streams) and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+    latencies = [stream.received - written for stream in streams if stream.received is not None]
+
+    for stream in streams:
+        stream.close()
+    return {
+        'base_rss': base_rss,
+        'open_rss': open_rss,
+        'base_threads': base_threads,
+        'open_threads': open_threads,
+        'idle_cpu': idle_cpu,
+        'latencies': latencies,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--connections', type=int, action='append', help='conexiones abiertas (por defecto 100, 1000 y 5000)')
+    parser.add_argument('--mode', choices=MODES, action='append', help='sse y/o poll (por defecto los dos)')
+    parser.add_argument('--idle', type=float, default=5.0, help='segundos sin cambios en los que se mide la CPU')
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='TASK_PUSH["POLL_INTERVAL"] del servidor')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    open_files = raise_open_files_limit()
+    if args.serve:
+        serve(args.port, args.db, args.poll_interval)
+        return
+
+    try:
+        import uvicorn  # noqa: F401
+    except ImportError:
+        print('omitido: uvicorn no está instalado (pip install uvicorn)')
+        return
+
+    db_path = setup_django(**SERVER_SETTINGS)
+    create_fixtures()
+    token, task, after = seed()
+    from django.db import connection
+    connection.close()
+
+    print(f'{"modo":>5} {"conexiones":>10} {"RSS MB":>8} {"KB/conexión":>12} {"hilos":>11} {"CPU idle %":>11} '
+          f'{"aviso p50 ms":>13} {"p99 ms":>8} {"recibidos":>10}')
+    for mode in args.mode or list(MODES):
+        path = MODES[mode][0]
+        for connections in args.connections or [100, 1000, 5000]:
+            # cada conexión usa un descriptor en este proceso y otro en el servidor
+            if connections + 100 > open_files:
+                print(f'{mode:>5} {connections:>10} omitido: supera el límite de archivos abiertos ({open_files})')
+                continue
+            port = free_port()
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'benchmarks.push', '--serve', '--port', str(port), '--db', str(db_path),
+                 '--poll-interval', str(args.poll_interval)],
+                cwd=BASE_DIR, env=os.environ.copy(),
+            )
+            try:
+                wait_for_port(port)
+                result = asyncio.run(measure(port, server.pid, token, task, mode, path.format(after=after), connections, args.idle))
+            finally:
+                server.terminate()
+                server.wait()
+            # cada medición escribe un log: la siguiente espera desde ahí
+            after += 1
+
+            latencies = result['latencies']
+            per_connection = (result['open_rss'] - result['base_rss']) / connections
+            thread_counts = f'{result["base_threads"]} -> {result["open_threads"]}'
+            print(
+                f'{mode:>5} {connections:>10} {result["open_rss"] / 1024:>8.1f} {per_connection:>12.1f} '
+                f'{thread_counts:>11} {result["idle_cpu"] * 100:>11.1f} '
+                f'{percentile(latencies, 0.5) * 1000 if latencies else 0:>13.1f} '
+                f'{percentile(latencies, 0.99) * 1000 if latencies else 0:>8.1f} {len(latencies):>10}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Latencia de ?q= con el índice FTS5 (tasks/search.py) frente a un LIKE sobre título y descripción.
+
+uso:
+    python -m benchmarks.search --tasks 50000 --repeat 20
+"""
+
+import argparse
+import random
+import time
+
+from ._setup import setup_django, create_fixtures
+
+WORDS = (
+    'factura informe reunión cliente proyecto revisar enviar llamar comprar pagar '
+    'presupuesto entrega diseño servidor migración backup correo contrato agenda viaje'
+).split()
+
+# una palabra común, una combinación, un prefijo y una palabra rara (~1 de cada 1000 tareas)
+QUERIES = ['factura', 'revisar contrato', 'migr', 'auditoría']
+
+
+def seed(tasks):
+    from users.models import Role, User
+    from tasks.models import Category, Status, Task
+
+    rng = random.Random(42)
+    users = [
+        User.objects.create_user(email=f'bench-search-{i}@example.com', password='benchpass123',
+                                 role=Role.objects.get(name='client'))
+        for i in range(10)
+    ]
+    pending = Status.objects.get(name='pendiente')
+    category = Category.objects.get(name='trabajo')
+    Task.objects.bulk_create(
+        [
+            Task(
+                title=f'{" ".join(rng.sample(WORDS, 3))} {i}',
+                description=' '.join(rng.choices(WORDS, k=20)) + (' auditoría' if i % 1000 == 0 else ''),
+                user=users[i % len(users)], status=pending, category=category,
+            )
+            for i in range(tasks)
+        ],
+        batch_size=2000,
+    )
+    return users[0]
+
+
+def like(queryset, text):
+    from django.db.models import Q
+
+    condition = Q()
+    for word in text.split():
+        condition &= Q(title__icontains=word) | Q(description__icontains=word)
+    return queryset.filter(condition)
+
+
+def measure(build, repeat):
+    # la lista sin paginar trae todas las coincidencias, como /api/tasks/?q=
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rows = list(build().values_list('id', flat=True))
+    return (time.perf_counter() - start) / repeat * 1000, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=50000, help='tareas a generar')
+    parser.add_argument('--repeat', type=int, default=20, help='repeticiones por consulta')
+    args = parser.parse_args()
+
+    setup_django()
+    create_fixtures()
+
+    from tasks.models import Task
+    from tasks.search import search
+
+    user = seed(args.tasks)
+    base = Task.objects.filter(user=user, is_deleted=False).order_by('-created_at')
+
+    print(f'{"consulta":<20} {"fts5 ms":>10} {"like ms":>10} {"filas":>7}')
+    for text in QUERIES:
+        fts_ms, rows = measure(lambda: search(base, text), args.repeat)
+        like_ms, _ = measure(lambda: like(base, text), args.repeat)
+        print(f'{text:<20} {fts_ms:>10.2f} {like_ms:>10.2f} {rows:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Filas por segundo al serializar listas: TaskSerializer/LogTaskSerializer frente a tasks/fastlist.py.
+
+para cada caso mide, sobre el mismo queryset, la lectura + serialización y el
+render a JSON por separado:
+ - drf: instancias del modelo, serializer de DRF y JSONRenderer
+ - fast: values_list() con RowMapper y FastJSONRenderer (orjson si está instalado)
+y verifica que ambos caminos generen exactamente los mismos bytes.
+
+uso:
+    python -m benchmarks.serialization --tasks 5000 --repeat 5
+"""
+
+import argparse
+import time
+
+from ._setup import setup_django, create_fixtures
+
+# (nombre, serializer, ?fields=, ?expand=)
+CASES = [
+    ('tasks', 'TaskSerializer', None, None),
+    ('tasks expand', 'TaskSerializer', None, 'user,status,category'),
+    ('tasks id,title', 'TaskSerializer', 'id,title', None),
+    ('logs', 'LogTaskSerializer', None, None),
+    ('logs expand', 'LogTaskSerializer', None, 'task.user,task.status,task.category'),
+]
+
+
+def seed(tasks):
+    from users.models import Role, User
+    from tasks.models import Category, Status, Task, logTask
+
+    user = User.objects.create_user(
+        email='bench-serialization@example.com', password='benchpass123', role=Role.objects.get(name='client'),
+    )
+    pending = Status.objects.get(name='pendiente')
+    category = Category.objects.get(name='trabajo')
+    created = Task.objects.bulk_create([
+        Task(title=f'Tarea {i}', description='descripción de la tarea ' * 5, user=user, status=pending,
+             category=category if i % 3 else None)
+        for i in range(tasks)
+    ])
+    logTask.objects.bulk_create([logTask(task=task, user=user, action='CREATED') for task in created])
+
+
+def best(repeat, func):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=5000, help='tareas (y logs) en la base')
+    parser.add_argument('--repeat', type=int, default=5, help='repeticiones por caso (se toma la mejor)')
+    args = parser.parse_args()
+
+    setup_django()
+    create_fixtures()
+    seed(args.tasks)
+
+    from rest_framework.renderers import JSONRenderer
+    from core.renderers import FastJSONRenderer, orjson
+    from tasks import serializers
+    from tasks.fastlist import RowMapper
+    from tasks.fieldsets import Selection, optimize
+    from tasks.models import Task, logTask
+
+    class Request:
+        # lo único que usan optimize() y los serializers
+        def __init__(self, fields, expand):
+            self.query_params = {key: value for key, value in (('fields', fields), ('expand', expand)) if value}
+
+    print(f'encoder rápido: {"orjson " + orjson.__version__ if orjson else "JSONRenderer (orjson no está instalado)"}')
+    print(f'{"caso":<16} {"drf filas/s":>12} {"fast filas/s":>13} {"x":>6} {"drf json ms":>12} {"fast json ms":>13}')
+    for name, serializer_name, fields, expand in CASES:
+        serializer_class = getattr(serializers, serializer_name)
+        model = Task if serializer_class is serializers.TaskSerializer else logTask
+        request = Request(fields, expand)
+        queryset = optimize(model.objects.order_by('-pk'), serializer_class, request)
+        mapper = RowMapper(serializer_class, Selection.from_params(fields, expand))
+
+        drf_time, drf_data = best(args.repeat, lambda: serializer_class(
+            queryset.all(), many=True, context={'request': request}).data)
+        fast_time, fast_data = best(args.repeat, lambda: mapper.build(mapper.rows(queryset.all())))
+        drf_render, drf_bytes = best(args.repeat, lambda: JSONRenderer().render(drf_data))
+        fast_render, fast_bytes = best(args.repeat, lambda: FastJSONRenderer().render(fast_data))
+        assert drf_bytes == fast_bytes, f'{name}: la salida no coincide'
+
+        rows = len(fast_data)
+        print(f'{name:<16} {rows / drf_time:>12.0f} {rows / fast_time:>13.0f} {drf_time / fast_time:>6.1f} '
+              f'{drf_render * 1000:>12.1f} {fast_render * 1000:>13.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Escrituras concurrentes en sqlite según el perfil de base de datos (SQLITE_PROFILE).
+
+cada hilo simula peticiones: crea una tarea (la señal escribe su log y sus
+contadores en la misma transacción), lee la lista del usuario y cierra la
+conexión como al terminar una petición (close_old_connections). Cada perfil
+corre en un proceso aparte porque DATABASES se lee al iniciar Django.
+
+uso:
+    python -m benchmarks.sqlite_contention --threads 8 --writes 200
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from ._setup import BASE_DIR, setup_django, create_fixtures
+
+PROFILES = ('stock', 'production')
+
+
+def worker(index, writes, results):
+    from django.db import OperationalError, close_old_connections, transaction
+    from users.models import Role, User
+    from tasks.lookups import categories, statuses
+    from tasks.models import Task
+
+    ok = errors = 0
+    try:
+        user = User.objects.create_user(
+            email=f'bench-contention-{index}@example.com', password='benchpass123',
+            role=Role.objects.get(name='client'),
+        )
+        pending, category = statuses.get_by_name('pendiente'), categories.get_by_name('trabajo')
+        for i in range(writes):
+            try:
+                with transaction.atomic():
+                    Task.objects.create(title=f'{index}-{i}', user=user, status=pending, category=category)
+                list(Task.objects.filter(user=user, is_deleted=False).order_by('-created_at')[:20])
+                ok += 1
+            except OperationalError:
+                # "database is locked"
+                errors += 1
+            close_old_connections()
+    finally:
+        results[index] = (ok, errors)
+        from django.db import connection
+        connection.close()
+
+
+def run(threads, writes):
+    from django.conf import settings
+    from django.db import connection
+
+    setup_django(TASK_AUDIT_LOG={'BACKEND': 'sync'})
+    create_fixtures()
+    connection.close()
+
+    results = {}
+    pool = [threading.Thread(target=worker, args=(index, writes, results)) for index in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    ok = sum(done for done, _ in results.values())
+    errors = sum(failed for _, failed in results.values())
+    return {
+        'profile': settings.SQLITE_PROFILE,
+        'seconds': elapsed,
+        'writes_per_second': ok / elapsed,
+        'ok': ok,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8, help='hilos escribiendo a la vez')
+    parser.add_argument('--writes', type=int, default=200, help='tareas creadas por hilo')
+    parser.add_argument('--profile', choices=PROFILES, action='append', help='perfil a medir (por defecto todos)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run(args.threads, args.writes)))
+        return
+
+    print(f'{"perfil":<12} {"segundos":>10} {"escrituras/s":>14} {"errores":>9}')
+    for profile in args.profile or PROFILES:
+        child = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.sqlite_contention', '--child',
+             '--threads', str(args.threads), '--writes', str(args.writes)],
+            cwd=BASE_DIR, env={**os.environ, 'SQLITE_PROFILE': profile},
+            capture_output=True, text=True, check=True,
+        )
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+        print(f'{profile:<12} {result["seconds"]:>10.3f} {result["writes_per_second"]:>14.0f} {result["errors"]:>9}')
+
+
+if __name__ == '__main__':
+    main()
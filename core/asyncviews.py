@@ -0,0 +1,73 @@
+# lecturas async bajo ASGI para endpoints muy consultados
+#
+# DRF 3.16 no admite handlers async, así que cada endpoint se expone con
+# hybrid_view(): GET/HEAD en JSON se resuelve con una corrutina que usa el ORM
+# async (aget, aiterator, aaggregate) sin ocupar un hilo por petición; el resto
+# de los métodos y cualquier caso que la corrutina no cubra (devuelve None:
+# errores de autenticación o permisos, 404, paginación, navegador) pasa a la
+# vista DRF de siempre en un hilo, así las respuestas y los errores son los mismos.
+# Solo se enrutan cuando settings.ASYNC_READ_VIEWS está activo (core/asgi.py lo
+# activa); bajo WSGI una vista async costaría un event loop por petición.
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework.viewsets import ViewSetMixin
+
+from .renderers import FastJSONRenderer
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def wants_json(request):
+    # el navegador pide text/html: se deja la API navegable al camino sync
+    return 'text/html' not in request.headers.get('Accept', '')
+
+
+def json_response(data, status=200):
+    response = HttpResponse(FastJSONRenderer().render(data), content_type='application/json', status=status)
+    response['Vary'] = 'Accept'
+    return response
+
+
+async def init_view(view_class, request, actions=None, **kwargs):
+    """Instancia la vista DRF con la petición autenticada y los permisos verificados
+
+    devuelve None si la petición no se puede resolver por el camino async
+    """
+    view = view_class()
+    if issubclass(view_class, ViewSetMixin):
+        view.action_map = actions
+    view.args, view.kwargs, view.headers, view.format_kwarg = (), kwargs, {}, None
+    view.request = drf_request = view.initialize_request(request, **kwargs)
+
+    authenticators = [auth for auth in drf_request.authenticators if hasattr(auth, 'aauthenticate')]
+    if not authenticators:
+        return None
+    try:
+        result = await authenticators[0].aauthenticate(request)
+        if result is None:
+            return None
+        drf_request.user, drf_request.auth = result
+        view.check_permissions(drf_request)
+    except APIException:
+        return None
+    return view
+
+
+def hybrid_view(sync_view, async_get):
+    """Vista async: GET/HEAD con `async_get` y todo lo demás con `sync_view`"""
+    sync = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method in SAFE_METHODS and wants_json(request):
+            response = await async_get(request, *args, **kwargs)
+            if response is not None:
+                return response
+        return await sync(request, *args, **kwargs)
+
+    # csrf_exempt() de Django 4.2 envuelve la vista en una función sync
+    view.csrf_exempt = True
+    # para las métricas por vista y acción (core/metrics.view_labels)
+    view.__wrapped__ = sync_view
+    return view
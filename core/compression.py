@@ -0,0 +1,155 @@
+# compresión de respuestas negociada con Accept-Encoding
+#
+# las listas de tareas y logs son JSON muy repetitivo (las mismas claves y los
+# mismos objetos anidados en cada fila) y se comprimen muy bien:
+#  - zstd si está disponible (módulo compression.zstd de Python 3.14 o el
+#    paquete opcional `pip install zstandard`), si no gzip
+#  - el cliente elige con sus q-values; ante un empate gana el orden de ENCODINGS
+#  - solo cuerpos de al menos MIN_SIZE bytes: en respuestas chicas el costo de
+#    CPU y los bytes de cabecera del formato no compensan
+#  - nunca respuestas en streaming (exportaciones, SSE de tasks/push.py): se
+#    enviarían de a bloques y un compresor con buffer retrasaría los eventos
+# benchmarks/compression.py mide bytes y CPU por tamaño de respuesta para
+# ajustar MIN_SIZE y los niveles.
+
+import gzip
+import re
+import threading
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+try:
+    # Python 3.14+
+    from compression import zstd as _zstd_stdlib
+except ImportError:  # pragma: no cover - depende de la versión de Python
+    _zstd_stdlib = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependencia opcional
+    zstandard = None
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MIN_SIZE': 1024,
+    # preferencia del servidor cuando el cliente acepta varias con el mismo q
+    'ENCODINGS': ('zstd', 'gzip'),
+    'GZIP_LEVEL': 6,
+    'ZSTD_LEVEL': 3,
+}
+
+_local = threading.local()
+
+_CODING = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'RESPONSE_COMPRESSION', {})}
+
+
+def gzip_compress(data, level):
+    # mtime=0: la misma respuesta produce siempre los mismos bytes
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def zstd_compress(data, level):
+    if _zstd_stdlib is not None:
+        return _zstd_stdlib.compress(data, level=level)
+    # un ZstdCompressor no se puede usar desde dos hilos a la vez: uno por hilo y nivel
+    compressors = getattr(_local, 'zstd', None)
+    if compressors is None:
+        compressors = _local.zstd = {}
+    if level not in compressors:
+        compressors[level] = zstandard.ZstdCompressor(level=level)
+    return compressors[level].compress(data)
+
+
+COMPRESSORS = {'gzip': (gzip_compress, 'GZIP_LEVEL')}
+if _zstd_stdlib is not None or zstandard is not None:
+    COMPRESSORS['zstd'] = (zstd_compress, 'ZSTD_LEVEL')
+
+
+def parse_accept_encoding(header):
+    """{codificación: q} de una cabecera Accept-Encoding; las entradas mal formadas se ignoran"""
+    accepted = {}
+    for item in header.split(','):
+        match = _CODING.match(item)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) is not None else 1.0
+        except ValueError:
+            continue
+        accepted[match.group(1).lower()] = quality
+    return accepted
+
+
+def choose_encoding(header, encodings):
+    """La codificación de `encodings` con mayor q en la cabecera (ante empate, la primera); None si ninguna"""
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        if encoding not in COMPRESSORS:
+            continue
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """Comprime con zstd o gzip las respuestas grandes que no son streaming (ver RESPONSE_COMPRESSION)
+
+    sirve tanto en WSGI como en ASGI: con un get_response asíncrono Django no lo
+    adapta con sync_to_async (un hilo por petición) sino que usa __acall__
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        options = get_options()
+        if not options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.min_size = options['MIN_SIZE']
+        self.encodings = tuple(options['ENCODINGS'])
+        self.levels = {encoding: options[level] for encoding, (_, level) in COMPRESSORS.items()}
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        # la representación depende de Accept-Encoding aunque esta vez no se comprima
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < self.min_size:
+            return response
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.encodings)
+        if encoding is None:
+            return response
+        compress, _ = COMPRESSORS[encoding]
+        compressed = compress(response.content, self.levels[encoding])
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # los bytes cambian: un ETag fuerte deja de valer, uno débil sigue sirviendo (como GZipMiddleware)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,47 @@
+# backend sqlite3 con perfil de producción configurable desde settings
+#
+# igual al backend de Django más dos opciones en DATABASES[...]['OPTIONS']:
+#  - 'pragmas': dict de PRAGMAs que se ejecutan en cada conexión nueva
+#    (journal_mode=WAL, synchronous=NORMAL, busy_timeout, mmap_size, cache_size...)
+#  - 'transaction_mode': 'IMMEDIATE' abre las transacciones de escritura (atomic)
+#    con BEGIN IMMEDIATE: el lock de escritura se toma al empezar y, si está
+#    ocupado, se espera busy_timeout en vez de fallar con "database is locked"
+#    al intentar pasar de lectura a escritura a mitad de la transacción
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        # las opciones propias no se pasan a sqlite3.connect()
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    @property
+    def pragmas(self):
+        return self.settings_dict['OPTIONS'].get('pragmas', {})
+
+    @property
+    def transaction_mode(self):
+        mode = (self.settings_dict['OPTIONS'].get('transaction_mode') or 'DEFERRED').upper()
+        if mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(f"transaction_mode debe ser uno de {', '.join(TRANSACTION_MODES)}, no {mode!r}.")
+        return mode
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode == 'DEFERRED':
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,127 @@
+# cache en proceso para tablas de catálogo pequeñas (Role, Status, Category)
+#
+# estas tablas tienen unas pocas filas y casi nunca cambian, así que se cargan
+# completas una vez y se resuelven por id o por nombre sin tocar la base.
+# post_save/post_delete invalidan la copia del proceso actual (también al hacer
+# commit, por si otro hilo recargó antes); LOOKUP_CACHE_TTL acota cuánto puede
+# tardar otro proceso en ver un cambio:
+#  - una fila creada en otro proceso no espera al TTL: si un id no está en la
+#    copia se consulta ese id en la base y, si existe, se recarga la tabla
+#  - una fila borrada en otro proceso sigue en la copia hasta el TTL; la base
+#    rechaza la FK al escribir y tasks/serializers.catalog_integrity() lo
+#    convierte en un error de validación y vacía las tablas
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import SynchronousOnlyOperation
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+DEFAULT_TTL = 60
+
+_registry = []
+
+
+class LookupTable:
+    """Copia en memoria de todas las filas de `model`, indexada por id y por nombre"""
+
+    def __init__(self, model, name_field='name'):
+        self.model = model
+        self.name_field = name_field
+        self._lock = threading.Lock()
+        # (por id, por nombre en minúsculas); se reemplaza completo para que los lectores no se bloqueen
+        self._data = None
+        self._loaded_at = 0.0
+        post_save.connect(self._on_change, sender=model, weak=False)
+        post_delete.connect(self._on_change, sender=model, weak=False)
+        _registry.append(self)
+
+    def _expired(self):
+        ttl = getattr(settings, 'LOOKUP_CACHE_TTL', DEFAULT_TTL)
+        return ttl is not None and time.monotonic() - self._loaded_at > ttl
+
+    def _load(self):
+        data = self._data
+        if data is None or self._expired():
+            with self._lock:
+                if self._data is None or self._expired():
+                    self._fill(list(self.model._default_manager.all()))
+                data = self._data
+        return data
+
+    async def aload(self):
+        """Carga la tabla con el ORM async si hace falta
+
+        las vistas async la llaman antes de serializar, porque get() no puede
+        consultar la base desde el event loop
+        """
+        if self._data is None or self._expired():
+            self._fill([row async for row in self.model._default_manager.all()])
+
+    def _fill(self, rows):
+        self._data = (
+            {row.pk: row for row in rows},
+            {getattr(row, self.name_field).lower(): row for row in rows},
+        )
+        self._loaded_at = time.monotonic()
+
+    def get(self, pk):
+        """Fila con ese id o None (si no está en la copia, se busca en la base)"""
+        if pk is None:
+            return None
+        row = self._load()[0].get(pk)
+        if row is None and self._refresh_if_exists([pk]):
+            row = self._load()[0].get(pk)
+        return row
+
+    def missing(self, pks):
+        """Los ids de `pks` que no existen, con a lo sumo una consulta para los que faltan en la copia"""
+        by_pk = self._load()[0]
+        missing = {pk for pk in pks if pk not in by_pk}
+        if missing and self._refresh_if_exists(missing):
+            by_pk = self._load()[0]
+            missing = {pk for pk in missing if pk not in by_pk}
+        return missing
+
+    def _refresh_if_exists(self, pks):
+        # una sola consulta por los ids ausentes; si alguno existe la copia está vieja y se recarga
+        try:
+            exists = self.model._default_manager.filter(pk__in=list(pks)).exists()
+        except SynchronousOnlyOperation:
+            # desde el event loop no se consulta: vale lo que cargó aload()
+            return False
+        if exists:
+            self.invalidate()
+        return exists
+
+    def get_by_name(self, name):
+        """Fila con ese nombre (sin distinguir mayúsculas) o None"""
+        return self._load()[1].get(name.lower())
+
+    def all(self):
+        return list(self._load()[0].values())
+
+    def invalidate(self):
+        self._data = None
+
+    def __deepcopy__(self, memo):
+        # es un singleton por modelo; DRF copia los argumentos de sus campos al instanciarlos
+        return self
+
+    def _on_change(self, sender, **kwargs):
+        self.invalidate()
+        transaction.on_commit(self.invalidate)
+
+
+async def aload_all():
+    """Carga (si hace falta) todas las tablas registradas desde código async"""
+    for table in _registry:
+        await table.aload()
+
+
+def invalidate_all():
+    """Vacía todas las tablas registradas (útil en tests y tras cargar fixtures)"""
+    for table in _registry:
+        table.invalidate()
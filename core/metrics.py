@@ -0,0 +1,335 @@
+# métricas en proceso expuestas en /api/metrics (formato de texto de Prometheus)
+#
+#  - http_requests_total{view, action, method, status}
+#  - http_request_duration_seconds{view, action} (histograma)
+#  - http_request_db_queries_total{view, action}
+#  - audit_log_writes_total{backend} (filas de logTask escritas, ver tasks/audit.py)
+# cada hilo incrementa su propio dict, así el camino caliente no toma locks; el
+# lock solo se usa al leer, para juntar los dicts de todos los hilos.
+# Con varios procesos (METRICS['DIR']) cada uno vuelca sus totales a un archivo
+# JSON en esa carpeta cada FLUSH_INTERVAL segundos y al terminar; /api/metrics
+# suma los archivos de los demás procesos con los valores en vivo del propio.
+# Las consultas se cuentan con un execute_wrapper fijo en cada conexión que suma
+# al contador de la petición en curso (una ContextVar): las conexiones son por
+# hilo y bajo ASGI la vista consulta desde el hilo de sync_to_async, que hereda
+# el contexto de la petición.
+
+import atexit
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DEFAULTS = {
+    'ENABLED': True,
+    'DIR': None,
+    'FLUSH_INTERVAL': 5.0,
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+}
+
+# nombre: (tipo, descripción)
+METRICS = {
+    'http_requests_total': ('counter', 'Peticiones atendidas por vista, acción, método y código de estado'),
+    'http_request_duration_seconds': ('histogram', 'Duración de las peticiones por vista y acción'),
+    'http_request_db_queries_total': ('counter', 'Consultas SQL ejecutadas por vista y acción'),
+    'audit_log_writes_total': ('counter', 'Filas de logTask escritas por backend de auditoría'),
+}
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'METRICS', {})}
+
+
+class Registry:
+    """Contadores e histogramas con un dict por hilo
+
+    las claves son (nombre, etiquetas) con las etiquetas como tupla de pares;
+    un histograma guarda [conteo por bucket..., +Inf, cantidad, suma]
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (hilo, dict) de cada hilo que registró algo
+        self._shards = []
+        # valores de hilos que ya terminaron
+        self._retired = {}
+        self._pid = os.getpid()
+        self._started = time.time()
+        self._timer = None
+        self.buckets = tuple(get_options()['BUCKETS'])
+
+    def _shard(self):
+        shard = getattr(self._local, 'values', None)
+        if shard is None:
+            shard = self._local.values = {}
+            with self._lock:
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+            self._schedule_flush()
+        return shard
+
+    def inc(self, name, labels=(), amount=1):
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        shard = self._shard()
+        key = (name, labels)
+        entry = shard.get(key)
+        if entry is None:
+            entry = shard[key] = [0] * (len(self.buckets) + 1) + [0, 0.0]
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-2] += 1
+        entry[-1] += value
+
+    def snapshot(self):
+        """Valores de este proceso sumando todos los hilos"""
+        with self._lock:
+            self._check_fork()
+            alive = []
+            for thread, shard in self._shards:
+                if thread() is None or not thread().is_alive():
+                    _merge(self._retired, shard.copy())
+                else:
+                    alive.append((thread, shard))
+            self._shards = alive
+            values = {}
+            _merge(values, self._retired)
+            for _, shard in alive:
+                # dict.copy() no suelta el GIL: no ve un dict a medio modificar
+                _merge(values, shard.copy())
+        return values
+
+    def collect(self):
+        """Valores de todos los procesos (si hay METRICS['DIR']) o solo de este"""
+        values = self.snapshot()
+        directory = get_options()['DIR']
+        if directory:
+            own = self._path(directory)
+            for path in Path(directory).glob('metrics-*.json'):
+                if path != own:
+                    _merge(values, _load(path))
+        return values
+
+    def reset(self):
+        with self._lock:
+            for _, shard in self._shards:
+                shard.clear()
+            self._retired = {}
+            self.buckets = tuple(get_options()['BUCKETS'])
+
+    # almacenamiento compartido entre procesos
+
+    def _path(self, directory):
+        # pid + hora de inicio: un pid reutilizado no pisa el archivo de un proceso anterior
+        return Path(directory) / f'metrics-{self._pid}-{int(self._started)}.json'
+
+    def flush(self):
+        directory = get_options()['DIR']
+        if not directory:
+            return
+        path = self._path(directory)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps([[name, labels, value] for (name, labels), value in self.snapshot().items()]))
+        os.replace(tmp, path)
+
+    def _schedule_flush(self):
+        options = get_options()
+        if not options['DIR'] or self._timer is not None:
+            return
+        self._timer = threading.Timer(options['FLUSH_INTERVAL'], self._flush_from_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_from_timer(self):
+        self._timer = None
+        try:
+            self.flush()
+        finally:
+            self._schedule_flush()
+
+    def _check_fork(self):
+        # un worker creado con fork hereda los valores del padre: empieza de cero
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._started = time.time()
+            self._shards, self._retired, self._timer = [], {}, None
+            self._local = threading.local()
+
+
+def _merge(target, values):
+    for key, value in values.items():
+        current = target.get(key)
+        if current is None:
+            target[key] = list(value) if isinstance(value, list) else value
+        elif isinstance(value, list):
+            target[key] = [a + b for a, b in zip(current, value)]
+        else:
+            target[key] = current + value
+
+
+def _load(path):
+    try:
+        rows = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        # el archivo se está reemplazando o quedó corrupto: se ignora esta vez
+        return {}
+    return {(name, tuple(tuple(pair) for pair in labels)): value for name, labels, value in rows}
+
+
+registry = Registry()
+atexit.register(lambda: registry.flush())
+
+
+@receiver(setting_changed)
+def _reset_on_settings_change(setting, **kwargs):
+    if setting == 'METRICS':
+        registry.reset()
+
+
+def inc(name, labels=(), amount=1):
+    registry.inc(name, labels, amount)
+
+
+def observe(name, labels, value):
+    registry.observe(name, labels, value)
+
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ''
+    escaped = (
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def render(values=None):
+    """Texto de exposición de Prometheus (versión 0.0.4)"""
+    values = registry.collect() if values is None else values
+    buckets = registry.buckets
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for (metric, labels), value in sorted(values.items()):
+            if metric != name:
+                continue
+            if kind != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), value[:-2]):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, (("le", bound),))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {value[-1]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value[-2]}')
+    return '\n'.join(lines) + '\n'
+
+
+def view_labels(view_func, method):
+    """(vista, acción) de una vista DRF; para vistas de Django, su nombre y el método"""
+    target = view_func
+    if not hasattr(target, 'cls'):
+        # vistas que envuelven una de DRF (core/asyncviews.hybrid_view)
+        target = getattr(view_func, '__wrapped__', view_func)
+    cls = getattr(target, 'cls', None)
+    if cls is None:
+        return (('view', getattr(view_func, '__name__', 'unknown')), ('action', method.lower()))
+    actions = getattr(target, 'actions', None) or {}
+    return (('view', cls.__name__), ('action', actions.get(method.lower(), method.lower())))
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+
+# contador de la petición en curso
+_counter = ContextVar('metrics_query_counter', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    counter = _counter.get()
+    if counter is not None:
+        counter.count += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class MetricsMiddleware:
+    """Registra cantidad, duración, código de estado y consultas de cada petición
+
+    sirve tanto en WSGI como en ASGI: con un get_response asíncrono usa __acall__
+    en vez de que Django lo adapte con sync_to_async
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_options()['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # las conexiones que se abran desde ahora y las ya abiertas en este hilo
+        connection_created.connect(install_query_counter, dispatch_uid='metrics_query_counter')
+        for connection in connections.all():
+            install_query_counter(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = QueryCounter()
+        token = _counter.set(counter)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _counter.reset(token)
+        return self.record(request, response, counter, start)
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        token = _counter.set(counter)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _counter.reset(token)
+        return self.record(request, response, counter, start)
+
+    def record(self, request, response, counter, start):
+        duration = time.perf_counter() - start
+        # no en process_view: bajo ASGI Django lo adaptaría con sync_to_async
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            labels = (('view', 'unmatched'), ('action', request.method.lower()))
+        else:
+            labels = view_labels(match.func, request.method)
+        inc('http_requests_total', labels + (('method', request.method), ('status', str(response.status_code))))
+        observe('http_request_duration_seconds', labels, duration)
+        if counter.count:
+            inc('http_request_db_queries_total', labels, counter.count)
+        return response
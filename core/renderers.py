@@ -0,0 +1,34 @@
+# JSON con orjson cuando está instalado (`pip install orjson`)
+#
+# produce los mismos bytes que el JSONRenderer de DRF con la configuración del
+# proyecto (compacto y UTF-8 sin escapar); si orjson no está, si se pide
+# indentación o si los datos tienen un tipo que orjson no conoce se usa el
+# JSONRenderer de siempre.
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None
+            or not (api_settings.COMPACT_JSON and api_settings.UNICODE_JSON and api_settings.STRICT_JSON)
+            or self.get_indent(accepted_media_type or '', renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            # fechas y dataclasses a TypeError: el encoder de DRF les da otro formato
+            ret = orjson.dumps(data, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # igual que JSONRenderer: U+2028/U+2029 escapados para poder incrustar el JSON en <script>
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
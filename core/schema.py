@@ -0,0 +1,120 @@
+# esquema OpenAPI precalculado
+#
+# SpectacularAPIView recorre todos los viewsets y serializers en cada petición a
+# /api/schema/ (y Swagger/Redoc lo piden en cada recarga). Con
+# OPENAPI_SCHEMA['STATIC'] el esquema se genera una vez en el deploy
+# (`manage.py build_openapi_schema`) y se sirve el archivo guardado:
+#  - un archivo por formato (schema.yaml, schema.json) en DIR, elegido con la
+#    misma negociación de contenido que la vista de drf-spectacular
+#  - ETag fuerte con el hash del contenido y Cache-Control público con MAX_AGE;
+#    si el cliente ya tiene esa versión se responde 304
+#  - el archivo se relee solo si cambió su fecha de modificación, así un deploy
+#    nuevo se sirve sin reiniciar los workers
+#  - si falta el archivo se genera una vez en memoria (con un aviso en el log)
+#  - ?lang= y ?version= siguen usando la generación dinámica
+# sin STATIC (desarrollo) /api/schema/ se comporta como siempre.
+
+import logging
+import os
+from hashlib import md5
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'STATIC': False,
+    'DIR': None,
+    # segundos que un navegador o proxy puede reutilizar el esquema sin revalidarlo
+    'MAX_AGE': 86400,
+}
+
+RENDERERS = {'yaml': OpenApiYamlRenderer, 'json': OpenApiJsonRenderer}
+
+# {formato: (clave, contenido, etag)}; la clave es (ruta, mtime) o None si se generó en memoria
+_artifacts = {}
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'OPENAPI_SCHEMA', {})}
+
+
+def artifact_path(fmt, directory=None):
+    directory = directory or get_options()['DIR'] or Path(settings.BASE_DIR) / 'openapi'
+    return Path(directory) / f'schema.{fmt}'
+
+
+def generate():
+    """{formato: bytes} del esquema, igual al que sirve SpectacularAPIView sin parámetros"""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS(urlconf=spectacular_settings.SERVE_URLCONF)
+    schema = generator.get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+    return {fmt: renderer().render(schema, renderer_context={}) for fmt, renderer in RENDERERS.items()}
+
+
+def write(directory=None):
+    """Genera el esquema y lo guarda en DIR; devuelve las rutas escritas"""
+    paths = []
+    for fmt, content in generate().items():
+        path = artifact_path(fmt, directory)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # reemplazo atómico: un worker nunca lee un archivo a medio escribir
+        tmp = path.with_name(f'.{path.name}.tmp')
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+        paths.append(path)
+    _artifacts.clear()
+    return paths
+
+
+def make_etag(content):
+    return '"%s"' % md5(content, usedforsecurity=False).hexdigest()
+
+
+def load(fmt):
+    """(contenido, etag) del esquema guardado en formato `fmt`"""
+    path = artifact_path(fmt)
+    try:
+        key = (path, path.stat().st_mtime_ns)
+    except FileNotFoundError:
+        key = None
+
+    cached = _artifacts.get(fmt)
+    if cached is not None and cached[0] == key:
+        return cached[1], cached[2]
+
+    if key is None:
+        logger.warning('No existe %s: se genera el esquema OpenAPI en memoria (ejecutar build_openapi_schema)', path)
+        generated = generate()
+        for other, content in generated.items():
+            _artifacts[other] = (None, content, make_etag(content))
+    else:
+        content = path.read_bytes()
+        _artifacts[fmt] = (key, content, make_etag(content))
+    return _artifacts[fmt][1], _artifacts[fmt][2]
+
+
+class StaticSchemaView(SpectacularAPIView):
+    """/api/schema/ desde el archivo generado en el deploy si OPENAPI_SCHEMA['STATIC'] (ver core/schema.py)"""
+
+    def _get_schema_response(self, request):
+        options = get_options()
+        if not options['STATIC'] or 'lang' in request.GET or 'version' in request.GET:
+            return super()._get_schema_response(request)
+
+        renderer = request.accepted_renderer
+        content, etag = load(renderer.format)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            # el mismo Content-Type que arma DRF para ese renderer
+            content_type = renderer.media_type + (f'; charset={renderer.charset}' if renderer.charset else '')
+            response = HttpResponse(content, content_type=content_type)
+            response['Content-Disposition'] = f'inline; filename="{self._get_filename(request, None)}"'
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=options['MAX_AGE'])
+        return response
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -45,6 +46,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # primero, para medir la petición completa (ver REQUEST_TIMING)
+    'core.timing.RequestTimingMiddleware',
+    # contadores e histogramas por vista expuestos en /api/metrics (ver METRICS)
+    'core.metrics.MetricsMiddleware',
+    # gzip/zstd negociado para respuestas grandes (ver RESPONSE_COMPRESSION)
+    'core.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,14 +81,48 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'core.wsgi.application'
 
+# enrutar las lecturas frecuentes a vistas async (core/asyncviews.py); core/asgi.py lo activa
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS', '0') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# perfil de sqlite para varios procesos/hilos escribiendo a la vez (core/db/sqlite3):
+#  - WAL: los lectores no bloquean al escritor ni al revés
+#  - synchronous=NORMAL: en WAL no pierde consistencia, solo las últimas
+#    transacciones ante un corte de energía
+#  - busy_timeout: esperar el lock en vez de fallar con "database is locked"
+#  - BEGIN IMMEDIATE en las transacciones y conexiones persistentes (CONN_MAX_AGE)
+# SQLITE_PROFILE=stock vuelve al backend de Django sin ajustes
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'production')
+
+SQLITE_PROFILES = {
+    'stock': {
+        'ENGINE': 'django.db.backends.sqlite3',
+    },
+    'production': {
+        'ENGINE': 'core.db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'busy_timeout': 5000,
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                # 256 MB mapeados en memoria y ~64 MB de cache de páginas por conexión
+                'mmap_size': 268435456,
+                'cache_size': -65536,
+                'temp_store': 'MEMORY',
+            },
+        },
+    },
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        **SQLITE_PROFILES[SQLITE_PROFILE],
     }
 }
 
@@ -132,12 +173,17 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson si está instalado, mismos bytes que JSONRenderer (ver core/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 
     'EXCEPTION_HANDLER': 'core.exceptions.custom_exception_handler',
 }
@@ -148,9 +194,124 @@ SPECTACULAR_SETTINGS = {
     'VERSION': '1.0.0',
 }
 
+# esquema OpenAPI precalculado (core/schema.py); en el deploy: `python manage.py build_openapi_schema`
+#  - STATIC: /api/schema/ sirve el archivo guardado con ETag y Cache-Control
+#    largo; sin STATIC (desarrollo) se genera en cada petición
+#  - DIR: carpeta de schema.yaml y schema.json
+#  - MAX_AGE: segundos de Cache-Control
+OPENAPI_SCHEMA = {
+    'STATIC': not DEBUG,
+    'DIR': BASE_DIR / 'openapi',
+    'MAX_AGE': 86400,
+}
+
 
 # Simple JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7)
 }
+
+# Autenticación por claims del token, ver users/authentication.py
+# STATE_TTL: segundos que se confía en la versión/estado cacheado de un usuario antes de releerlo
+JWT_CLAIMS_AUTH = {
+    'STATE_TTL': 30,
+    'STATE_CACHE_SIZE': 10000,
+}
+
+
+# Auditoría de tareas (logTask), ver tasks/audit.py
+# BACKEND: 'sync' escribe cada log en el momento, 'buffered' los acumula y escribe en lotes
+#  - 'buffered' es opcional y pierde durabilidad: los logs se escriben hasta
+#    FLUSH_INTERVAL segundos después del commit de la tarea y los que siguen en
+#    memoria se pierden si el proceso muere sin apagarse (kill -9, OOM). Como
+#    /api/tasks/changes/ y los avisos de tasks/push.py se arman desde logTask,
+#    ese cambio tampoco llegaría nunca a la sincronización de los clientes
+TASK_AUDIT_LOG = {
+    'BACKEND': 'sync',
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 1.0,
+    'FLUSH_ON_COMMIT': False,
+}
+
+
+# Catálogos en memoria (Role, Status, Category), ver core/lookups.py
+# segundos que otro proceso puede tardar en ver un cambio; None desactiva la expiración
+LOOKUP_CACHE_TTL = 60
+
+
+# Cache de listas de tareas y versión de la colección para su ETag (tasks/cache.py)
+# usa la cache ALIAS de CACHES (sin CACHES, la locmem por defecto de Django). El
+# lock de reconstrucción usa cache.add y las generaciones cache.incr, que tienen
+# que ser atómicos entre procesos: con varios workers configurar Redis o
+# Memcached, p. ej. 'django.core.cache.backends.redis.RedisCache'. locmem solo
+# sirve con un único proceso; FileBasedCache no es atómico y no sirve.
+TASK_LIST_CACHE = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+    # stampede: segundos que dura el lock de reconstrucción y que esperan las demás peticiones
+    'LOCK_TIMEOUT': 10,
+    'LOCK_WAIT': 2.0,
+}
+
+# avisos de cambios por SSE y long-poll bajo ASGI (tasks/push.py)
+TASK_PUSH = {
+    # segundos entre lecturas de logs nuevos (una consulta por proceso, no por conexión)
+    'POLL_INTERVAL': 1.0,
+    'HEARTBEAT': 15.0,
+    'STREAM_TIMEOUT': 300.0,
+    'LONG_POLL_TIMEOUT': 25.0,
+}
+
+
+# Retención de logs y de tareas borradas, ver tasks/retention.py y el comando apply_retention
+# los registros se archivan como NDJSON comprimido en ARCHIVE_DIR antes de borrarse,
+# de a BATCH_SIZE filas por transacción
+TASK_RETENTION = {
+    'LOG_DAYS': 90,
+    'DELETED_TASK_DAYS': 30,
+    'ARCHIVE_DIR': BASE_DIR / 'archive',
+    'BATCH_SIZE': 500,
+    # con un número de días, apply_retention mueve las tareas borradas a DeletedTask (tasks/tombstones.py)
+    'TOMBSTONE_DAYS': None,
+}
+
+
+# Instrumentación por petición (core/timing.py): cabecera Server-Timing con
+# consultas, tiempo SQL, serializers y auth, y log de las peticiones lentas.
+# Desactivada, el middleware se descarta al arrancar y no agrega costo.
+REQUEST_TIMING = {
+    'ENABLED': DEBUG,
+    'HEADER': True,
+    'SLOW_REQUEST_MS': 500,
+    'SLOWEST_QUERIES': 3,
+}
+
+# listas de tareas y logs sin paginar armadas desde values_list() (tasks/fastlist.py)
+FAST_LIST_SERIALIZATION = True
+
+# métricas en proceso (core/metrics.py), visibles para admins en /api/metrics
+#  - DIR: carpeta compartida para sumar las métricas de varios workers
+#    (gunicorn/uvicorn con más de un proceso); sin ella cada proceso reporta solo lo suyo
+#  - FLUSH_INTERVAL: cada cuántos segundos cada proceso vuelca sus totales a DIR
+#  - BUCKETS: límites en segundos del histograma de duración
+METRICS = {
+    'ENABLED': True,
+    'DIR': os.environ.get('METRICS_DIR') or None,
+    'FLUSH_INTERVAL': 5.0,
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+}
+
+# compresión de respuestas según Accept-Encoding (core/compression.py)
+#  - MIN_SIZE: bytes mínimos del cuerpo para comprimir
+#  - ENCODINGS: en orden de preferencia; zstd solo si está disponible
+#    (Python 3.14 o `pip install zstandard`), si no se usa gzip
+#  - las respuestas en streaming (exportaciones, SSE) nunca se comprimen
+RESPONSE_COMPRESSION = {
+    'ENABLED': True,
+    'MIN_SIZE': 1024,
+    'ENCODINGS': ('zstd', 'gzip'),
+    'GZIP_LEVEL': 6,
+    'ZSTD_LEVEL': 3,
+}
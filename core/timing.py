@@ -0,0 +1,205 @@
+# instrumentación por petición: consultas SQL, serializers y autenticación
+#
+# RequestTimingMiddleware mide cada petición y devuelve los tiempos en la
+# cabecera Server-Timing (visible en las devtools del navegador):
+#  - db: cantidad y tiempo total de consultas (execute_wrapper de cada conexión)
+#  - ser: tiempo dentro de serializer.data
+#  - auth: autenticación JWT y verificación de permisos de DRF
+#  - total: la petición completa
+# las peticiones más lentas que SLOW_REQUEST_MS se registran en el logger
+# 'core.timing' con sus consultas más lentas.
+# Con REQUEST_TIMING['ENABLED'] = False el middleware se descarta al arrancar
+# (MiddlewareNotUsed) y los métodos de DRF no se envuelven: no cuesta nada.
+# Las consultas se miden con un execute_wrapper fijo en cada conexión que
+# delega en el RequestTimer de la petición en curso (una ContextVar): las
+# conexiones son por hilo y bajo ASGI la vista consulta desde el hilo de
+# sync_to_async, que hereda el contexto de la petición.
+
+import logging
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'HEADER': True,
+    'SLOW_REQUEST_MS': 500,
+    'SLOWEST_QUERIES': 3,
+}
+
+_timer = ContextVar('request_timer', default=None)
+_instrumented = False
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'REQUEST_TIMING', {})}
+
+
+class RequestTimer:
+    """Tiempos acumulados de una petición"""
+
+    def __init__(self, keep_queries):
+        self.keep_queries = keep_queries
+        self.spans = {'ser': 0.0, 'auth': 0.0}
+        self.queries = 0
+        self.sql_time = 0.0
+        # las consultas más lentas, (duración, sql), ordenadas de mayor a menor
+        self.slowest = []
+        self._depth = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper de Django
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.sql_time += duration
+            if len(self.slowest) < self.keep_queries or duration > self.slowest[-1][0]:
+                self.slowest.append((duration, sql))
+                self.slowest.sort(key=lambda item: item[0], reverse=True)
+                del self.slowest[self.keep_queries:]
+
+    def enter(self, name):
+        depth = self._depth.get(name, 0)
+        self._depth[name] = depth + 1
+        # solo el tramo más externo cuenta (un serializer dentro de otro no suma dos veces)
+        return time.perf_counter() if depth == 0 else None
+
+    def exit(self, name, start):
+        self._depth[name] -= 1
+        if start is not None:
+            self.spans[name] += time.perf_counter() - start
+
+    def header(self, total):
+        parts = [
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} consultas"',
+            *(f'{name};dur={duration * 1000:.1f}' for name, duration in self.spans.items()),
+            f'total;dur={total * 1000:.1f}',
+        ]
+        return ', '.join(parts)
+
+
+def current():
+    return _timer.get()
+
+
+def timed(name):
+    """Decorador: suma el tiempo de la función al tramo `name` de la petición en curso"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timer = current()
+            if timer is None:
+                return func(*args, **kwargs)
+            start = timer.enter(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timer.exit(name, start)
+        return wrapper
+    return decorator
+
+
+def time_queries(execute, sql, params, many, context):
+    timer = current()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_timer(connection, **kwargs):
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
+
+
+def _timed_property(prop, name):
+    return property(timed(name)(prop.fget), prop.fset, prop.fdel, prop.__doc__)
+
+
+def instrument():
+    """Envuelve serializer.data, la autenticación/permisos de DRF y las conexiones (una sola vez)"""
+    global _instrumented
+    if _instrumented:
+        return
+    from rest_framework import serializers
+    from rest_framework.views import APIView
+
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        cls.data = _timed_property(cls.__dict__['data'], 'ser')
+    for method in ('perform_authentication', 'check_permissions', 'check_object_permissions'):
+        setattr(APIView, method, timed('auth')(getattr(APIView, method)))
+    # las conexiones que se abran desde ahora y las ya abiertas en este hilo
+    connection_created.connect(install_query_timer, dispatch_uid='request_timer')
+    for connection in connections.all():
+        install_query_timer(connection)
+    _instrumented = True
+
+
+class RequestTimingMiddleware:
+    """Cabecera Server-Timing y log de peticiones lentas (ver REQUEST_TIMING en settings)
+
+    sirve tanto en WSGI como en ASGI: con un get_response asíncrono usa __acall__
+    en vez de que Django lo adapte con sync_to_async
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        options = get_options()
+        if not options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = options['HEADER']
+        self.slow = options['SLOW_REQUEST_MS'] / 1000
+        self.keep_queries = options['SLOWEST_QUERIES']
+        instrument()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = RequestTimer(self.keep_queries)
+        token = _timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _timer.reset(token)
+        return self.finish(request, response, timer, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timer = RequestTimer(self.keep_queries)
+        token = _timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timer.reset(token)
+        return self.finish(request, response, timer, time.perf_counter() - start)
+
+    def finish(self, request, response, timer, total):
+        if self.header:
+            response['Server-Timing'] = timer.header(total)
+        if total >= self.slow:
+            self.log_slow(request, response, timer, total)
+        return response
+
+    def log_slow(self, request, response, timer, total):
+        slowest = '\n'.join(f'  {duration * 1000:.1f} ms: {sql}' for duration, sql in timer.slowest)
+        logger.warning(
+            'Petición lenta %s %s -> %s en %.1f ms (%d consultas, %.1f ms SQL, %.1f ms serializers, %.1f ms auth)\n%s',
+            request.method, request.get_full_path(), response.status_code, total * 1000,
+            timer.queries, timer.sql_time * 1000, timer.spans['ser'] * 1000, timer.spans['auth'] * 1000, slowest,
+        )
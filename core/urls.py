@@ -17,16 +17,19 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import (
-    SpectacularAPIView,
     SpectacularRedocView,
     SpectacularSwaggerView,
 )
 
+from .schema import StaticSchemaView
+from .views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('api/schema/', StaticSchemaView.as_view(), name='schema'),
     path('api/swagger/', SpectacularSwaggerView.as_view(), name='swagger-ui'),
     path('api/redoc/', SpectacularRedocView.as_view(), name='redoc'),
+    path('api/metrics', MetricsView.as_view(), name='metrics'),
     path('api/users/', include('users.urls')),
     path('api/', include('tasks.urls')),
 ]
@@ -0,0 +1,32 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from users.permissions import IsAdmin
+from . import metrics
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            # errores de DRF (401/403) como texto
+            return '\n'.join(f'{key}: {value}' for key, value in data.items()) + '\n'
+        return data
+
+
+@extend_schema(tags=["Metrics"])
+class MetricsView(APIView):
+    """Métricas de la API en el formato de texto de Prometheus (solo admins)"""
+
+    permission_classes = (IsAdmin,)
+    renderer_classes = (PrometheusRenderer,)
+
+    @extend_schema(responses={(200, 'text/plain'): OpenApiTypes.STR})
+    def get(self, request):
+        return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,7 +1,175 @@
 import os
+from contextlib import contextmanager
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 import django  
 
 django.setup()
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.lookups import invalidate_all
+from users.models import Role
+from tasks.models import Task, Status, Category
+
+
+@pytest.fixture(autouse=True)
+def sync_audit_log(settings):
+    # los tests esperan ver los logTask en cuanto se guarda la tarea
+    settings.TASK_AUDIT_LOG = {"BACKEND": "sync"}
+
+
+@pytest.fixture(autouse=True)
+def local_cache(settings):
+    # cache en memoria y vacía para cada test
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests"},
+    }
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_lookup_tables():
+    # cada test revierte su transacción sin emitir señales, los catálogos en memoria se descartan
+    invalidate_all()
+    yield
+    invalidate_all()
+
+
+@contextmanager
+def _query_budget(max_queries):
+    # falla si el bloque ejecuta más consultas de las permitidas
+    with CaptureQueriesContext(connection) as ctx:
+        yield ctx
+    executed = len(ctx.captured_queries)
+    if executed > max_queries:
+        detail = "\n".join(f"  {i}. {q['sql']}" for i, q in enumerate(ctx.captured_queries, 1))
+        pytest.fail(f"Se ejecutaron {executed} consultas, el presupuesto es {max_queries}:\n{detail}")
+
+
+@pytest.fixture
+def query_budget(db):
+    """Context manager que limita el número de consultas de un bloque.
+
+    uso:
+        with query_budget(3):
+            api_client.get("/api/tasks/")
+    """
+    return _query_budget
+
+
+@pytest.fixture
+def assert_constant_queries(db):
+    """Verifica que el número de consultas de una petición no crece con el tamaño del resultado.
+
+    recibe `request` (función sin argumentos que ejecuta la petición) y `grow`
+    (función que agrega más filas); la petición se ejecuta antes y después de crecer
+    y ambas mediciones deben coincidir.
+    """
+    def check(request, grow):
+        with CaptureQueriesContext(connection) as before:
+            request()
+        grow()
+        with _query_budget(len(before.captured_queries)) as after:
+            request()
+        return len(after.captured_queries)
+    return check
+
+
+@pytest.fixture
+def roles(db):
+    # Crear roles necesarios para las pruebas
+    admin_role = Role.objects.create(name="admin")
+    client_role = Role.objects.create(name="client")
+    return {"admin": admin_role, "client": client_role}
+
+
+@pytest.fixture
+def admin_user(db, roles):
+    # Crear un usuario admin para las pruebas
+    user_model = get_user_model()
+    email = "admin@example.com"
+    return user_model.objects.create_user(  # type: ignore[arg-type]
+        email=email,
+        password="adminpass123",
+        role=roles["admin"],
+        is_staff=True,
+    )
+
+
+@pytest.fixture
+def client_user_a(db, roles):
+    # Crear un usuario cliente para las pruebas
+    user_model = get_user_model()
+    email = "client_a@example.com"
+    return user_model.objects.create_user(  # type: ignore[arg-type]
+        email=email,
+        password="clientpass123",
+        role=roles["client"],
+    )
+
+@pytest.fixture
+def client_user_b(db, roles):
+    # Crear otro usuario cliente para las pruebas
+    user_model = get_user_model()
+    email = "client_b@example.com"
+    return user_model.objects.create_user(  # type: ignore[arg-type]
+        email=email,
+        password="clientpass123",
+        role=roles["client"],
+    )
+
+@pytest.fixture
+def statuses(db):
+    # Crear estados necesarios para las pruebas
+    pending = Status.objects.create(name="pendiente")
+    in_progress = Status.objects.create(name="en_progreso")
+    completed = Status.objects.create(name="completado")
+    return {"pendiente": pending, "en_progreso": in_progress, "completado": completed}
+
+@pytest.fixture
+def categories(db):
+    # Crear categorías necesarias para las pruebas
+    trabajo = Category.objects.create(name="trabajo")
+    personal = Category.objects.create(name="personal")
+    otro = Category.objects.create(name="otro")
+    return {"trabajo": trabajo, "personal": personal, "otro": otro}
+
+@pytest.fixture
+def tasks(db, client_user_a, client_user_b, statuses, categories):
+    # Crear tareas para los usuarios cliente
+    task1 = Task.objects.create(
+        title="Tarea 1",
+        description="Descripción de la tarea 1",
+        user=client_user_a,
+        status=statuses["pendiente"],
+        category=categories["trabajo"],
+    )
+    task2 = Task.objects.create(
+        title="Tarea 2",
+        description="Descripción de la tarea 2",
+        user=client_user_a,
+        status=statuses["en_progreso"],
+        category=categories["personal"],
+    )
+    task3 = Task.objects.create(
+        title="Tarea 3",
+        description="Descripción de la tarea 3",
+        user=client_user_b,
+        status=statuses["completado"],
+        category=categories["otro"],
+    )
+    return {"task1": task1, "task2": task2, "task3": task3}
+
+@pytest.fixture
+def api_client():
+    # Proporcionar un cliente API para las pruebas
+    return APIClient()
@@ -1,100 +1,27 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import threading
+from datetime import timedelta
+
 import pytest
+from asgiref.sync import async_to_sync, sync_to_async
 from rest_framework import status
-from rest_framework.test import APIClient
-from django.contrib.auth import get_user_model
-from users.models import Role
-from tasks.models import Task, Status, Category
-
-
-@pytest.fixture
-def roles(db):
-    # Crear roles necesarios para las pruebas
-    admin_role = Role.objects.create(name="admin")
-    client_role = Role.objects.create(name="client")
-    return {"admin": admin_role, "client": client_role}
-
-
-@pytest.fixture
-def admin_user(db, roles):
-    # Crear un usuario admin para las pruebas
-    user_model = get_user_model()
-    email = "admin@example.com"
-    return user_model.objects.create_user(  # type: ignore[arg-type]
-        email=email,
-        password="adminpass123",
-        role=roles["admin"],
-        is_staff=True,
-    )
-
-
-@pytest.fixture
-def client_user_a(db, roles):
-    # Crear un usuario cliente para las pruebas
-    user_model = get_user_model()
-    email = "client_a@example.com"
-    return user_model.objects.create_user(  # type: ignore[arg-type]
-        email=email,
-        password="clientpass123",
-        role=roles["client"],
-    )
-
-@pytest.fixture
-def client_user_b(db, roles):
-    # Crear otro usuario cliente para las pruebas
-    user_model = get_user_model()
-    email = "client_b@example.com"
-    return user_model.objects.create_user(  # type: ignore[arg-type]
-        email=email,
-        password="clientpass123",
-        role=roles["client"],
-    )
-
-@pytest.fixture
-def statuses(db):
-    # Crear estados necesarios para las pruebas
-    pending = Status.objects.create(name="pendiente")
-    in_progress = Status.objects.create(name="en_progreso")
-    completed = Status.objects.create(name="completado")
-    return {"pendiente": pending, "en_progreso": in_progress, "completado": completed}
-
-@pytest.fixture
-def categories(db):
-    # Crear categorías necesarias para las pruebas
-    trabajo = Category.objects.create(name="trabajo")
-    personal = Category.objects.create(name="personal")
-    otro = Category.objects.create(name="otro")
-    return {"trabajo": trabajo, "personal": personal, "otro": otro}
-
-@pytest.fixture
-def tasks(db, client_user_a, client_user_b, statuses, categories):
-    # Crear tareas para los usuarios cliente
-    task1 = Task.objects.create(
-        title="Tarea 1",
-        description="Descripción de la tarea 1",
-        user=client_user_a,
-        status=statuses["pendiente"],
-        category=categories["trabajo"],
-    )
-    task2 = Task.objects.create(
-        title="Tarea 2",
-        description="Descripción de la tarea 2",
-        user=client_user_a,
-        status=statuses["en_progreso"],
-        category=categories["personal"],
-    )
-    task3 = Task.objects.create(
-        title="Tarea 3",
-        description="Descripción de la tarea 3",
-        user=client_user_b,
-        status=statuses["completado"],
-        category=categories["otro"],
-    )
-    return {"task1": task1, "task2": task2, "task3": task3}
-
-@pytest.fixture
-def api_client():
-    # Proporcionar un cliente API para las pruebas
-    return APIClient()
+from rest_framework.test import force_authenticate
+from django.core.management import call_command
+from django.test import AsyncRequestFactory
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from tasks import audit, changes, push, retention, stats
+from tasks import lookups as tasks_lookups
+from tasks.models import Task, Status, Category, logTask, DeletedTask
+from tasks.async_views import task_list, task_detail, task_events, task_events_poll
+from tasks.views import TaskViewSet
+from users.tokens import RoleRefreshToken
+
 
 # solo usuarios admin pueden crear y editar estados.
 @pytest.mark.django_db
@@ -241,7 +168,7 @@ class TestTaskWritePermissions:
         })
         assert response.status_code == status.HTTP_201_CREATED
         assert response.data["title"] == "Nueva Tarea"
-        assert response.data["status"]["name"].lower() == "pendiente"  # El estado debe ser 'pendiente' por defecto
+        assert response.data["status"] == statuses["pendiente"].id  # El estado debe ser 'pendiente' por defecto
 
     def test_client_cannot_create_task_with_duplicate_title(self, api_client, client_user_a, tasks, categories):
         # Verificar que el usuario cliente no puede crear una tarea con un título duplicado
@@ -301,3 +228,1178 @@ class TestTaskWritePermissions:
         })
         assert response.status_code == status.HTTP_200_OK
         assert response.data["title"] == "Tarea 1 Actualizada por Admin"
+
+
+# paginación por cursor de las tareas
+@pytest.mark.django_db
+class TestTaskCursorPagination:
+    endpoint = "/api/tasks/"
+
+    def test_pages_cover_all_tasks_without_duplicates(self, api_client, admin_user, tasks):
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get(self.endpoint, {"page_size": 2})
+        assert response.status_code == status.HTTP_200_OK
+        assert "count" not in response.data
+        first_page = [task["id"] for task in response.data["results"]]
+        assert len(first_page) == 2
+        assert response.data["next"] is not None
+
+        response = api_client.get(response.data["next"])
+        assert response.status_code == status.HTTP_200_OK
+        second_page = [task["id"] for task in response.data["results"]]
+        assert response.data["next"] is None
+
+        expected = [t.id for t in sorted(tasks.values(), key=lambda t: (t.created_at, t.id), reverse=True)]
+        assert first_page + second_page == expected
+
+    def test_pagination_respects_filters(self, api_client, client_user_a, tasks, statuses):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.get(self.endpoint, {"page_size": 1, "status": statuses["pendiente"].id})
+        assert response.status_code == status.HTTP_200_OK
+        assert [task["id"] for task in response.data["results"]] == [tasks["task1"].id]
+        assert response.data["next"] is None
+
+    def test_invalid_cursor_returns_404(self, api_client, client_user_a, tasks):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.get(self.endpoint, {"cursor": "no-es-un-cursor"})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+# las lecturas de tareas y logs no deben crecer en consultas con el número de filas
+@pytest.mark.django_db
+class TestQueryBudget:
+
+    @pytest.fixture(autouse=True)
+    def without_list_cache(self, settings):
+        # se mide el camino contra la base, no las respuestas cacheadas
+        settings.TASK_LIST_CACHE = {"ENABLED": False}
+
+    def _grow(self, users, statuses, categories):
+        def grow():
+            for user in users:
+                for i in range(5):
+                    Task.objects.create(
+                        title=f"Extra {user.id}-{i}",
+                        user=user,
+                        status=statuses["en_progreso"],
+                        category=categories["personal"],
+                    )
+        return grow
+
+    def test_task_list_queries_are_constant(self, api_client, admin_user, client_user_a, client_user_b,
+                                            tasks, statuses, categories, assert_constant_queries):
+        api_client.force_authenticate(user=admin_user)
+        assert_constant_queries(
+            lambda: api_client.get("/api/tasks/"),
+            self._grow([client_user_a, client_user_b], statuses, categories),
+        )
+
+    def test_client_task_list_queries_are_constant(self, api_client, client_user_a, tasks,
+                                                   statuses, categories, query_budget, assert_constant_queries):
+        api_client.force_authenticate(user=client_user_a)
+        api_client.get("/api/tasks/")
+        # lectura de tareas (el ETag sale de las generaciones de la cache)
+        with query_budget(1):
+            api_client.get("/api/tasks/")
+        assert_constant_queries(
+            lambda: api_client.get("/api/tasks/"),
+            self._grow([client_user_a], statuses, categories),
+        )
+
+    def test_log_list_queries_are_constant(self, api_client, admin_user, client_user_a, tasks,
+                                           statuses, categories, assert_constant_queries):
+        api_client.force_authenticate(user=admin_user)
+        assert_constant_queries(
+            lambda: api_client.get("/api/logs/"),
+            self._grow([client_user_a], statuses, categories),
+        )
+
+
+# escritura de logs de auditoría
+@pytest.mark.django_db
+class TestAuditLog:
+
+    def test_sync_sink_writes_log_on_save_and_delete(self, api_client, client_user_a, tasks):
+        task = tasks["task1"]
+        assert logTask.objects.filter(task=task, action="CREATED").count() == 1
+
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.delete(f"/api/tasks/{task.id}/")
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert list(logTask.objects.filter(task=task).values_list("action", flat=True).order_by("id")) == [
+            "CREATED", "DELETED"
+        ]
+
+    def test_buffered_sink_flushes_on_batch_size(self, settings, client_user_a, statuses,
+                                                 django_capture_on_commit_callbacks):
+        settings.TASK_AUDIT_LOG = {"BACKEND": "buffered", "BATCH_SIZE": 3, "FLUSH_INTERVAL": 0}
+        with django_capture_on_commit_callbacks(execute=True):
+            for i in range(2):
+                Task.objects.create(title=f"Buffer {i}", user=client_user_a, status=statuses["pendiente"])
+        assert logTask.objects.count() == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Task.objects.create(title="Buffer 2", user=client_user_a, status=statuses["pendiente"])
+        assert logTask.objects.count() == 3
+
+    def test_buffered_sink_keeps_event_time_and_flushes_on_demand(self, settings, client_user_a, statuses,
+                                                                  django_capture_on_commit_callbacks):
+        settings.TASK_AUDIT_LOG = {"BACKEND": "buffered", "BATCH_SIZE": 100, "FLUSH_INTERVAL": 0}
+        with django_capture_on_commit_callbacks(execute=True):
+            task = Task.objects.create(title="Buffer", user=client_user_a, status=statuses["pendiente"])
+        assert logTask.objects.count() == 0
+
+        audit.flush()
+        log = logTask.objects.get(task=task)
+        assert log.action == "CREATED"
+        assert log.timestamp >= task.created_at
+
+    def test_buffered_sink_drops_events_of_rolled_back_transactions(self, settings, client_user_a, statuses,
+                                                                    django_capture_on_commit_callbacks):
+        settings.TASK_AUDIT_LOG = {"BACKEND": "buffered", "BATCH_SIZE": 1, "FLUSH_INTERVAL": 0}
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            with pytest.raises(RuntimeError):
+                with transaction.atomic():
+                    Task.objects.create(title="Rollback", user=client_user_a, status=statuses["pendiente"])
+                    raise RuntimeError
+        assert callbacks == []
+        audit.flush()
+        assert logTask.objects.count() == 0
+
+
+# operaciones en lote sobre tareas
+@pytest.mark.django_db
+class TestTaskBulkOperations:
+    endpoint = "/api/tasks/bulk/"
+
+    def test_client_bulk_create(self, api_client, client_user_a, statuses, categories, query_budget):
+        api_client.force_authenticate(user=client_user_a)
+        payload = {"tasks": [
+            {"title": f"Lote {i}", "description": "desc", "category_id": categories["trabajo"].id}
+            for i in range(20)
+        ]}
+        # catálogos en frío (3) + 2 savepoints + insert tareas + insert logs + 2 release + lectura
+        # + contador del grupo: update, y como es el primero savepoint + insert + release
+        with query_budget(14):
+            response = api_client.post(self.endpoint, payload, format="json")
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(response.data) == 20
+        assert {task["status"] for task in response.data} == {statuses["pendiente"].id}
+        assert Task.objects.filter(user=client_user_a).count() == 20
+        assert logTask.objects.filter(task__user=client_user_a, action="CREATED").count() == 20
+
+    def test_bulk_create_rejects_duplicate_titles(self, api_client, client_user_a, tasks, categories):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.post(self.endpoint, {"tasks": [
+            {"title": "Nueva", "category_id": categories["trabajo"].id},
+            {"title": "Tarea 1", "category_id": categories["trabajo"].id},
+        ]}, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Ya existe una tarea con el mismo título para este usuario." in str(response.data)
+        assert not Task.objects.filter(title="Nueva").exists()
+
+    def test_bulk_create_rejects_unknown_category(self, api_client, client_user_a, statuses, categories):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.post(self.endpoint, {"tasks": [
+            {"title": "Nueva", "category_id": 999999},
+        ]}, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "category_id" in response.data["error"]
+
+    def test_client_bulk_update_only_own_tasks(self, api_client, client_user_a, tasks, statuses):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.patch(self.endpoint, {"tasks": [
+            {"id": tasks["task1"].id, "status_id": statuses["completado"].id},
+            {"id": tasks["task3"].id, "title": "No es mía"},
+        ]}, format="json")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        tasks["task1"].refresh_from_db()
+        assert tasks["task1"].status == statuses["pendiente"]
+
+        response = api_client.patch(self.endpoint, {"tasks": [
+            {"id": tasks["task1"].id, "status_id": statuses["completado"].id},
+            {"id": tasks["task2"].id, "title": "Tarea 2 editada"},
+        ]}, format="json")
+        assert response.status_code == status.HTTP_200_OK
+        tasks["task1"].refresh_from_db()
+        tasks["task2"].refresh_from_db()
+        assert tasks["task1"].status == statuses["completado"]
+        assert tasks["task2"].title == "Tarea 2 editada"
+        assert logTask.objects.filter(action="UPDATED").count() == 2
+
+    def test_bulk_update_logs_only_live_tasks(self, api_client, admin_user, client_user_a, tasks):
+        api_client.force_authenticate(user=client_user_a)
+        api_client.delete(f"/api/tasks/{tasks['task1'].id}/")
+
+        # el admin puede editar una tarea borrada; como en PATCH individual, eso no deja log
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.patch(self.endpoint, {"tasks": [
+            {"id": tasks["task1"].id, "title": "Borrada editada"},
+            {"id": tasks["task3"].id, "title": "Viva editada"},
+        ]}, format="json")
+        assert response.status_code == status.HTTP_200_OK
+        assert list(logTask.objects.filter(action="UPDATED").values_list("task_id", flat=True)) == [tasks["task3"].id]
+
+        api_client.patch(f"/api/tasks/{tasks['task1'].id}/", {"title": "Borrada otra vez"})
+        assert logTask.objects.filter(action="UPDATED", task_id=tasks["task1"].id).count() == 0
+
+    def test_bulk_delete(self, api_client, client_user_a, client_user_b, admin_user, tasks):
+        api_client.force_authenticate(user=client_user_b)
+        response = api_client.delete(self.endpoint, {"ids": [tasks["task1"].id]}, format="json")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.delete(self.endpoint, {"ids": [tasks["task1"].id, tasks["task2"].id]}, format="json")
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert Task.all_objects.filter(user=client_user_a, is_deleted=True).count() == 2
+        assert logTask.objects.filter(action="DELETED").count() == 2
+
+        response = api_client.get("/api/tasks/")
+        assert response.data == []
+
+        # el admin puede operar sobre tareas de cualquier usuario
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.delete(self.endpoint, {"ids": [tasks["task3"].id]}, format="json")
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+# catálogos (roles, estados, categorías) resueltos desde memoria
+@pytest.mark.django_db
+class TestLookupTables:
+
+    def test_task_create_resolves_catalogs_without_queries(self, api_client, client_user_a, statuses,
+                                                           categories, query_budget):
+        api_client.force_authenticate(user=client_user_a)
+        payload = {"title": "Primera", "category_id": categories["trabajo"].id}
+        api_client.post("/api/tasks/", payload)
+
+        # con la cache caliente solo quedan: savepoint, insert de la tarea, insert del log,
+        # update del contador (el grupo ya existe) y release
+        payload = {"title": "Segunda", "category_id": categories["trabajo"].id}
+        with query_budget(5):
+            response = api_client.post("/api/tasks/", payload)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["status"] == statuses["pendiente"].id
+
+    def test_unknown_category_is_rejected(self, api_client, client_user_a, statuses, categories):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.post("/api/tasks/", {"title": "X", "category_id": 999999})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "category_id" in response.data["error"]
+
+    def test_catalog_changes_invalidate_cache(self, api_client, client_user_a, statuses, categories):
+        api_client.force_authenticate(user=client_user_a)
+        api_client.post("/api/tasks/", {"title": "Primera", "category_id": categories["trabajo"].id})
+
+        nueva = Category.objects.create(name="nueva")
+        response = api_client.post("/api/tasks/", {"title": "Segunda", "category_id": nueva.id})
+        assert response.status_code == status.HTTP_201_CREATED
+
+        nueva_id = nueva.id
+        nueva.delete()
+        response = api_client.post("/api/tasks/", {"title": "Tercera", "category_id": nueva_id})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_catalog_created_by_another_process_is_found(self, api_client, client_user_a, statuses,
+                                                         categories, query_budget):
+        api_client.force_authenticate(user=client_user_a)
+        api_client.post("/api/tasks/", {"title": "Primera", "category_id": categories["trabajo"].id})
+
+        # bulk_create no emite post_save: la copia en memoria no se entera, como en otro proceso
+        [nueva] = Category.objects.bulk_create([Category(name="nueva")])
+        response = api_client.post("/api/tasks/", {"title": "Segunda", "category_id": nueva.id})
+        assert response.status_code == status.HTTP_201_CREATED
+
+        # un id inexistente cuesta una sola consulta y no recarga la tabla
+        with query_budget(1):
+            assert tasks_lookups.categories.missing([999998, 999999]) == {999998, 999999}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_catalog_deleted_by_another_process_is_a_validation_error(self, api_client, client_user_a,
+                                                                      statuses, categories):
+        api_client.force_authenticate(user=client_user_a)
+        vieja = Category.objects.create(name="vieja")
+        assert tasks_lookups.categories.get(vieja.id) == vieja
+
+        # borrada sin señales, como desde otro proceso: la copia en memoria todavía la tiene
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM tasks_category WHERE id = %s", [vieja.id])
+        response = api_client.post("/api/tasks/", {"title": "Segunda", "category_id": vieja.id})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert tasks_lookups.categories.get(vieja.id) is None
+
+    def test_permissions_and_me_do_not_query_roles(self, api_client, client_user_a, query_budget):
+        api_client.force_authenticate(user=client_user_a)
+        api_client.get("/api/users/me/")
+        with query_budget(0):
+            response = api_client.get("/api/users/me/")
+        assert response.data["role_name"] == "client"
+
+
+# GET condicionales sobre tareas
+@pytest.mark.django_db
+class TestTaskConditionalGet:
+    endpoint = "/api/tasks/"
+
+    def test_list_returns_304_when_unchanged(self, api_client, client_user_a, tasks, query_budget):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.get(self.endpoint)
+        etag = response["ETag"]
+
+        with query_budget(0):
+            response = api_client.get(self.endpoint, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+
+    def test_list_etag_changes_on_write(self, api_client, client_user_a, tasks, categories):
+        api_client.force_authenticate(user=client_user_a)
+        etag = api_client.get(self.endpoint)["ETag"]
+
+        api_client.patch(f"{self.endpoint}{tasks['task1'].id}/", {"title": "Cambiada"})
+        response = api_client.get(self.endpoint, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        etag = response["ETag"]
+
+        api_client.delete(f"{self.endpoint}{tasks['task2'].id}/")
+        response = api_client.get(self.endpoint, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 1
+
+    def test_list_has_no_last_modified(self, api_client, client_user_a, tasks):
+        # el máximo updated_at de las filas visibles no avanza al borrar: If-Modified-Since daría un 304 viejo
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.get(self.endpoint)
+        assert not response.has_header("Last-Modified")
+
+        api_client.delete(f"{self.endpoint}{tasks['task2'].id}/")
+        response = api_client.get(self.endpoint, HTTP_IF_MODIFIED_SINCE="Wed, 01 Jan 2100 00:00:00 GMT")
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 1
+
+    def test_etag_depends_on_filters_and_user(self, api_client, admin_user, client_user_a, tasks, statuses):
+        api_client.force_authenticate(user=client_user_a)
+        etag = api_client.get(self.endpoint)["ETag"]
+        response = api_client.get(self.endpoint, {"status": statuses["pendiente"].id}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get(self.endpoint, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 3
+
+        # el admin ve también los cambios de tareas de otros usuarios, incluido el borrado lógico
+        etag = response["ETag"]
+        tasks["task3"].is_deleted = True
+        tasks["task3"].save()
+        response = api_client.get(self.endpoint, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert tasks["task3"].pk not in {row["id"] for row in response.data}
+        response = api_client.get(self.endpoint, {"include_deleted": "true"})
+        deleted = {row["id"]: row["is_deleted"] for row in response.data}
+        assert deleted[tasks["task3"].pk] is True
+
+    def test_detail_returns_304_when_unchanged(self, api_client, client_user_a, client_user_b, tasks):
+        url = f"{self.endpoint}{tasks['task1'].id}/"
+        api_client.force_authenticate(user=client_user_a)
+        etag = api_client.get(url)["ETag"]
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+        api_client.patch(url, {"description": "nueva"})
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+        api_client.force_authenticate(user=client_user_b)
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_expanded_detail_changes_with_catalogs_and_owner(self, api_client, client_user_a, tasks, categories):
+        url = f"{self.endpoint}{tasks['task1'].id}/"
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.get(url, {"expand": "category,user"})
+        # renombrar el catálogo no toca updated_at: Last-Modified daría un 304 viejo
+        assert not response.has_header("Last-Modified")
+        etag = response["ETag"]
+        assert api_client.get(url, {"expand": "category,user"}, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        category = categories["trabajo"]
+        category.name = "oficina"
+        category.save()
+        response = api_client.get(url, {"expand": "category,user"}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["category"]["name"] == "oficina"
+
+        etag = response["ETag"]
+        client_user_a.name = "Otro nombre"
+        client_user_a.save()
+        response = api_client.get(url, {"expand": "category,user"}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["user"]["name"] == "Otro nombre"
+
+
+# cache de la lista de tareas por usuario
+@pytest.mark.django_db
+class TestTaskListCache:
+    endpoint = "/api/tasks/"
+
+    def test_second_request_is_served_from_cache(self, api_client, client_user_a, tasks, query_budget):
+        api_client.force_authenticate(user=client_user_a)
+        first = api_client.get(self.endpoint)
+
+        # el ETag y la lista salen de la cache
+        with query_budget(0):
+            second = api_client.get(self.endpoint)
+        assert second.data == first.data
+
+    def test_writes_invalidate_owner_and_admin_lists(self, api_client, admin_user, client_user_a,
+                                                     client_user_b, tasks, categories):
+        api_client.force_authenticate(user=admin_user)
+        assert len(api_client.get(self.endpoint).data) == 3
+        assert len(api_client.get(self.endpoint, {"include_deleted": "true"}).data) == 3
+        api_client.force_authenticate(user=client_user_b)
+        assert len(api_client.get(self.endpoint).data) == 1
+
+        api_client.force_authenticate(user=client_user_a)
+        assert len(api_client.get(self.endpoint).data) == 2
+        api_client.post(self.endpoint, {"title": "Nueva", "category_id": categories["trabajo"].id})
+        assert len(api_client.get(self.endpoint).data) == 3
+        api_client.delete(f"{self.endpoint}{tasks['task1'].id}/")
+        assert len(api_client.get(self.endpoint).data) == 2
+
+        api_client.force_authenticate(user=admin_user)
+        ids = {row["id"] for row in api_client.get(self.endpoint).data}
+        assert len(ids) == 3 and tasks["task1"].id not in ids
+        assert len(api_client.get(self.endpoint, {"include_deleted": "true"}).data) == 4
+
+    def test_catalog_rename_invalidates_lists(self, api_client, client_user_a, tasks, statuses):
+        api_client.force_authenticate(user=client_user_a)
+        api_client.get(self.endpoint)
+        statuses["pendiente"].name = "por_hacer"
+        statuses["pendiente"].save()
+
+        names = {task["status"]["name"] for task in api_client.get(self.endpoint, {"expand": "status"}).data}
+        assert "por_hacer" in names
+
+    def test_concurrent_rebuild_waits_for_the_lock_holder(self):
+        from django.core.cache import cache as default_cache
+        from tasks import cache as list_cache
+
+        default_cache.add("tasks:list:test:lock", 1)
+        timer = threading.Timer(0.1, default_cache.set, args=("tasks:list:test", ["desde otro proceso"]))
+        timer.start()
+        built = []
+        value = list_cache.get_or_build("tasks:list:test", lambda: built.append(1) or ["recalculado"])
+        timer.join()
+        assert value == ["desde otro proceso"]
+        assert built == []
+
+
+# exportación en streaming de tareas y logs
+@pytest.mark.django_db
+class TestExport:
+
+    def test_client_exports_own_tasks_as_ndjson(self, api_client, client_user_a, tasks):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.get("/api/tasks/export/")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response["Content-Type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        assert {row["id"] for row in rows} == {tasks["task1"].id, tasks["task2"].id}
+        assert {row["user_email"] for row in rows} == {client_user_a.email}
+
+    def test_export_applies_filters_and_csv(self, api_client, admin_user, tasks, statuses):
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get("/api/tasks/export/", {"output": "csv", "status": statuses["completado"].id})
+        assert response.status_code == status.HTTP_200_OK
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        assert [row["title"] for row in rows] == ["Tarea 3"]
+        assert rows[0]["status"] == "completado"
+
+    def test_export_streams_asynchronously_under_asgi(self, api_client, admin_user, tasks):
+        # con un iterador sync Django 4.2 armaría toda la exportación en memoria bajo ASGI
+        api_client.force_authenticate(user=admin_user)
+        expected = b"".join(api_client.get("/api/tasks/export/", {"output": "csv"}).streaming_content)
+
+        request = AsyncRequestFactory().get("/api/tasks/export/?output=csv")
+        force_authenticate(request, user=admin_user)
+        response = TaskViewSet.as_view({"get": "export"})(request)
+        assert response.is_async
+
+        async def read():
+            return b"".join([chunk async for chunk in response])
+
+        assert async_to_sync(read)() == expected
+
+    def test_export_rejects_unknown_output(self, api_client, admin_user, tasks):
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get("/api/tasks/export/", {"output": "xml"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_only_admin_exports_logs(self, api_client, admin_user, client_user_a, tasks):
+        api_client.force_authenticate(user=client_user_a)
+        assert api_client.get("/api/logs/export/").status_code == status.HTTP_403_FORBIDDEN
+
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get("/api/logs/export/")
+        assert response.status_code == status.HTTP_200_OK
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        assert len(rows) == 3
+        assert {row["action"] for row in rows} == {"CREATED"}
+
+
+# restricción única (user, title) en la base
+@pytest.mark.django_db
+class TestUniqueTitleConstraint:
+    endpoint = "/api/tasks/"
+
+    def test_update_to_existing_title_is_rejected(self, api_client, client_user_a, tasks):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.patch(f"{self.endpoint}{tasks['task2'].id}/", {"title": "Tarea 1"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Ya existe una tarea con el mismo título para este usuario." in str(response.data)
+
+    def test_same_title_for_different_users_is_allowed(self, api_client, client_user_b, tasks, categories):
+        api_client.force_authenticate(user=client_user_b)
+        response = api_client.post(self.endpoint, {"title": "Tarea 1", "category_id": categories["otro"].id})
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_bulk_update_to_existing_title_is_rejected(self, api_client, client_user_a, tasks):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.patch(f"{self.endpoint}bulk/", {"tasks": [
+            {"id": tasks["task2"].id, "title": "Tarea 1"},
+        ]}, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        tasks["task2"].refresh_from_db()
+        assert tasks["task2"].title == "Tarea 2"
+
+    def test_explain_command_reports_index_usage(self, client_user_a, tasks):
+        out = io.StringIO()
+        call_command("explain_queries", stdout=out)
+        output = out.getvalue()
+        assert "task_user_live_created_idx" in output
+        assert "logtask_timestamp_idx" in output
+
+
+# búsqueda de texto completo en tareas
+@pytest.mark.django_db
+class TestTaskSearch:
+    endpoint = "/api/tasks/"
+
+    @pytest.fixture
+    def searchable(self, client_user_a, client_user_b, statuses, categories):
+        def create(user, title, description=None, status_name="pendiente"):
+            return Task.objects.create(
+                title=title, description=description, user=user,
+                status=statuses[status_name], category=categories["trabajo"],
+            )
+        return {
+            "factura": create(client_user_a, "Pagar factura de luz", "vence el lunes"),
+            "informe": create(client_user_a, "Informe mensual", "incluir la factura pendiente", "en_progreso"),
+            "compras": create(client_user_a, "Compras", "leche y pan"),
+            "ajena": create(client_user_b, "Factura ajena"),
+        }
+
+    def test_search_ranks_title_matches_first(self, api_client, client_user_a, searchable):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.get(self.endpoint, {"q": "factura"})
+        assert response.status_code == status.HTTP_200_OK
+        assert [task["id"] for task in response.data] == [searchable["factura"].id, searchable["informe"].id]
+
+    def test_search_is_prefix_and_accent_insensitive(self, api_client, client_user_a, searchable):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.get(self.endpoint, {"q": "infórm mensu"})
+        assert [task["id"] for task in response.data] == [searchable["informe"].id]
+
+    def test_search_combines_with_filters(self, api_client, client_user_a, searchable, statuses):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.get(self.endpoint, {"q": "factura", "status": statuses["en_progreso"].id})
+        assert [task["id"] for task in response.data] == [searchable["informe"].id]
+
+        response = api_client.get(self.endpoint, {"q": "factura", "page_size": 1})
+        assert len(response.data["results"]) == 1
+        assert response.data["next"] is not None
+
+    def test_paginated_search_keeps_rank_order(self, api_client, client_user_a, searchable):
+        # la mejor coincidencia es la más vieja: el orden por (created_at, id) la dejaría última
+        Task.objects.filter(pk=searchable["factura"].pk).update(created_at=timezone.now() - timedelta(days=30))
+        api_client.force_authenticate(user=client_user_a)
+        first = api_client.get(self.endpoint, {"q": "factura", "page_size": 1}).data
+        assert [task["id"] for task in first["results"]] == [searchable["factura"].id]
+
+        second = api_client.get(first["next"]).data
+        assert [task["id"] for task in second["results"]] == [searchable["informe"].id]
+        assert second["next"] is None
+
+        # un cursor de la lista sin búsqueda no sirve para una búsqueda
+        plain = api_client.get(self.endpoint, {"page_size": 1}).data["next"]
+        assert api_client.get(f"{plain}&q=factura").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_search_index_follows_updates_and_operators_are_ignored(self, api_client, client_user_a, searchable):
+        api_client.force_authenticate(user=client_user_a)
+        api_client.patch(f"{self.endpoint}{searchable['compras'].id}/", {"title": "Supermercado"})
+        assert api_client.get(self.endpoint, {"q": "compras"}).data == []
+        assert len(api_client.get(self.endpoint, {"q": "supermercado"}).data) == 1
+        assert api_client.get(self.endpoint, {"q": '" OR * NEAR('}).status_code == status.HTTP_200_OK
+
+    def test_rebuild_command(self, searchable):
+        out = io.StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        assert "4 tareas indexadas" in out.getvalue()
+
+
+# estadísticas por estado y categoría mantenidas en TaskCounter
+@pytest.mark.django_db
+class TestTaskStats:
+    endpoint = "/api/tasks/stats/"
+
+    @staticmethod
+    def counts(data, key):
+        return {item["name"]: item["count"] for item in data[key]}
+
+    def test_client_stats_follow_writes(self, api_client, client_user_a, tasks, statuses, categories):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.get(self.endpoint)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["total"] == 2
+
+        api_client.post("/api/tasks/", {"title": "Nueva", "category_id": categories["otro"].id})
+        api_client.patch(f"/api/tasks/{tasks['task1'].id}/", {"status_id": statuses["completado"].id})
+        api_client.delete(f"/api/tasks/{tasks['task2'].id}/")
+
+        data = api_client.get(self.endpoint).data
+        assert data["total"] == 2
+        assert self.counts(data, "by_status") == {"pendiente": 1, "completado": 1}
+        assert self.counts(data, "by_category") == {"trabajo": 1, "otro": 1}
+
+    def test_failed_delete_leaves_row_counters_and_log_in_step(self, api_client, client_user_a, tasks, monkeypatch):
+        api_client.force_authenticate(user=client_user_a)
+
+        def broken_record(task, action):
+            raise RuntimeError("sin log")
+
+        monkeypatch.setattr(audit, "record", broken_record)
+        with pytest.raises(RuntimeError):
+            TaskViewSet().perform_destroy(Task.objects.get(pk=tasks["task2"].pk))
+
+        assert not Task.all_objects.get(pk=tasks["task2"].pk).is_deleted
+        assert api_client.get(self.endpoint).data["total"] == 2
+        assert stats.drift() == {}
+
+    def test_bulk_operations_update_stats(self, api_client, client_user_a, statuses, categories):
+        api_client.force_authenticate(user=client_user_a)
+        created = api_client.post("/api/tasks/bulk/", {"tasks": [
+            {"title": f"Lote {i}", "category_id": categories["personal"].id} for i in range(3)
+        ]}, format="json").data
+        ids = [task["id"] for task in created]
+        api_client.patch("/api/tasks/bulk/", {"tasks": [
+            {"id": ids[0], "status_id": statuses["en_progreso"].id},
+        ]}, format="json")
+        api_client.delete("/api/tasks/bulk/", {"ids": ids[1:2]}, format="json")
+
+        data = api_client.get(self.endpoint).data
+        assert self.counts(data, "by_status") == {"pendiente": 1, "en_progreso": 1}
+        assert stats.drift() == {}
+
+    def test_admin_sees_all_users_or_one(self, api_client, admin_user, client_user_b, tasks):
+        api_client.force_authenticate(user=admin_user)
+        assert api_client.get(self.endpoint).data["total"] == 3
+        assert api_client.get(self.endpoint, {"user": client_user_b.id}).data["total"] == 1
+        assert api_client.get(self.endpoint, {"user": "x"}).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_stats_read_only_counters(self, api_client, client_user_a, tasks, query_budget):
+        api_client.force_authenticate(user=client_user_a)
+        api_client.get(self.endpoint)
+        with query_budget(1):
+            api_client.get(self.endpoint)
+
+    def test_reconcile_reports_and_fixes_drift(self, tasks, client_user_a):
+        # update() no emite señales: el contador queda desfasado
+        Task.objects.filter(pk=tasks["task1"].pk).update(is_deleted=True)
+
+        out = io.StringIO()
+        call_command("reconcile_task_stats", "--dry-run", stdout=out)
+        assert "2 grupos con diferencias" in out.getvalue()
+        assert stats.drift() != {}
+
+        out = io.StringIO()
+        call_command("reconcile_task_stats", stdout=out)
+        assert "2 grupos corregidos" in out.getvalue()
+        assert stats.drift() == {}
+
+
+# retención: archivado y borrado por lotes de logs viejos y tareas borradas
+@pytest.mark.django_db
+class TestRetention:
+
+    @staticmethod
+    def read_archive(path):
+        with gzip.open(path, "rt", encoding="utf-8") as archive:
+            return [json.loads(line) for line in archive]
+
+    def test_old_logs_are_archived_in_batches(self, tasks, tmp_path):
+        old = timezone.now() - timedelta(days=120)
+        logTask.objects.filter(task=tasks["task1"]).update(timestamp=old)
+        logTask.objects.create(task=tasks["task1"], action="UPDATED", timestamp=old)
+        expired = set(logTask.objects.filter(timestamp__lt=timezone.now() - timedelta(days=90)).values_list("id", flat=True))
+        remaining = logTask.objects.count() - len(expired)
+
+        out = io.StringIO()
+        call_command("apply_retention", "--skip-tasks", "--log-days", "90", "--batch-size", "1",
+                     "--archive-dir", str(tmp_path), stdout=out)
+
+        assert f"Logs archivados: {len(expired)}" in out.getvalue()
+        assert logTask.objects.count() == remaining
+        [archive] = tmp_path.glob("logtask-*.ndjson.gz")
+        assert {row["id"] for row in self.read_archive(archive)} == expired
+
+    def test_archive_is_complete_on_disk_before_each_delete(self, tasks, tmp_path, monkeypatch):
+        # lo que ya se borró de la base se puede leer del archivo aunque el proceso muera ahí mismo
+        old = timezone.now() - timedelta(days=120)
+        logTask.objects.update(timestamp=old)
+        seen = []
+
+        def check_between_batches(seconds):
+            [archive] = tmp_path.glob("logtask-*.ndjson.gz")
+            archived = {row["id"] for row in self.read_archive(archive)}
+            assert not logTask.objects.filter(pk__in=archived).exists()
+            seen.append(len(archived))
+
+        monkeypatch.setattr(retention.time, "sleep", check_between_batches)
+        retention.archive_logs(90, tmp_path, batch_size=1)
+        assert seen == [1, 2, 3]
+
+    def test_deleted_tasks_are_purged_with_their_logs(self, api_client, client_user_a, tasks, tmp_path):
+        api_client.force_authenticate(user=client_user_a)
+        api_client.delete(f"/api/tasks/{tasks['task1'].id}/")
+        api_client.delete(f"/api/tasks/{tasks['task2'].id}/")
+        Task.all_objects.filter(pk=tasks["task1"].pk).update(updated_at=timezone.now() - timedelta(days=45))
+
+        out = io.StringIO()
+        call_command("apply_retention", "--dry-run", "--task-days", "30", stdout=out)
+        assert "Tareas borradas hace más de 30 días: 1" in out.getvalue()
+        assert Task.all_objects.filter(pk=tasks["task1"].pk).exists()
+
+        call_command("apply_retention", "--skip-logs", "--task-days", "30", "--archive-dir", str(tmp_path), stdout=io.StringIO())
+
+        assert not Task.all_objects.filter(pk=tasks["task1"].pk).exists()
+        assert Task.all_objects.filter(pk=tasks["task2"].pk).exists()
+        [archive] = tmp_path.glob("task-2*.ndjson.gz")
+        assert [row["title"] for row in self.read_archive(archive)] == [tasks["task1"].title]
+        [logs] = tmp_path.glob("task-logtask-*.ndjson.gz")
+        assert {row["action"] for row in self.read_archive(logs)} == {"CREATED", "DELETED"}
+        # el borrado físico pasa por las señales: los contadores siguen coincidiendo
+        assert stats.drift() == {}
+
+
+# manager sin borradas, índices parciales y tombstones (DeletedTask)
+@pytest.mark.django_db
+class TestTombstones:
+
+    @pytest.fixture
+    def moved(self, api_client, client_user_a, tasks):
+        # task1 borrada hace dos días y movida a DeletedTask
+        api_client.force_authenticate(user=client_user_a)
+        api_client.delete(f"/api/tasks/{tasks['task1'].id}/")
+        Task.all_objects.filter(pk=tasks["task1"].pk).update(updated_at=timezone.now() - timedelta(days=2))
+        call_command("apply_retention", "--skip-logs", "--tombstone-days", "1", stdout=io.StringIO())
+        return tasks["task1"]
+
+    def test_default_manager_excludes_deleted(self, api_client, client_user_a, tasks, categories):
+        api_client.force_authenticate(user=client_user_a)
+        api_client.delete(f"/api/tasks/{tasks['task1'].id}/")
+        assert not Task.objects.filter(pk=tasks["task1"].pk).exists()
+        assert Task.all_objects.get(pk=tasks["task1"].pk).is_deleted
+        # la restricción única es parcial: el título de una tarea borrada se puede reutilizar
+        response = api_client.post("/api/tasks/", {"title": tasks["task1"].title, "category_id": categories["trabajo"].id})
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_admin_list_hides_deleted_unless_requested(self, api_client, admin_user, client_user_a, tasks):
+        api_client.force_authenticate(user=client_user_a)
+        api_client.delete(f"/api/tasks/{tasks['task1'].id}/")
+
+        api_client.force_authenticate(user=admin_user)
+        for params in ({}, {"include_deleted": "false"}):
+            ids = {task["id"] for task in api_client.get("/api/tasks/", params).data}
+            assert ids == {tasks["task2"].id, tasks["task3"].id}
+
+        rows = api_client.get("/api/tasks/", {"include_deleted": "true"}).data
+        assert {task["id"]: task["is_deleted"] for task in rows} == {
+            tasks["task1"].id: True, tasks["task2"].id: False, tasks["task3"].id: False,
+        }
+        # el detalle no depende del parámetro: el admin sigue viendo la tarea borrada
+        assert api_client.get(f"/api/tasks/{tasks['task1'].id}/").data["is_deleted"] is True
+
+    def test_move_keeps_logs_and_counters(self, api_client, admin_user, client_user_a, moved):
+        assert not Task.all_objects.filter(pk=moved.pk).exists()
+        tombstone = DeletedTask.objects.get(pk=moved.pk)
+        assert (tombstone.title, tombstone.user_id) == (moved.title, client_user_a.pk)
+        assert set(logTask.objects.filter(task_id=moved.pk).values_list("action", flat=True)) == {"CREATED", "DELETED"}
+        assert stats.drift() == {}
+
+        response = api_client.get("/api/deleted-tasks/")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        api_client.force_authenticate(user=admin_user)
+        assert [task["id"] for task in api_client.get("/api/deleted-tasks/").data] == [moved.pk]
+        # los logs siguen en la lista; la tarea expandida sale como null
+        logs = api_client.get("/api/logs/", {"expand": "task"}).data
+        assert len(logs) == logTask.objects.count()
+        assert sum(log["task"] is None for log in logs) == 2
+        # el admin de Django y los logs muestran el id de la tarea movida
+        log = logTask.objects.filter(task_id=moved.pk).first()
+        assert str(log).endswith(f" - {moved.pk}")
+
+    def test_change_feed_reports_moved_tasks(self, api_client, client_user_a, moved):
+        results = api_client.get("/api/tasks/changes/").data["results"]
+        assert [(task["id"], task["is_deleted"]) for task in results if task["id"] == moved.pk] == [(moved.pk, True)]
+
+    def test_restore_from_tombstone(self, api_client, admin_user, client_user_a, moved):
+        response = api_client.post(f"/api/tasks/{moved.pk}/restore/")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.post(f"/api/tasks/{moved.pk}/restore/")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["is_deleted"] is False
+        task = Task.objects.get(pk=moved.pk)
+        assert task.created_at == moved.created_at
+        assert not DeletedTask.objects.exists()
+        assert stats.drift() == {}
+        # la restauración queda en el historial como edición, sin un segundo alta
+        actions = logTask.objects.filter(task_id=moved.pk).order_by("pk").values_list("action", flat=True)
+        assert list(actions) == ["CREATED", "DELETED", "UPDATED"]
+        assert api_client.post("/api/tasks/999999/restore/").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_restore_in_place_and_title_conflict(self, api_client, admin_user, client_user_a, tasks, categories):
+        api_client.force_authenticate(user=client_user_a)
+        api_client.delete(f"/api/tasks/{tasks['task1'].id}/")
+        api_client.post("/api/tasks/", {"title": tasks["task1"].title, "category_id": categories["trabajo"].id})
+
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.post(f"/api/tasks/{tasks['task1'].id}/restore/")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        api_client.delete(f"/api/tasks/{tasks['task2'].id}/")
+        response = api_client.post(f"/api/tasks/{tasks['task2'].id}/restore/")
+        assert response.status_code == status.HTTP_200_OK
+        assert not Task.all_objects.get(pk=tasks["task2"].pk).is_deleted
+
+
+# lista y detalle de tareas por el camino async (ASGI)
+@pytest.mark.django_db
+class TestAsyncTaskViews:
+
+    @staticmethod
+    def call(view, user, path, method="get", headers=None, view_kwargs=None, **kwargs):
+        token = RoleRefreshToken.for_user(user).access_token
+        headers = {"Authorization": f"Bearer {token}", **(headers or {})}
+        request = getattr(AsyncRequestFactory(), method)(path, headers=headers, **kwargs)
+        return async_to_sync(view)(request, **(view_kwargs or {}))
+
+    def test_list_matches_sync_view(self, api_client, client_user_a, tasks, statuses):
+        api_client.force_authenticate(user=client_user_a)
+        expected = json.loads(api_client.get("/api/tasks/", {"status": statuses["pendiente"].id}).content)
+
+        path = f"/api/tasks/?status={statuses['pendiente'].id}"
+        response = self.call(task_list, client_user_a, path)
+        assert response.status_code == status.HTTP_200_OK
+        # respuesta armada por el camino async, no una Response de DRF
+        assert not hasattr(response, "data")
+        assert json.loads(response.content) == expected
+
+        response = self.call(task_list, client_user_a, path, headers={"If-None-Match": response["ETag"]})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_detail_respects_ownership(self, client_user_a, tasks):
+        response = self.call(task_detail, client_user_a, "/", view_kwargs={"pk": str(tasks["task1"].id)})
+        assert not hasattr(response, "data")
+        assert json.loads(response.content)["title"] == tasks["task1"].title
+
+        # la tarea de otro usuario cae al camino sync, que responde 404
+        response = self.call(task_detail, client_user_a, "/", view_kwargs={"pk": str(tasks["task3"].id)})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_expanded_detail_changes_with_catalogs(self, client_user_a, tasks, categories):
+        path = "/?expand=category"
+        kwargs = {"pk": str(tasks["task1"].id)}
+        etag = self.call(task_detail, client_user_a, path, view_kwargs=kwargs)["ETag"]
+        response = self.call(task_detail, client_user_a, path, headers={"If-None-Match": etag}, view_kwargs=kwargs)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        category = categories["trabajo"]
+        category.name = "oficina"
+        category.save()
+        response = self.call(task_detail, client_user_a, path, headers={"If-None-Match": etag}, view_kwargs=kwargs)
+        assert response.status_code == status.HTTP_200_OK
+        assert json.loads(response.content)["category"]["name"] == "oficina"
+
+    def test_writes_and_errors_use_sync_view(self, client_user_a, tasks, categories):
+        response = async_to_sync(task_list)(AsyncRequestFactory().get("/api/tasks/"))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        response = self.call(
+            task_list, client_user_a, "/api/tasks/", method="post",
+            data={"title": "Async", "category_id": categories["trabajo"].id}, content_type="application/json",
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Task.objects.filter(title="Async", user=client_user_a).exists()
+
+
+# ?fields= y ?expand= en tareas y logs
+@pytest.mark.django_db
+class TestSparseFields:
+
+    @pytest.fixture(autouse=True)
+    def without_list_cache(self, settings):
+        settings.TASK_LIST_CACHE = {"ENABLED": False}
+
+    def test_relations_are_ids_by_default(self, api_client, client_user_a, tasks):
+        api_client.force_authenticate(user=client_user_a)
+        task = api_client.get("/api/tasks/").data[0]
+        assert task["user"] == client_user_a.pk
+        assert isinstance(task["status"], int) and isinstance(task["category"], int)
+
+    def test_expand_nests_only_requested_relations(self, api_client, client_user_a, tasks, categories):
+        api_client.force_authenticate(user=client_user_a)
+        task = api_client.get("/api/tasks/", {"expand": "user,category"}).data[0]
+        assert task["user"]["email"] == client_user_a.email
+        assert task["category"]["name"] in categories
+        assert isinstance(task["status"], int)
+
+    def test_fields_narrow_output_and_columns(self, api_client, client_user_a, tasks):
+        api_client.force_authenticate(user=client_user_a)
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get("/api/tasks/", {"fields": "id,title"})
+        assert set(response.data[0]) == {"id", "title"}
+        sql = ctx.captured_queries[-1]["sql"]
+        assert "description" not in sql and "JOIN" not in sql
+
+    def test_fields_work_with_cursor_pagination(self, api_client, client_user_a, tasks):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.get("/api/tasks/", {"fields": "title", "page_size": 1})
+        assert set(response.data["results"][0]) == {"title"}
+        assert response.data["next"]
+
+    def test_unknown_names_are_rejected(self, api_client, client_user_a, tasks):
+        api_client.force_authenticate(user=client_user_a)
+        assert api_client.get("/api/tasks/", {"fields": "id,secret"}).status_code == status.HTTP_400_BAD_REQUEST
+        assert api_client.get("/api/tasks/", {"expand": "title"}).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_logs_expand_nested_task(self, api_client, admin_user, tasks):
+        api_client.force_authenticate(user=admin_user)
+        log = api_client.get("/api/logs/").data[0]
+        assert isinstance(log["task"], int)
+
+        log = api_client.get("/api/logs/", {"fields": "action,task.title,task.status", "expand": "task.status"}).data[0]
+        assert set(log) == {"action", "task"}
+        assert set(log["task"]) == {"title", "status"}
+        assert "name" in log["task"]["status"]
+
+    def test_expanded_log_list_queries_are_constant(self, api_client, admin_user, client_user_a, tasks,
+                                                   statuses, categories, assert_constant_queries):
+        api_client.force_authenticate(user=admin_user)
+
+        def grow():
+            for i in range(5):
+                Task.objects.create(title=f"Extra {i}", user=client_user_a,
+                                    status=statuses["pendiente"], category=categories["otro"])
+        assert_constant_queries(
+            lambda: api_client.get("/api/logs/", {"expand": "task.user,task.status,task.category"}),
+            grow,
+        )
+
+
+# listas armadas desde values_list(): mismos bytes que los serializers (tasks/fastlist.py)
+@pytest.mark.django_db
+class TestFastListSerialization:
+
+    @pytest.fixture(autouse=True)
+    def without_list_cache(self, settings):
+        settings.TASK_LIST_CACHE = {"ENABLED": False}
+
+    def _both(self, settings, api_client, path, params):
+        settings.FAST_LIST_SERIALIZATION = False
+        slow = api_client.get(path, params)
+        settings.FAST_LIST_SERIALIZATION = True
+        fast = api_client.get(path, params)
+        assert slow.status_code == fast.status_code == status.HTTP_200_OK
+        return slow.content, fast.content
+
+    @pytest.mark.parametrize("params", [
+        {},
+        {"expand": "user,status,category"},
+        {"fields": "id,title,created_at", "expand": "status"},
+        {"q": "tarea", "fields": "title,user", "expand": "user"},
+    ])
+    def test_tasks_match_serializer(self, settings, api_client, admin_user, tasks, params):
+        Task.objects.filter(pk=tasks["task1"].pk).update(category=None, description="línea\u2028ñ")
+        api_client.force_authenticate(user=admin_user)
+        slow, fast = self._both(settings, api_client, "/api/tasks/", params)
+        assert slow == fast
+
+    @pytest.mark.parametrize("params", [
+        {},
+        {"expand": "task.user,task.category"},
+        {"fields": "action,task.title,task.updated_at"},
+    ])
+    def test_logs_match_serializer(self, settings, api_client, admin_user, tasks, params):
+        api_client.force_authenticate(user=admin_user)
+        slow, fast = self._both(settings, api_client, "/api/logs/", params)
+        assert slow == fast
+
+    def test_paginated_lists_use_the_serializer(self, api_client, client_user_a, tasks):
+        api_client.force_authenticate(user=client_user_a)
+        response = api_client.get("/api/tasks/", {"page_size": 1})
+        assert len(response.data["results"]) == 1
+
+
+# feed de cambios /api/tasks/changes/ (tasks/changes.py)
+@pytest.mark.django_db
+class TestTaskChanges:
+    endpoint = "/api/tasks/changes/"
+
+    def test_returns_each_changed_task_once_with_a_new_cursor(self, api_client, client_user_a, tasks):
+        api_client.force_authenticate(user=client_user_a)
+        cursor = api_client.get(self.endpoint).data["cursor"]
+
+        api_client.patch(f"/api/tasks/{tasks['task1'].pk}/", {"title": "Primera"})
+        api_client.patch(f"/api/tasks/{tasks['task1'].pk}/", {"title": "Segunda"})
+        api_client.delete(f"/api/tasks/{tasks['task2'].pk}/")
+
+        response = api_client.get(self.endpoint, {"since": cursor})
+        assert response.status_code == status.HTTP_200_OK
+        assert [(task["id"], task["title"], task["is_deleted"]) for task in response.data["results"]] == [
+            (tasks["task1"].pk, "Segunda", False),
+            (tasks["task2"].pk, tasks["task2"].title, True),
+        ]
+        assert response.data["has_more"] is False
+        assert api_client.get(self.endpoint, {"since": response.data["cursor"]}).data["results"] == []
+
+    def test_clients_only_see_their_tasks(self, api_client, client_user_a, client_user_b, tasks):
+        api_client.force_authenticate(user=client_user_a)
+        ids = {task["id"] for task in api_client.get(self.endpoint).data["results"]}
+        assert ids == set(Task.objects.filter(user=client_user_a).values_list("pk", flat=True))
+
+    def test_nothing_new_is_a_single_indexed_query(self, api_client, client_user_a, tasks, query_budget):
+        api_client.force_authenticate(user=client_user_a)
+        cursor = api_client.get(self.endpoint).data["cursor"]
+        with query_budget(1):
+            assert api_client.get(self.endpoint, {"since": cursor}).data["results"] == []
+        logs = changes.visible_logs(client_user_a).filter(pk__gt=0).order_by("pk").values_list("pk", "task_id")
+        assert "logtask_user_id_idx" in logs.explain()
+
+    def test_limit_pages_through_events(self, api_client, admin_user, tasks):
+        api_client.force_authenticate(user=admin_user)
+        first = api_client.get(self.endpoint, {"limit": 2}).data
+        assert len(first["results"]) == 2 and first["has_more"] is True
+        rest = api_client.get(self.endpoint, {"since": first["cursor"], "limit": 100}).data
+        assert {task["id"] for task in first["results"] + rest["results"]} == {task.pk for task in tasks.values()}
+
+    def test_invalid_and_expired_cursors(self, api_client, client_user_a, tasks):
+        api_client.force_authenticate(user=client_user_a)
+        assert api_client.get(self.endpoint, {"since": "nope"}).status_code == status.HTTP_400_BAD_REQUEST
+        old = changes.encode_cursor(1, timezone.now() - timedelta(days=365))
+        assert api_client.get(self.endpoint, {"since": old}).status_code == status.HTTP_410_GONE
+
+
+# avisos de cambios por SSE y long-poll (ASGI)
+@pytest.mark.django_db
+class TestTaskPush:
+
+    @pytest.fixture(autouse=True)
+    def fast_watcher(self, settings):
+        settings.TASK_PUSH = {"POLL_INTERVAL": 0.01, "LONG_POLL_TIMEOUT": 5}
+
+    @staticmethod
+    def request(user, path, **headers):
+        token = RoleRefreshToken.for_user(user).access_token
+        return AsyncRequestFactory().get(path, headers={"Authorization": f"Bearer {token}", **headers})
+
+    def test_poll_without_after_returns_current_position(self, client_user_a, tasks):
+        response = async_to_sync(task_events_poll)(self.request(client_user_a, "/api/tasks/events/poll/"))
+        assert json.loads(response.content) == {
+            "events": [], "last_event_id": logTask.objects.filter(user=client_user_a).latest("pk").pk,
+        }
+
+    def test_poll_returns_missed_changes_of_own_tasks(self, client_user_a, tasks):
+        response = async_to_sync(task_events_poll)(self.request(client_user_a, "/api/tasks/events/poll/?after=0"))
+        data = json.loads(response.content)
+        [event] = data["events"]
+        assert {task["id"] for task in event["tasks"]} == {tasks["task1"].pk, tasks["task2"].pk}
+        assert data["last_event_id"] == event["id"]
+
+    def test_poll_wakes_up_on_change(self, client_user_a, client_user_b, tasks):
+        after = logTask.objects.latest("pk").pk
+        request = self.request(client_user_a, f"/api/tasks/events/poll/?after={after}")
+
+        async def scenario():
+            async def change():
+                await asyncio.sleep(0.05)
+                # un cambio de otro usuario no despierta la espera
+                await sync_to_async(logTask.objects.create)(task=tasks["task3"], action="UPDATED")
+                await asyncio.sleep(0.05)
+                await sync_to_async(logTask.objects.create)(task=tasks["task1"], action="UPDATED")
+
+            response, _ = await asyncio.gather(task_events_poll(request), change())
+            return response
+
+        data = json.loads(async_to_sync(scenario)().content)
+        assert [event["tasks"] for event in data["events"]] == [[{"id": tasks["task1"].pk, "action": "UPDATED"}]]
+        assert push.hub.connections == 0
+
+    def test_watcher_starts_at_latest_log_whatever_the_client_sent(self, client_user_a, tasks):
+        latest = logTask.objects.latest("pk").pk
+        request = self.request(client_user_a, "/api/tasks/events/poll/?after=0&timeout=0.05")
+
+        async def scenario():
+            response = await task_events_poll(request)
+            # el atraso del cliente lo resolvió missed_events(); el watcher compartido no retrocedió
+            return response, push.hub._last_log
+
+        response, watcher_position = async_to_sync(scenario)()
+        assert watcher_position == latest
+        own_latest = logTask.objects.filter(user=client_user_a).latest("pk").pk
+        assert json.loads(response.content)["last_event_id"] == own_latest
+
+    def test_poll_timeout_keeps_position(self, client_user_a, tasks):
+        after = logTask.objects.latest("pk").pk
+        path = f"/api/tasks/events/poll/?after={after}&timeout=0.05"
+        response = async_to_sync(task_events_poll)(self.request(client_user_a, path))
+        assert json.loads(response.content) == {"events": [], "last_event_id": after}
+        response = async_to_sync(task_events_poll)(self.request(client_user_a, "/api/tasks/events/poll/?after=x"))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_stream_replays_from_last_event_id(self, client_user_a, tasks):
+        async def read(request, frames):
+            response = await task_events(request)
+            stream = response.streaming_content
+            try:
+                return response, [(await anext(stream)).decode() for _ in range(frames)]
+            finally:
+                await stream.aclose()
+
+        first_log = logTask.objects.filter(user=client_user_a).earliest("pk").pk
+        request = self.request(client_user_a, "/api/tasks/events/", **{"Last-Event-ID": str(first_log)})
+        response, (retry, frame) = async_to_sync(read)(request, 2)
+        assert response["Content-Type"] == "text/event-stream"
+        assert retry.startswith("retry: ")
+        header, data = frame.strip().rsplit("\n", 1)
+        event = json.loads(data.removeprefix("data: "))
+        assert header == f"id: {event['id']}\nevent: tasks"
+        assert event["tasks"] == [{"id": tasks["task2"].pk, "action": "CREATED"}]
+        assert push.hub.connections == 0
+
+    def test_token_in_query_string_and_unauthenticated(self, client_user_a, tasks):
+        token = RoleRefreshToken.for_user(client_user_a).access_token
+        request = AsyncRequestFactory().get(f"/api/tasks/events/poll/?token={token}")
+        assert async_to_sync(task_events_poll)(request).status_code == status.HTTP_200_OK
+        request = AsyncRequestFactory().get("/api/tasks/events/")
+        assert async_to_sync(task_events)(request).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+# datos de prueba para benchmarks
+@pytest.mark.django_db
+def test_seed_data_is_idempotent():
+    call_command("seed_data", users=2, tasks=3, stdout=io.StringIO())
+    call_command("seed_data", users=2, tasks=4, stdout=io.StringIO())
+
+    assert Task.objects.filter(user__email__startswith="seed-user-").count() == 8
+    assert logTask.objects.filter(action="CREATED").count() == 8
+    assert stats.drift() == {}
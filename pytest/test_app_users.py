@@ -0,0 +1,103 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+from rest_framework import status
+from users.async_views import me
+from users.authentication import user_states
+from users.tokens import RoleRefreshToken
+
+
+@pytest.fixture(autouse=True)
+def clear_user_states():
+    user_states.invalidate()
+    yield
+    user_states.invalidate()
+
+
+def obtain_token(api_client, email, password):
+    response = api_client.post("/api/users/token/", {"email": email, "password": password})
+    assert response.status_code == status.HTTP_200_OK
+    return response.data["access"]
+
+
+# autenticación JWT a partir de los claims del token
+@pytest.mark.django_db
+class TestClaimsAuthentication:
+
+    def test_register_issues_token_with_role_claims(self, api_client, roles):
+        response = api_client.post("/api/users/register/", {
+            "email": "nuevo@example.com",
+            "password": "nuevopass123",
+        })
+        assert response.status_code == status.HTTP_201_CREATED
+
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        response = api_client.get("/api/users/me/")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["role_name"] == "client"
+
+    def test_task_list_does_not_load_user_row(self, api_client, client_user_a, tasks, query_budget):
+        token = obtain_token(api_client, client_user_a.email, "clientpass123")
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        api_client.get("/api/tasks/")
+
+        # con el estado del usuario en cache solo quedan el validador del ETag y la consulta de tareas
+        with query_budget(2):
+            response = api_client.get("/api/tasks/")
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 2
+
+    def test_admin_claims_grant_admin_endpoints(self, api_client, admin_user, tasks):
+        token = obtain_token(api_client, admin_user.email, "adminpass123")
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = api_client.get("/api/logs/")
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_client_can_create_task_with_claims_user(self, api_client, client_user_a, statuses, categories):
+        token = obtain_token(api_client, client_user_a.email, "clientpass123")
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = api_client.post("/api/tasks/", {"title": "Con claims", "category_id": categories["trabajo"].id})
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["user"] == client_user_a.pk
+
+    def test_role_change_revokes_token(self, api_client, client_user_a, roles):
+        token = obtain_token(api_client, client_user_a.email, "clientpass123")
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        assert api_client.get("/api/tasks/").status_code == status.HTTP_200_OK
+
+        client_user_a.role = roles["admin"]
+        client_user_a.save()
+        assert api_client.get("/api/tasks/").status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivated_user_is_rejected(self, api_client, client_user_a):
+        token = obtain_token(api_client, client_user_a.email, "clientpass123")
+        client_user_a.is_active = False
+        client_user_a.save(update_fields=["is_active"])
+
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        assert api_client.get("/api/tasks/").status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_refreshed_access_token_keeps_claims(self, api_client, client_user_a, tasks):
+        response = api_client.post("/api/users/token/", {"email": client_user_a.email, "password": "clientpass123"})
+        response = api_client.post("/api/users/token/refresh/", {"refresh": response.data["refresh"]})
+        assert response.status_code == status.HTTP_200_OK
+
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        response = api_client.get("/api/tasks/")
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 2
+
+
+# /api/users/me/ por el camino async (ASGI)
+@pytest.mark.django_db
+def test_async_me_view(client_user_a):
+    token = RoleRefreshToken.for_user(client_user_a).access_token
+    request = AsyncRequestFactory().get("/api/users/me/", headers={"Authorization": f"Bearer {token}"})
+    response = async_to_sync(me)(request)
+    assert response.status_code == status.HTTP_200_OK
+    assert not hasattr(response, "data")
+    body = json.loads(response.content)
+    assert body["email"] == client_user_a.email
+    assert body["role_name"] == "client"
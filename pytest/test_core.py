@@ -0,0 +1,280 @@
+import gzip
+import io
+import json
+import logging
+import os
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import compression, metrics, schema, timing
+
+
+def adapted_middleware(settings, caplog):
+    """middlewares que Django tuvo que adaptar de sync a async al armar la cadena ASGI"""
+    # Django solo registra las adaptaciones con DEBUG
+    settings.DEBUG = True
+    with caplog.at_level(logging.DEBUG, logger="django.request"):
+        ASGIHandler()
+    return [record.getMessage() for record in caplog.records if "adapted for middleware" in record.getMessage()]
+
+
+# perfil de sqlite de core/db/sqlite3 (PRAGMAs y BEGIN IMMEDIATE)
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="perfil específico de sqlite")
+class TestSqliteProfile:
+
+    @pytest.mark.django_db
+    def test_pragmas_applied_on_connect(self, settings):
+        pragmas = settings.DATABASES["default"].get("OPTIONS", {}).get("pragmas")
+        if not pragmas:
+            pytest.skip("SQLITE_PROFILE sin PRAGMAs")
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            assert cursor.fetchone()[0] == pragmas["busy_timeout"]
+            cursor.execute("PRAGMA synchronous")
+            # NORMAL = 1
+            assert cursor.fetchone()[0] == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_atomic_begins_immediate(self):
+        if getattr(connection, "transaction_mode", None) != "IMMEDIATE":
+            pytest.skip("SQLITE_PROFILE sin BEGIN IMMEDIATE")
+        with CaptureQueriesContext(connection) as ctx:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+        assert ctx.captured_queries[0]["sql"] == "BEGIN IMMEDIATE"
+
+
+# cabecera Server-Timing y log de peticiones lentas (core/timing.py)
+@pytest.mark.django_db
+class TestRequestTiming:
+
+    @pytest.fixture
+    def client(self, client_user_a, tasks):
+        client = APIClient()
+        client.force_authenticate(user=client_user_a)
+        return client
+
+    def test_server_timing_header(self, settings, client):
+        settings.REQUEST_TIMING = {"ENABLED": True, "SLOW_REQUEST_MS": 10_000}
+        header = client.get("/api/tasks/")["Server-Timing"]
+        metrics = {part.split(";")[0] for part in header.split(", ")}
+        assert metrics == {"db", "ser", "auth", "total"}
+        assert "consultas" in header
+
+    def test_disabled_adds_nothing(self, settings, client):
+        settings.REQUEST_TIMING = {"ENABLED": False}
+        assert not client.get("/api/tasks/").has_header("Server-Timing")
+
+    def test_slow_requests_are_logged(self, settings, client, caplog):
+        settings.REQUEST_TIMING = {"ENABLED": True, "SLOW_REQUEST_MS": 0, "SLOWEST_QUERIES": 1}
+        with caplog.at_level(logging.WARNING, logger="core.timing"):
+            client.get("/api/tasks/")
+        [record] = caplog.records
+        assert "Petición lenta GET /api/tasks/ -> 200" in record.getMessage()
+        assert "SELECT" in record.getMessage()
+
+    def test_not_adapted_under_asgi(self, settings, caplog):
+        settings.REQUEST_TIMING = {"ENABLED": True}
+        adapted = adapted_middleware(settings, caplog)
+        assert not [message for message in adapted if "core.timing" in message]
+
+    def test_times_queries_under_asgi(self, settings, client_user_a):
+        settings.REQUEST_TIMING = {"ENABLED": True, "SLOW_REQUEST_MS": 10_000}
+        token = AccessToken.for_user(client_user_a)
+
+        async def get():
+            return await AsyncClient().get("/api/tasks/", headers={"Authorization": f"Bearer {token}"})
+
+        header = async_to_sync(get)()["Server-Timing"]
+        # la vista sync corre en el hilo de sync_to_async, con sus propias conexiones
+        assert 'desc="0 consultas"' not in header
+        assert timing.current() is None
+
+
+# métricas por vista en /api/metrics (core/metrics.py)
+@pytest.mark.django_db
+class TestMetrics:
+
+    @pytest.fixture(autouse=True)
+    def fresh_registry(self):
+        metrics.registry.reset()
+        yield
+        metrics.registry.reset()
+
+    @pytest.fixture
+    def admin_client(self, admin_user):
+        client = APIClient()
+        client.force_authenticate(user=admin_user)
+        return client
+
+    def test_requests_are_counted_per_view_and_action(self, admin_client):
+        admin_client.get("/api/tasks/")
+        admin_client.get("/api/tasks/")
+        admin_client.get("/api/tasks/999999/")
+        body = admin_client.get("/api/metrics").content.decode()
+        assert 'http_requests_total{view="TaskViewSet",action="list",method="GET",status="200"} 2' in body
+        assert 'http_requests_total{view="TaskViewSet",action="retrieve",method="GET",status="404"} 1' in body
+        assert 'http_request_duration_seconds_bucket{view="TaskViewSet",action="list",le="+Inf"} 2' in body
+        assert 'http_request_duration_seconds_count{view="TaskViewSet",action="list"} 2' in body
+        assert 'http_request_db_queries_total{view="TaskViewSet",action="list"}' in body
+
+    def test_audit_writes_are_counted(self, client_user_a, statuses, categories):
+        client = APIClient()
+        client.force_authenticate(user=client_user_a)
+        client.post("/api/tasks/", {"title": "Nueva", "category_id": categories["trabajo"].pk})
+        assert metrics.registry.snapshot()[("audit_log_writes_total", (("backend", "sync"),))] == 1
+
+    def test_only_admins(self, client_user_a):
+        client = APIClient()
+        client.force_authenticate(user=client_user_a)
+        assert client.get("/api/metrics").status_code == 403
+        assert APIClient().get("/api/metrics").status_code == 401
+
+    def test_threads_and_processes_are_aggregated(self, settings, tmp_path):
+        settings.METRICS = {"DIR": str(tmp_path), "FLUSH_INTERVAL": 3600}
+        labels = (("view", "TaskViewSet"), ("action", "list"))
+        thread = threading.Thread(target=metrics.inc, args=("http_request_db_queries_total", labels, 2))
+        thread.start()
+        thread.join()
+        metrics.inc("http_request_db_queries_total", labels, 3)
+        # el archivo que dejó otro worker
+        (tmp_path / "metrics-1-0.json").write_text(json.dumps([["http_request_db_queries_total", labels, 5]]))
+        assert metrics.registry.collect()[("http_request_db_queries_total", labels)] == 10
+        metrics.registry.flush()
+        assert len(list(tmp_path.glob("metrics-*.json"))) == 2
+
+    def test_not_adapted_under_asgi(self, settings, caplog):
+        adapted = adapted_middleware(settings, caplog)
+        assert not [message for message in adapted if "core.metrics" in message]
+
+    def test_counts_queries_under_asgi(self, admin_user):
+        # la vista sync corre en el hilo de sync_to_async, con sus propias conexiones
+        token = AccessToken.for_user(admin_user)
+
+        async def get():
+            return await AsyncClient().get("/api/tasks/", headers={"Authorization": f"Bearer {token}"})
+
+        response = async_to_sync(get)()
+        assert response.status_code == 200
+        labels = (("view", "TaskViewSet"), ("action", "list"))
+        snapshot = metrics.registry.snapshot()
+        assert snapshot[("http_requests_total", labels + (("method", "GET"), ("status", "200")))] == 1
+        assert snapshot[("http_request_db_queries_total", labels)] >= 1
+
+
+# compresión negociada con Accept-Encoding (core/compression.py)
+@pytest.mark.django_db
+class TestCompression:
+
+    @pytest.fixture
+    def api_client(self, settings, client_user_a, tasks):
+        # el middleware lee sus opciones al crearse: una vez por cliente de prueba
+        settings.RESPONSE_COMPRESSION = {"MIN_SIZE": 200, "ENCODINGS": ("gzip",)}
+        client = APIClient()
+        client.force_authenticate(user=client_user_a)
+        return client
+
+    def test_large_responses_are_gzipped(self, api_client):
+        plain = api_client.get("/api/tasks/")
+        response = api_client.get("/api/tasks/", HTTP_ACCEPT_ENCODING="br;q=1, gzip;q=0.8")
+        assert response["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response["Vary"]
+        assert int(response["Content-Length"]) == len(response.content) < len(plain.content)
+        assert gzip.decompress(response.content) == plain.content
+
+    def test_small_or_unaccepted_responses_are_not_compressed(self, settings, api_client):
+        assert not api_client.get("/api/tasks/").has_header("Content-Encoding")
+        assert not api_client.get("/api/tasks/", HTTP_ACCEPT_ENCODING="gzip;q=0").has_header("Content-Encoding")
+        small = api_client.get("/api/tasks/999999/", HTTP_ACCEPT_ENCODING="gzip")
+        assert not small.has_header("Content-Encoding")
+        assert "Accept-Encoding" in small["Vary"]
+
+    def test_streaming_responses_are_not_compressed(self, api_client):
+        response = api_client.get("/api/tasks/export/", HTTP_ACCEPT_ENCODING="gzip")
+        assert response.streaming
+        assert not response.has_header("Content-Encoding")
+
+    def test_choose_encoding(self):
+        assert compression.choose_encoding("gzip, deflate", ("gzip",)) == "gzip"
+        assert compression.choose_encoding("*", ("gzip",)) == "gzip"
+        assert compression.choose_encoding("*;q=0, identity", ("gzip",)) is None
+        assert compression.choose_encoding("br", ("gzip",)) is None
+        assert compression.choose_encoding("gzip;q=abc", ("gzip",)) is None
+
+    @pytest.mark.skipif("zstd" not in compression.COMPRESSORS, reason="zstd no disponible")
+    def test_zstd_preferred_when_available(self, settings, client_user_a, tasks):
+        settings.RESPONSE_COMPRESSION = {"MIN_SIZE": 200, "ENCODINGS": ("zstd", "gzip")}
+        client = APIClient()
+        client.force_authenticate(user=client_user_a)
+        assert client.get("/api/tasks/", HTTP_ACCEPT_ENCODING="gzip, zstd")["Content-Encoding"] == "zstd"
+        assert compression.choose_encoding("gzip, zstd;q=0.5", ("zstd", "gzip")) == "gzip"
+
+    def test_not_adapted_under_asgi(self, settings, caplog):
+        adapted = adapted_middleware(settings, caplog)
+        assert not [message for message in adapted if "core.compression" in message]
+
+    def test_async_chain(self, settings):
+        settings.RESPONSE_COMPRESSION = {"MIN_SIZE": 200, "ENCODINGS": ("gzip",)}
+        body = b'{"title": "Tarea"}' * 100
+
+        async def get_response(request):
+            return HttpResponse(body, content_type="application/json")
+
+        middleware = compression.CompressionMiddleware(get_response)
+        assert iscoroutinefunction(middleware)
+        response = async_to_sync(middleware)(RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip"))
+        assert response["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.content) == body
+
+
+# esquema OpenAPI precalculado (core/schema.py)
+@pytest.mark.django_db
+class TestStaticSchema:
+
+    @pytest.fixture
+    def static(self, settings, tmp_path):
+        settings.OPENAPI_SCHEMA = {"STATIC": True, "DIR": str(tmp_path), "MAX_AGE": 600}
+        call_command("build_openapi_schema", stdout=io.StringIO())
+        return tmp_path
+
+    def test_serves_stored_artifact_with_cache_headers(self, static):
+        client = APIClient()
+        dynamic = schema.generate()
+        response = client.get("/api/schema/")
+        assert response.content == (static / "schema.yaml").read_bytes() == dynamic["yaml"]
+        assert response["Cache-Control"] == "public, max-age=600"
+        json_response = client.get("/api/schema/", HTTP_ACCEPT="application/vnd.oai.openapi+json")
+        assert json_response.content == dynamic["json"]
+        assert json_response["ETag"] != response["ETag"]
+
+        not_modified = client.get("/api/schema/", HTTP_IF_NONE_MATCH=response["ETag"])
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+
+    def test_reloads_when_the_file_changes(self, static):
+        client = APIClient()
+        etag = client.get("/api/schema/")["ETag"]
+        path = static / "schema.yaml"
+        path.write_bytes(b"openapi: 3.0.3\n")
+        os.utime(path, ns=(path.stat().st_mtime_ns + 10**9,) * 2)
+        response = client.get("/api/schema/")
+        assert response.content == b"openapi: 3.0.3\n"
+        assert response["ETag"] != etag
+
+    def test_dynamic_without_static(self, settings, tmp_path):
+        settings.OPENAPI_SCHEMA = {"STATIC": False, "DIR": str(tmp_path)}
+        response = APIClient().get("/api/schema/")
+        assert response.status_code == 200
+        assert not response.has_header("ETag")
+        assert not any(tmp_path.iterdir())
@@ -1,8 +1,28 @@
 from django.contrib import admin
-from .models import Task, Status, Category, logTask
+from .models import Task, Status, Category, logTask, DeletedTask
 
 # Register your models here.
-admin.site.register(Task)
 admin.site.register(Status)
 admin.site.register(Category)
-admin.site.register(logTask)
+admin.site.register(DeletedTask)
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('title', 'user', 'is_deleted')
+
+    def get_queryset(self, request):
+        # Task.objects excluye las borradas; el admin las muestra todas
+        return Task.all_objects.all()
+
+
+@admin.register(logTask)
+class LogTaskAdmin(admin.ModelAdmin):
+    # la tabla crece con cada escritura: sin COUNT(*) total, sin cargar todas las tareas en el formulario
+    list_display = ('timestamp', 'action', 'task')
+    list_filter = ('action',)
+    list_select_related = ('task',)
+    ordering = ('-timestamp',)
+    raw_id_fields = ('task',)
+    show_full_result_count = False
+
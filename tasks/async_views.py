@@ -0,0 +1,230 @@
+# lista y detalle de tareas por el camino async (ver core/asyncviews.py)
+#
+# mismas reglas que TaskViewSet: se reutilizan su queryset, sus filtros, los
+# validadores de ConditionalGetMixin y la cache de listas; solo cambian las
+# consultas, que van por el ORM async. Además, los avisos de cambios por SSE y
+# long-poll (tasks/push.py), que solo existen bajo ASGI
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import HttpResponseNotAllowed, StreamingHttpResponse
+from rest_framework.exceptions import APIException, ValidationError
+
+from core.asyncviews import hybrid_view, init_view, json_response
+from core.lookups import aload_all
+from core.renderers import FastJSONRenderer
+from . import cache, push
+from .fastlist import get_mapper
+from .serializers import TaskSerializer
+from .views import TaskViewSet
+
+LIST_ACTIONS = {'get': 'list', 'post': 'create'}
+DETAIL_ACTIONS = {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}
+
+# la paginación por cursor queda en el camino sync
+SYNC_ONLY_PARAMS = {'cursor', 'page_size'}
+
+
+async def list_tasks(request):
+    if SYNC_ONLY_PARAMS & request.GET.keys():
+        return None
+    view = await init_view(TaskViewSet, request, LIST_ACTIONS)
+    if view is None:
+        return None
+
+    try:
+        queryset = view.filter_queryset(view.get_queryset())
+    except APIException:
+        # ?fields=/?expand= inválidos: el 400 lo arma el camino sync
+        return None
+    etag = view.list_etag(await cache.alist_version(view.request))
+    not_modified = view.conditional_response(request, etag, None)
+    if not_modified is not None:
+        return not_modified
+
+    async def build():
+        await aload_all()
+        mapper = get_mapper(TaskSerializer, view.request)
+        if mapper is not None:
+            return mapper.build([row async for row in mapper.rows(queryset).aiterator()])
+        tasks = [task async for task in queryset.aiterator()]
+        return TaskSerializer(tasks, many=True, context=view.get_serializer_context()).data
+
+    if cache.get_options()['ENABLED']:
+        data = await cache.aget_or_build(await cache.alist_key(view.request, view.list_version), build)
+    else:
+        data = await build()
+    return view.set_validators(json_response(data), etag, None)
+
+
+async def retrieve_task(request, pk):
+    view = await init_view(TaskViewSet, request, DETAIL_ACTIONS, pk=pk)
+    if view is None:
+        return None
+
+    try:
+        row = await view.retrieve_validator(pk).afirst()
+    except APIException:
+        return None
+    if row is None:
+        # no existe o no es visible: el 404 lo arma el camino sync
+        return None
+    updated_at, owner = row
+    version = await cache.adetail_version(owner) if view.expands_relations() else None
+    etag, last_modified = view.detail_validators(pk, updated_at, version)
+    not_modified = view.conditional_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        task = await view.get_queryset().aget(pk=pk)
+        view.check_object_permissions(view.request, task)
+    except (ObjectDoesNotExist, APIException):
+        return None
+    await aload_all()
+    data = TaskSerializer(task, context=view.get_serializer_context()).data
+    return view.set_validators(json_response(data), etag, last_modified)
+
+
+task_list = hybrid_view(TaskViewSet.as_view(LIST_ACTIONS), list_tasks)
+task_detail = hybrid_view(TaskViewSet.as_view(DETAIL_ACTIONS), retrieve_task)
+
+
+def authorize(request):
+    """Autenticación y permisos con DRF para los tokens que aauthenticate() no resuelve
+
+    devuelve la vista o la respuesta de error de DRF (401/403) ya renderizada
+    """
+    view = TaskViewSet()
+    view.action_map = LIST_ACTIONS
+    view.args, view.kwargs, view.headers, view.format_kwarg = (), {}, {}, None
+    view.request = drf_request = view.initialize_request(request)
+    try:
+        # sin initial(): la negociación de contenido rechazaría Accept: text/event-stream
+        view.perform_authentication(drf_request)
+        view.check_permissions(drf_request)
+    except APIException as exc:
+        return view.finalize_response(drf_request, view.handle_exception(exc)).render()
+    return view
+
+
+async def push_view(request):
+    """Vista DRF autenticada para los avisos, o la respuesta de error
+
+    EventSource no permite enviar cabeceras: el token puede venir en ?token=
+    """
+    token = request.GET.get('token')
+    if token and 'HTTP_AUTHORIZATION' not in request.META:
+        request.META['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    view = await init_view(TaskViewSet, request, LIST_ACTIONS)
+    if view is None:
+        view = await sync_to_async(authorize)(request)
+    return view
+
+
+def last_event_id(request):
+    """Id del último evento que recibió el cliente (Last-Event-ID o ?after=), o None"""
+    value = request.headers.get('Last-Event-ID') or request.GET.get('after')
+    if value in (None, ''):
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        value = -1
+    if value < 0:
+        raise ValidationError({'after': 'Debe ser el id de un evento.'})
+    return value
+
+
+def sse_frame(event):
+    data = FastJSONRenderer().render(event).decode()
+    return f'id: {event["id"]}\nevent: tasks\ndata: {data}\n\n'
+
+
+async def task_events(request):
+    """Stream SSE con los cambios de las tareas del usuario (todas, si es admin)"""
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    view = await push_view(request)
+    if not isinstance(view, TaskViewSet):
+        return view
+    try:
+        after = last_event_id(request)
+    except ValidationError as exc:
+        return json_response(exc.detail, status=exc.status_code)
+    user = view.request.user
+
+    async def stream():
+        options = push.get_options()
+        subscription = await push.hub.subscribe(user.pk, user.is_admin)
+        try:
+            yield f'retry: {int(options["RETRY"] * 1000)}\n\n'
+            sent = after or 0
+            if after is not None:
+                # lo que se perdió mientras estaba desconectado, de a BATCH_SIZE logs;
+                # lo posterior al arranque del watcher llega además por la suscripción
+                while (event := await push.missed_events(user, sent)) is not None:
+                    sent = event['id']
+                    yield sse_frame(event)
+            # Django 4.2 no corta el stream cuando el cliente se desconecta: se
+            # cierra a los STREAM_TIMEOUT segundos y EventSource vuelve a conectar
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + options['STREAM_TIMEOUT']
+            while (remaining := deadline - loop.time()) > 0:
+                events = await subscription.get(min(options['HEARTBEAT'], remaining))
+                if not events:
+                    yield ': ping\n\n'
+                    continue
+                for event in events:
+                    if event['id'] > sent:
+                        sent = event['id']
+                        yield sse_frame(event)
+        finally:
+            push.hub.unsubscribe(user.pk, subscription, user.is_admin)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx no debe acumular el stream en su buffer
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def task_events_poll(request):
+    """Long-poll: responde apenas hay cambios después de ?after= o al vencer ?timeout= (segundos)
+
+    sin ?after= responde enseguida con el id del último evento, para empezar desde ahí
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    view = await push_view(request)
+    if not isinstance(view, TaskViewSet):
+        return view
+    options = push.get_options()
+    try:
+        after = last_event_id(request)
+    except ValidationError as exc:
+        return json_response(exc.detail, status=exc.status_code)
+    try:
+        timeout = float(request.GET.get('timeout', options['LONG_POLL_TIMEOUT']))
+    except ValueError:
+        timeout = -1
+    if not 0 <= timeout:
+        return json_response({'timeout': ['Debe ser un número de segundos.']}, status=400)
+    timeout = min(timeout, options['LONG_POLL_TIMEOUT'])
+    user = view.request.user
+
+    if after is None:
+        return json_response({'events': [], 'last_event_id': await push.last_visible_log(user)})
+
+    # suscripción antes de buscar lo perdido: lo que llegue entre ambas cosas no se pierde
+    subscription = await push.hub.subscribe(user.pk, user.is_admin)
+    try:
+        event = await push.missed_events(user, after)
+        events = [event] if event is not None else [
+            event for event in await subscription.get(timeout) if event['id'] > after
+        ]
+    finally:
+        push.hub.unsubscribe(user.pk, subscription, user.is_admin)
+    return json_response({'events': events, 'last_event_id': events[-1]['id'] if events else after})
@@ -0,0 +1,225 @@
+# escritura de los logs de auditoría de tareas (logTask)
+#
+# las señales y el ViewSet no crean logTask directamente sino que llaman a
+# `record(task, action)`; el sink configurado en settings.TASK_AUDIT_LOG decide
+# cómo se persiste:
+#  - 'sync': un INSERT por evento dentro de la misma petición (modo de los tests)
+#  - 'buffered': los eventos se acumulan en memoria y se escriben con bulk_create
+#    al llegar a BATCH_SIZE, pasados FLUSH_INTERVAL segundos, al hacer commit
+#    (si FLUSH_ON_COMMIT) o al apagar el proceso; opcional: lo que sigue en el
+#    buffer se pierde si el proceso muere sin apagarse (kill -9, OOM), y con él
+#    el cambio desaparece del feed de tasks/changes.py y de tasks/push.py
+
+import atexit
+import logging
+import os
+import signal
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core import metrics
+from .models import logTask
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BACKEND': 'sync',
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 1.0,
+    'FLUSH_ON_COMMIT': False,
+}
+
+
+class SyncAuditSink:
+    """Escribe cada evento en el momento, igual que el comportamiento original"""
+
+    def record(self, task, action):
+        logTask.objects.create(task=task, user_id=task.user_id, action=action)
+        metrics.inc('audit_log_writes_total', (('backend', 'sync'),))
+
+    def record_many(self, tasks, action):
+        rows = logTask.objects.bulk_create([logTask(task=task, user_id=task.user_id, action=action) for task in tasks])
+        metrics.inc('audit_log_writes_total', (('backend', 'sync'),), len(rows))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class BufferedAuditSink:
+    """Acumula eventos en memoria y los escribe en lotes con bulk_create
+
+     - los eventos emitidos dentro de una transacción solo entran al buffer
+       cuando ésta hace commit, así un rollback no deja logs huérfanos
+     - el timestamp se toma al registrar el evento, no al escribir el lote
+    """
+
+    def __init__(self, batch_size=100, flush_interval=1.0, flush_on_commit=False):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.flush_on_commit = flush_on_commit
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._timer = None
+        self._pid = os.getpid()
+        self._closed = False
+
+    def record(self, task, action):
+        self.record_many([task], action)
+
+    def record_many(self, tasks, action):
+        now = timezone.now()
+        events = [(task.pk, task.user_id, action, now) for task in tasks]
+        connection = transaction.get_connection()
+        if connection.in_atomic_block:
+            transaction.on_commit(lambda: self._append(events, from_commit=True))
+        else:
+            self._append(events)
+
+    def _append(self, events, from_commit=False):
+        with self._lock:
+            self._reset_after_fork()
+            self._buffer.extend(events)
+            full = len(self._buffer) >= self.batch_size
+            if not full and self._timer is None and self.flush_interval:
+                self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if full or (from_commit and self.flush_on_commit) or self._closed:
+            self.flush()
+
+    def _reset_after_fork(self):
+        # un worker creado con fork hereda el buffer y el timer del padre
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._buffer = []
+            self._timer = None
+
+    def _take(self):
+        with self._lock:
+            events, self._buffer = self._buffer, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return events
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            # el timer corre en su propio hilo y por lo tanto en su propia conexión
+            close_old_connections()
+
+    def flush(self):
+        events = self._take()
+        if not events:
+            return 0
+        rows = [logTask(task_id=task_id, user_id=user_id, action=action, timestamp=timestamp)
+                for task_id, user_id, action, timestamp in events]
+        # logTask.task no tiene FK en la base: el lote se escribe aunque la tarea ya
+        # se haya movido a DeletedTask (sigue siendo su id) o purgado (lo archiva la retención)
+        with transaction.atomic():
+            logTask.objects.bulk_create(rows, batch_size=self.batch_size)
+        metrics.inc('audit_log_writes_total', (('backend', 'buffered'),), len(rows))
+        return len(rows)
+
+    def close(self):
+        self._closed = True
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('No se pudo escribir el buffer de auditoría al cerrar')
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def _build_sink():
+    options = {**DEFAULTS, **getattr(settings, 'TASK_AUDIT_LOG', {})}
+    backend = options['BACKEND']
+    if backend == 'sync':
+        return SyncAuditSink()
+    if backend == 'buffered':
+        sink = BufferedAuditSink(
+            batch_size=options['BATCH_SIZE'],
+            flush_interval=options['FLUSH_INTERVAL'],
+            flush_on_commit=options['FLUSH_ON_COMMIT'],
+        )
+        _install_shutdown_hooks()
+        return sink
+    raise ValueError(f"TASK_AUDIT_LOG['BACKEND'] desconocido: {backend!r}")
+
+
+def get_sink():
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = _build_sink()
+    return _sink
+
+
+def record(task, action):
+    """Registra una acción (CREATED, UPDATED, DELETED) sobre una tarea"""
+    get_sink().record(task, action)
+
+
+def record_many(tasks, action):
+    """Registra la misma acción para varias tareas con una sola escritura"""
+    get_sink().record_many(tasks, action)
+
+
+def flush():
+    """Escribe los eventos pendientes del sink actual"""
+    if _sink is not None:
+        _sink.flush()
+
+
+def shutdown():
+    if _sink is not None:
+        _sink.close()
+
+
+_hooks_installed = False
+
+
+def _install_shutdown_hooks():
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+    atexit.register(shutdown)
+
+    # SIGTERM no ejecuta atexit por defecto; si nadie más lo maneja se escribe el
+    # buffer y luego se termina con el comportamiento por defecto
+    if threading.current_thread() is not threading.main_thread():
+        return
+    if signal.getsignal(signal.SIGTERM) is not signal.SIG_DFL:
+        return
+
+    def _on_sigterm(signum, frame):
+        shutdown()
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, _on_sigterm)
+
+
+@receiver(setting_changed)
+def _reset_sink(setting, **kwargs):
+    global _sink
+    if setting == 'TASK_AUDIT_LOG':
+        with _sink_lock:
+            if _sink is not None:
+                _sink.close()
+            _sink = None
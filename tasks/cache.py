@@ -0,0 +1,218 @@
+# cache de la respuesta serializada de TaskViewSet.list
+#
+# la clave incluye generaciones que se incrementan en cada escritura en vez de
+# borrar entradas:
+#  - una por usuario (sus tareas) y una global (vista "todas" de los admin)
+#  - una de catálogos, para que renombrar un estado o categoría no deje
+#    respuestas con el nombre viejo
+# las entradas viejas simplemente dejan de leerse y expiran por TIMEOUT.
+# Las mismas generaciones son la versión de la colección con la que
+# ConditionalGetMixin arma el ETag de la lista, así que se incrementan aunque la
+# cache de listas esté desactivada (ENABLED solo decide si se guardan respuestas).
+# Con varios procesos la cache ALIAS tiene que ser compartida y con add/incr
+# atómicos (Redis, Memcached); locmem solo sirve con un único proceso y
+# FileBasedCache no es atómica (dos workers reconstruyen o se pierde un incr).
+# Mientras una entrada se reconstruye, un lock en la cache hace que las demás
+# peticiones esperen el resultado en vez de recalcularlo todas a la vez.
+
+import asyncio
+import random
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+DEFAULTS = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+    'LOCK_TIMEOUT': 10,
+    'LOCK_WAIT': 2.0,
+}
+
+GLOBAL_SCOPE = 'all'
+CATALOG_SCOPE = 'catalog'
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'TASK_LIST_CACHE', {})}
+
+
+def _cache():
+    return caches[get_options()['ALIAS']]
+
+
+def _generation_key(scope):
+    return f'tasks:gen:{scope}'
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def _new_generation():
+    # valor inicial aleatorio: si la cache se vacía no se reutilizan claves viejas
+    return random.randint(1, 2 ** 31)
+
+
+def get_generations(*scopes):
+    cache = _cache()
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _new_generation(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+async def aget_generations(*scopes):
+    cache = _cache()
+    keys = [_generation_key(scope) for scope in scopes]
+    found = await cache.aget_many(keys)
+    for key in keys:
+        if key not in found:
+            await cache.aadd(key, _new_generation(), timeout=None)
+            found[key] = await cache.aget(key)
+    return [found[key] for key in keys]
+
+
+def bump(*scopes):
+    cache = _cache()
+    for scope in scopes:
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_generation(), timeout=None)
+
+
+def invalidate_users(user_ids):
+    """Invalida las listas de esos usuarios y la vista global de los admin"""
+    _bump_now_and_on_commit(GLOBAL_SCOPE, *{user_scope(user_id) for user_id in user_ids})
+
+
+def invalidate_catalogs():
+    _bump_now_and_on_commit(CATALOG_SCOPE)
+
+
+def _bump_now_and_on_commit(*scopes):
+    # el segundo incremento descarta lo que otra petición haya cacheado leyendo
+    # datos anteriores al commit de esta escritura
+    bump(*scopes)
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+def list_version(request):
+    """(alcance, generación, generación de catálogos) de la lista que ve el usuario
+
+    cambia con cualquier escritura de tareas del alcance, de catálogos o del
+    dueño; sin consultas a la base
+    """
+    scope = _list_scope(request)
+    return (scope, *get_generations(scope, CATALOG_SCOPE))
+
+
+async def alist_version(request):
+    scope = _list_scope(request)
+    return (scope, *await aget_generations(scope, CATALOG_SCOPE))
+
+
+def detail_version(user_id):
+    """(generación del dueño, generación de catálogos) para el detalle con relaciones anidadas"""
+    return tuple(get_generations(user_scope(user_id), CATALOG_SCOPE))
+
+
+async def adetail_version(user_id):
+    return tuple(await aget_generations(user_scope(user_id), CATALOG_SCOPE))
+
+
+def list_key(request, version=None):
+    """Clave de la lista para el usuario, sus filtros, su página y las generaciones vigentes"""
+    return _list_key(request, *(version or list_version(request)))
+
+
+async def alist_key(request, version=None):
+    return _list_key(request, *(version or await alist_version(request)))
+
+
+def _list_scope(request):
+    user = request.user
+    return GLOBAL_SCOPE if user.is_admin else user_scope(user.pk)
+
+
+def _list_key(request, scope, generation, catalogs):
+    query = sorted(request.query_params.lists())
+    # los enlaces de paginación son absolutos y dependen del host
+    digest = md5(f'{request.get_host()}|{query}'.encode(), usedforsecurity=False).hexdigest()
+    return f'tasks:list:{scope}:{generation}:{catalogs}:{digest}'
+
+
+def get_or_build(key, build):
+    """Devuelve el valor cacheado o lo construye una sola vez aunque lleguen muchas peticiones"""
+    options = get_options()
+    cache = _cache()
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, timeout=options['LOCK_TIMEOUT']):
+        try:
+            value = build()
+            cache.set(key, value, timeout=options['TIMEOUT'])
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    # otra petición la está reconstruyendo: esperar su resultado un tiempo acotado
+    deadline = time.monotonic() + options['LOCK_WAIT']
+    while time.monotonic() < deadline:
+        time.sleep(0.02)
+        value = cache.get(key)
+        if value is not None:
+            return value
+    return build()
+
+
+async def aget_or_build(key, abuild):
+    """get_or_build() para las vistas async: `abuild` es una corrutina"""
+    options = get_options()
+    cache = _cache()
+    value = await cache.aget(key)
+    if value is not None:
+        return value
+
+    lock_key = f'{key}:lock'
+    if await cache.aadd(lock_key, 1, timeout=options['LOCK_TIMEOUT']):
+        try:
+            value = await abuild()
+            await cache.aset(key, value, timeout=options['TIMEOUT'])
+        finally:
+            await cache.adelete(lock_key)
+        return value
+
+    deadline = time.monotonic() + options['LOCK_WAIT']
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+        value = await cache.aget(key)
+        if value is not None:
+            return value
+    return await abuild()
+
+
+class CachedListMixin:
+    """Sirve TaskViewSet.list desde la cache cuando la generación no cambió"""
+
+    def list(self, request, *args, **kwargs):
+        if not get_options()['ENABLED']:
+            return super().list(request, *args, **kwargs)
+
+        def build():
+            return super(CachedListMixin, self).list(request, *args, **kwargs).data
+
+        # ConditionalGetMixin ya leyó las generaciones para el ETag: misma versión, sin releerla
+        return Response(get_or_build(list_key(request, getattr(self, 'list_version', None)), build))
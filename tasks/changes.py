@@ -0,0 +1,90 @@
+# feed de cambios para sincronizar clientes: /api/tasks/changes/?since=<cursor>
+#
+# logTask ya registra cada alta, edición y borrado, así que el feed lee los
+# logs con id mayor al cursor (un rango sobre la clave primaria) y devuelve el
+# estado actual de cada tarea tocada, una sola vez aunque haya cambiado varias
+# veces, más el cursor con el último log leído:
+#  - sin cambios nuevos la petición es una sola consulta que no encuentra filas:
+#    un rango de la clave primaria (admin) o del índice (user, id) (cliente)
+#  - los clientes solo ven los logs de sus tareas; las borradas (lógicamente)
+#    se devuelven con is_deleted=true para que el cliente las quite
+#  - el cursor es opaco: base64 de "<id del último log>|<fecha de emisión>";
+#    apply_retention borra logs viejos y tareas borradas hace tiempo (con sus
+#    logs), así que un cursor más antiguo que esa ventana responde 410 y el
+#    cliente debe volver a descargar la lista completa
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from . import retention
+from .models import logTask
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+# margen para los eventos que el sink buffered escribe un poco después de ocurrir
+RETENTION_MARGIN = timedelta(days=1)
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'El cursor es más antiguo que los logs conservados; vuelva a descargar la lista completa.'
+    default_code = 'cursor_expired'
+
+
+def encode_cursor(log_id, issued_at=None):
+    raw = f'{log_id}|{(issued_at or timezone.now()).isoformat()}'
+    return urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+
+def decode_cursor(encoded):
+    """(id del último log, fecha de emisión); sin cursor, (0, None): desde el principio"""
+    if not encoded:
+        return 0, None
+    try:
+        log_id, issued_at = urlsafe_b64decode(encoded.encode('ascii')).decode('ascii').split('|', 1)
+        log_id, issued_at = int(log_id), parse_datetime(issued_at)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValidationError({'since': 'Cursor inválido.'})
+    if issued_at is None or log_id < 0:
+        raise ValidationError({'since': 'Cursor inválido.'})
+    return log_id, issued_at
+
+
+def check_retention(issued_at):
+    if issued_at is None:
+        return
+    options = retention.get_options()
+    window = timedelta(days=min(options['LOG_DAYS'], options['DELETED_TASK_DAYS']))
+    if issued_at < timezone.now() - window + RETENTION_MARGIN:
+        raise CursorExpired()
+
+
+def read_changes(logs, since, limit):
+    """Ids de las tareas tocadas después de `since` (del cambio más viejo al más nuevo) y el último log leído
+
+    `logs` es el queryset de logTask visible para el usuario; se leen a lo sumo
+    `limit` logs, has_more indica si quedaron más
+    """
+    rows = list(
+        logs.filter(pk__gt=since).order_by('pk').values_list('pk', 'task_id')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    # el orden de cada tarea es el de su último cambio
+    last_change = {task_id: log_id for log_id, task_id in rows}
+    task_ids = sorted(last_change, key=last_change.get)
+    last_log = rows[-1][0] if rows else since
+    return task_ids, last_log, has_more
+
+
+def visible_logs(user):
+    logs = logTask.objects.all()
+    if not user.is_admin:
+        # logTask.user evita el join con las tareas: rango sobre el índice (user, id)
+        logs = logs.filter(user_id=user.pk)
+    return logs
@@ -0,0 +1,90 @@
+from hashlib import md5
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import cache
+from .fieldsets import Selection
+
+
+class ConditionalGetMixin:
+    """GET condicionales (ETag / Last-Modified) para list y retrieve
+
+     - list: el validador es la versión de la colección del usuario (las
+       generaciones de tasks/cache.py), sin consultas; cualquier escritura de
+       sus tareas, de catálogos o del dueño la cambia. Solo ETag: un Last-Modified
+       tomado de las filas visibles no avanza al borrar una tarea o sacarla del filtro
+     - retrieve: el validador es el updated_at de la tarea, sin joins; con
+       ?expand= (o ?fields= de una relación) la respuesta también cambia al
+       editar catálogos o el dueño, que no tocan updated_at: el ETag suma sus
+       generaciones y no se envía Last-Modified
+     - si el cliente ya tiene esa versión se responde 304 sin serializar
+     - el ETag incluye el usuario, su rol y los query params, así cada vista
+       (admin, cliente, filtros, página) tiene su propio validador
+    """
+    updated_field = 'updated_at'
+
+    def make_etag(self, *parts):
+        request = self.request
+        query = sorted(request.query_params.lists())
+        raw = f'{request.user.pk}|{request.user.role_name}|{query}|' + '|'.join(str(part) for part in parts)
+        return 'W/"%s"' % md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+    def conditional_response(self, request, etag, last_modified):
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            self.set_validators(response, etag, last_modified)
+        return response
+
+    def set_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        # el cliente puede guardar la respuesta pero debe revalidarla siempre
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def list_etag(self, version):
+        # `version` es cache.list_version(); tasks/async_views.py la lee con alist_version()
+        self.list_version = version
+        return self.make_etag(*version)
+
+    def retrieve_validator(self, lookup):
+        return (
+            self.get_queryset().filter(**{self.lookup_field: lookup}).order_by()
+            .values_list(self.updated_field, 'user_id')
+        )
+
+    def expands_relations(self):
+        selection = Selection.from_request(self.request)
+        expandable = getattr(self.get_serializer_class(), 'expandable_fields', {})
+        return any(selection.expands(name) for name in expandable)
+
+    def detail_validators(self, lookup, updated_at, version=None):
+        """(etag, last_modified) del detalle; `version` es cache.detail_version() si se anidan relaciones"""
+        if version is None:
+            return self.make_etag(lookup, updated_at), updated_at
+        return self.make_etag(lookup, updated_at, *version), None
+
+    def list(self, request, *args, **kwargs):
+        etag = self.list_etag(cache.list_version(request))
+        not_modified = self.conditional_response(request, etag, None)
+        if not_modified is not None:
+            return not_modified
+        return self.set_validators(super().list(request, *args, **kwargs), etag, None)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        row = self.retrieve_validator(lookup).first()
+        if row is None:
+            # no existe o no es visible: el camino normal responde 404
+            return super().retrieve(request, *args, **kwargs)
+
+        updated_at, owner = row
+        version = cache.detail_version(owner) if self.expands_relations() else None
+        etag, last_modified = self.detail_validators(lookup, updated_at, version)
+        not_modified = self.conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        return self.set_validators(super().retrieve(request, *args, **kwargs), etag, last_modified)
@@ -0,0 +1,186 @@
+# lectura rápida de listas: filas de values_list() en vez de instancias y serializers
+#
+# en listas grandes el costo está en instanciar cada modelo y recorrer los
+# campos del serializer uno por uno. RowMapper compila, una vez por
+# serializer y combinación de ?fields=/?expand= (tasks/fieldsets.py), las
+# columnas a leer y un plan de tuplas (clave, índice de columna, conversión,
+# plan anidado) que build() recorre para armar el dict de cada fila:
+#  - mismas claves y en el mismo orden que el serializer
+#  - enteros, textos, booleanos e ids se copian tal cual; las fechas se
+#    formatean como DateTimeField (ISO 8601 en la zona horaria actual) y el
+#    resto pasa por el to_representation del campo de DRF
+#  - una relación expandida y nula sale como None, igual que en DRF
+# si el serializer tiene un campo que no se puede leer de una columna (ni está
+# en COMPUTED_ATTRIBUTES) no se compila y la vista usa el camino de siempre.
+# FastListMixin lo usa en list() cuando la petición no está paginada.
+
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from users.lookups import roles
+from users.models import User
+from .fieldsets import EXPAND_PARAM, FIELDS_PARAM, Selection, SparseFieldsMixin
+
+# campos cuyo valor es el de la columna sin conversión
+PLAIN_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+def _role_name(role_id):
+    # igual que User.role_name, desde la cache de roles
+    role = roles.get(role_id)
+    return role.name if role else None
+
+
+# propiedades de un modelo que se calculan desde una columna: (modelo, atributo) -> (columna, función)
+COMPUTED_ATTRIBUTES = {
+    (User, 'role_name'): ('role_id', _role_name),
+}
+
+
+def datetime_converter(field):
+    """DateTimeField.to_representation para fechas aware en ISO 8601, sin pasar por el campo
+
+    recibe la zona horaria actual, que build() resuelve una vez por lista; los
+    otros casos (formato propio, timezone del campo, fechas naive) usan el del campo
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601 or hasattr(field, 'timezone') or not settings.USE_TZ:
+        return lambda value, tz: field.to_representation(value)
+
+    def convert(value, tz):
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(tz).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+class Unsupported(Exception):
+    pass
+
+
+def _plain(value, tz):
+    return value
+
+
+def _build(plan, row, tz):
+    data = {}
+    for key, index, convert, nested in plan:
+        value = row[index]
+        if nested is not None:
+            # relación expandida: `index` es la columna que dice si existe la fila del join
+            data[key] = None if value is None else _build(nested, row, tz)
+        else:
+            # DRF devuelve None sin llamar a to_representation
+            data[key] = None if value is None else convert(value, tz)
+    return data
+
+
+class RowMapper:
+    """Columnas de values_list() y plan fila -> dict equivalente al serializer"""
+
+    def __init__(self, serializer_class, selection):
+        self.columns = []
+        self.plan = self._compile(serializer_class, selection, '')
+
+    def _column(self, name):
+        if name not in self.columns:
+            self.columns.append(name)
+        return self.columns.index(name)
+
+    def _converter(self, field=None, function=None):
+        # todas reciben (valor, zona horaria actual)
+        if function is not None:
+            return lambda value, tz: function(value)
+        if field is None or isinstance(field, PLAIN_FIELDS):
+            return _plain
+        if isinstance(field, serializers.DateTimeField):
+            return datetime_converter(field)
+        return lambda value, tz: field.to_representation(value)
+
+    def _null_check(self, relation, path):
+        # una columna no nula de la tabla del join que ya se lea: un log cuya tarea pasó a
+        # DeletedTask tiene task_id pero el LEFT JOIN no encuentra la fila (y Django
+        # resuelve task__id con la columna local); si no hay ninguna, la de la FK
+        for field in relation.related_model._meta.concrete_fields:
+            column = f'{path}__{field.name}'
+            if not field.null and not field.primary_key and column in self.columns:
+                return self._column(column)
+        return self._column(path)
+
+    def _compile(self, serializer_class, selection, prefix):
+        model = serializer_class.Meta.model
+        fields = serializer_class().fields
+        expandable = serializer_class.expandable_fields if issubclass(serializer_class, SparseFieldsMixin) else {}
+
+        plan = []
+        for name, field in fields.items():
+            if field.write_only or (selection.fields is not None and name not in selection.fields):
+                continue
+            source = field.source
+            if name in expandable and selection.expands(name):
+                nested = self._compile(expandable[name], selection.nested(name), f'{prefix}{source}__')
+                null_check = self._null_check(model._meta.get_field(source), f'{prefix}{source}')
+                plan.append((name, null_check, None, nested))
+                continue
+            try:
+                model._meta.get_field(source)
+            except FieldDoesNotExist:
+                if (model, source) not in COMPUTED_ATTRIBUTES:
+                    raise Unsupported(f'{model.__name__}.{source}')
+                column, function = COMPUTED_ATTRIBUTES[(model, source)]
+                plan.append((name, self._column(prefix + column), self._converter(function=function), None))
+                continue
+            plan.append((name, self._column(prefix + source), self._converter(field), None))
+        return tuple(plan)
+
+    def rows(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def build(self, rows):
+        plan, tz = self.plan, timezone.get_current_timezone()
+        return [_build(plan, row, tz) for row in rows]
+
+
+@lru_cache(maxsize=256)
+def _compiled(serializer_class, fields, expand):
+    try:
+        return RowMapper(serializer_class, Selection.from_params(fields, expand))
+    except Unsupported:
+        return None
+
+
+def get_mapper(serializer_class, request):
+    """RowMapper para la selección de la petición, o None si el serializer no se puede compilar"""
+    if not getattr(settings, 'FAST_LIST_SERIALIZATION', True):
+        return None
+    params = request.query_params
+    return _compiled(serializer_class, params.get(FIELDS_PARAM), params.get(EXPAND_PARAM))
+
+
+class FastListMixin:
+    """list() desde filas de values_list() cuando no hay paginación"""
+
+    def list(self, request, *args, **kwargs):
+        paginator = self.paginator
+        if paginator is not None and getattr(paginator, 'is_requested', lambda request: True)(request):
+            return super().list(request, *args, **kwargs)
+        # get_queryset() primero: valida ?fields=/?expand= (400 si hay nombres desconocidos)
+        queryset = self.filter_queryset(self.get_queryset())
+        mapper = get_mapper(self.get_serializer_class(), request)
+        if mapper is None:
+            return super().list(request, *args, **kwargs)
+        return Response(mapper.build(mapper.rows(queryset)))
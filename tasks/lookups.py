@@ -0,0 +1,6 @@
+from core.lookups import LookupTable
+from .models import Status, Category
+
+# catálogos de tareas resueltos desde memoria, ver core/lookups.py
+statuses = LookupTable(Status)
+categories = LookupTable(Category)
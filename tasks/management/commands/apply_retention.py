@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from tasks import retention, tombstones
+
+
+class Command(BaseCommand):
+    help = ('Archiva (NDJSON comprimido) y borra por lotes los logs viejos y las tareas borradas hace tiempo; '
+            'opcionalmente mueve las borradas a DeletedTask')
+
+    def add_arguments(self, parser):
+        options = retention.get_options()
+        parser.add_argument('--log-days', type=int, default=options['LOG_DAYS'],
+                            help='Días que se conservan los logs (por defecto TASK_RETENTION["LOG_DAYS"])')
+        parser.add_argument('--task-days', type=int, default=options['DELETED_TASK_DAYS'],
+                            help='Días que se conserva una tarea borrada antes de eliminarla físicamente')
+        parser.add_argument('--tombstone-days', type=int, default=options['TOMBSTONE_DAYS'],
+                            help='Días tras el borrado lógico para mover la tarea a DeletedTask (por defecto '
+                                 'TASK_RETENTION["TOMBSTONE_DAYS"]; sin valor no se mueven)')
+        parser.add_argument('--archive-dir', default=options['ARCHIVE_DIR'], help='Carpeta de los archivos .ndjson.gz')
+        parser.add_argument('--batch-size', type=int, default=options['BATCH_SIZE'], help='Filas por transacción')
+        parser.add_argument('--pause', type=float, default=0, help='Segundos de espera entre lotes')
+        parser.add_argument('--skip-logs', action='store_true', help='No procesar logs')
+        parser.add_argument('--skip-tasks', action='store_true', help='No procesar tareas borradas')
+        parser.add_argument('--dry-run', action='store_true', help='Solo contar lo que se archivaría')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['dry_run']:
+            if not kwargs['skip_logs']:
+                count = retention.expired_logs(kwargs['log_days']).count()
+                self.stdout.write(f'Logs con más de {kwargs["log_days"]} días: {count}')
+            if not kwargs['skip_tasks']:
+                count = retention.expired_tasks(kwargs['task_days']).count()
+                count += retention.expired_tombstones(kwargs['task_days']).count()
+                self.stdout.write(f'Tareas borradas hace más de {kwargs["task_days"]} días: {count}')
+                if kwargs['tombstone_days'] is not None:
+                    count = tombstones.movable_tasks(kwargs['tombstone_days']).count()
+                    self.stdout.write(f'Tareas borradas a mover a DeletedTask: {count}')
+            return
+
+        batch = {'archive_dir': kwargs['archive_dir'], 'batch_size': kwargs['batch_size'], 'pause': kwargs['pause']}
+        if not kwargs['skip_tasks']:
+            tasks, logs = retention.purge_deleted_tasks(kwargs['task_days'], **batch)
+            self.stdout.write(self.style.SUCCESS(f'Tareas borradas eliminadas: {tasks} (con {logs} logs).'))
+            if kwargs['tombstone_days'] is not None:
+                moved = tombstones.move_deleted_tasks(kwargs['tombstone_days'], kwargs['batch_size'], kwargs['pause'])
+                self.stdout.write(self.style.SUCCESS(f'Tareas borradas movidas a DeletedTask: {moved}.'))
+        if not kwargs['skip_logs']:
+            logs = retention.archive_logs(kwargs['log_days'], **batch)
+            self.stdout.write(self.style.SUCCESS(f'Logs archivados: {logs}.'))
+        self.stdout.write(f'Archivos en {kwargs["archive_dir"]}')
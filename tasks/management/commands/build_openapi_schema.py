@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from core import schema
+
+
+class Command(BaseCommand):
+    help = 'Genera el esquema OpenAPI (YAML y JSON) que sirve /api/schema/ con OPENAPI_SCHEMA["STATIC"]'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help='Carpeta de salida (por defecto OPENAPI_SCHEMA["DIR"])')
+
+    def handle(self, *args, **kwargs):
+        for path in schema.write(kwargs['dir']):
+            self.stdout.write(f'{path} ({path.stat().st_size} bytes)')
+        self.stdout.write(self.style.SUCCESS('Esquema OpenAPI generado.'))
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from tasks.models import Task
+from tasks.views import TaskViewSet, LogTaskViewSet
+from users.authentication import ClaimsUser
+
+
+class Command(BaseCommand):
+    help = 'Muestra el plan de ejecución (EXPLAIN QUERY PLAN) de las consultas de cada endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, default=1, help='id del cliente usado en las consultas')
+        parser.add_argument('--status-id', type=int, default=1, help='id de estado para el filtro ?status=')
+        parser.add_argument('--sql', action='store_true', help='imprime también el SQL de cada consulta')
+
+    def get_queryset(self, viewset, user, params=None, action='list'):
+        # construye el queryset exactamente como lo hace la vista para ese usuario y query params
+        request = Request(APIRequestFactory().get('/', params or {}))
+        request.user = user
+        view = viewset(request=request, action=action, kwargs={}, format_kwarg=None)
+        return view.get_queryset()
+
+    def handle(self, *args, **options):
+        client = ClaimsUser(options['user_id'], 'client', True)
+        admin = ClaimsUser(0, 'admin', True)
+        client_tasks = self.get_queryset(TaskViewSet, client)
+        last = client_tasks.first()
+
+        queries = [
+            ('GET /api/tasks/ (cliente)', client_tasks),
+            ('GET /api/tasks/?status= (cliente)',
+             self.get_queryset(TaskViewSet, client, {'status': options['status_id']})),
+            ('GET /api/tasks/ (admin)', self.get_queryset(TaskViewSet, admin)),
+            ('GET /api/tasks/?page_size=50 (cliente)', client_tasks.order_by('-created_at', '-id')[:51]),
+            ('GET /api/tasks/{id}/ (cliente)', client_tasks.filter(pk=last.pk if last else 1)),
+            ('POST /api/tasks/ título duplicado (restricción única)',
+             Task.objects.filter(user_id=options['user_id'], title='x')),
+            ('GET /api/logs/ (admin)', self.get_queryset(LogTaskViewSet, admin)),
+        ]
+        if last is not None:
+            queries.insert(4, (
+                'GET /api/tasks/?cursor= (cliente, página siguiente)',
+                client_tasks.filter(
+                    Q(created_at__lt=last.created_at) | Q(created_at=last.created_at, id__lt=last.pk)
+                ).order_by('-created_at', '-id')[:51],
+            ))
+
+        self.stdout.write(f'Motor: {connection.vendor}\n')
+        for name, queryset in queries:
+            self.stdout.write(self.style.SUCCESS(name))
+            if options['sql']:
+                self.stdout.write(f'  {queryset.query}')
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f'  {line}')
+            self.stdout.write('')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from tasks import search
+
+
+class Command(BaseCommand):
+    help = 'Reinstala los triggers y reconstruye el índice de búsqueda FTS5 de las tareas'
+
+    def handle(self, *args, **kwargs):
+        if not search.is_supported(connection):
+            raise CommandError(f'La búsqueda FTS5 solo está disponible en sqlite (motor actual: {connection.vendor}).')
+
+        with transaction.atomic():
+            search.install(connection)
+            search.rebuild(connection)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {search.FTS_TABLE}_docsize')
+            (indexed,) = cursor.fetchone()
+        self.stdout.write(self.style.SUCCESS(f'Índice de búsqueda reconstruido: {indexed} tareas indexadas.'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from tasks import stats
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores de /api/tasks/stats/ desde Task y reporta las diferencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo reportar las diferencias, sin corregirlas')
+
+    def handle(self, *args, **kwargs):
+        differences = stats.drift()
+        for (user_id, status_id, category_id, is_deleted), (stored, actual) in sorted(
+            differences.items(), key=lambda item: tuple(str(part) for part in item[0])
+        ):
+            self.stdout.write(
+                f'usuario={user_id} estado={status_id} categoría={category_id} borradas={is_deleted}: '
+                f'guardado {stored}, real {actual} ({actual - stored:+d})'
+            )
+
+        if not differences:
+            self.stdout.write(self.style.SUCCESS('Los contadores coinciden con las tareas.'))
+            return
+        if kwargs['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(differences)} grupos con diferencias (sin corregir).'))
+            return
+
+        buckets = stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(differences)} grupos corregidos; {buckets} grupos recalculados.'
+        ))
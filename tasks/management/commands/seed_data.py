@@ -0,0 +1,66 @@
+import io
+import random
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tasks import audit, stats
+from tasks.models import Category, Status, Task
+from users.models import Role, User
+
+SEED_PASSWORD = 'seedpass123'
+SEED_ADMIN = 'seed-admin@example.com'
+
+
+class Command(BaseCommand):
+    help = 'Crea datos de prueba: roles, estados, categorías, N usuarios cliente y M tareas por usuario'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Usuarios cliente a crear')
+        parser.add_argument('--tasks', type=int, default=100, help='Tareas por usuario')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla para que los datos sean reproducibles')
+
+    def handle(self, *args, **kwargs):
+        for command in ('create_roles', 'create_status', 'create_categorys'):
+            call_command(command, stdout=self.stdout._out if kwargs['verbosity'] > 1 else io.StringIO())
+
+        rng = random.Random(kwargs['seed'])
+        client_role = Role.objects.get(name='client')
+        statuses = list(Status.objects.order_by('pk'))
+        categories = list(Category.objects.order_by('pk'))
+
+        if not User.objects.filter(email=SEED_ADMIN).exists():
+            User.objects.create_user(email=SEED_ADMIN, password=SEED_PASSWORD, role=Role.objects.get(name='admin'))
+
+        created_tasks = 0
+        for index in range(kwargs['users']):
+            email = f'seed-user-{index}@example.com'
+            user = User.objects.filter(email=email).first()
+            if user is None:
+                user = User.objects.create_user(email=email, password=SEED_PASSWORD, role=client_role)
+
+            existing = Task.objects.filter(user=user).count()
+            tasks = [
+                Task(
+                    title=f'Tarea {number} de {email}',
+                    description=f'Descripción de prueba {number}',
+                    user=user,
+                    status=rng.choice(statuses),
+                    category=rng.choice(categories),
+                )
+                for number in range(existing, kwargs['tasks'])
+            ]
+            if not tasks:
+                continue
+            # bulk_create no emite señales: logs y contadores se registran igual que en /api/tasks/bulk/
+            with transaction.atomic():
+                tasks = Task.objects.bulk_create(tasks, batch_size=500)
+                audit.record_many(tasks, 'CREATED')
+                stats.track(tasks, created=True)
+            created_tasks += len(tasks)
+
+        audit.flush()
+        self.stdout.write(self.style.SUCCESS(
+            f'{kwargs["users"]} usuarios con {kwargs["tasks"]} tareas cada uno ({created_tasks} tareas nuevas). '
+            f'Admin: {SEED_ADMIN}. Contraseña de todos: {SEED_PASSWORD}'
+        ))
@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-18 01:01
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='logtask',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
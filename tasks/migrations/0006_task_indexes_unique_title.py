@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-18 01:14
+
+from django.db import migrations, models
+
+
+def rename_duplicate_titles(apps, schema_editor):
+    # antes solo se validaba al crear; si una edición dejó títulos repetidos
+    # se renombran agregando el id para poder crear la restricción
+    Task = apps.get_model('tasks', 'Task')
+    seen = set()
+    for task in Task.objects.order_by('id').only('id', 'user_id', 'title'):
+        key = (task.user_id, task.title)
+        if key in seen:
+            task.title = f'{task.title} ({task.id})'
+            task.save(update_fields=['title'])
+        seen.add((task.user_id, task.title))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='logtask',
+            index=models.Index(fields=['-timestamp'], name='logtask_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['user', '-created_at', '-id'], name='task_user_live_created_idx'),
+        ),
+        migrations.RunPython(rename_duplicate_titles, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(fields=('user', 'title'), name='task_unique_user_title'),
+        ),
+    ]
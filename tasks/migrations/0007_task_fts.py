@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def install_fts(apps, schema_editor):
+    from tasks import search
+    connection = schema_editor.connection
+    if search.is_supported(connection):
+        search.install(connection)
+        search.rebuild(connection)
+
+
+def uninstall_fts(apps, schema_editor):
+    from tasks import search
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_indexes_unique_title'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_fts, uninstall_fts),
+    ]
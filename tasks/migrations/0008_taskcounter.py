@@ -0,0 +1,55 @@
+# Generated by Django 4.2 on 2026-10-18 01:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    # contadores iniciales a partir de las tareas existentes
+    Task = apps.get_model('tasks', 'Task')
+    TaskCounter = apps.get_model('tasks', 'TaskCounter')
+    rows = (
+        Task.objects.order_by()
+        .values('user_id', 'status_id', 'category_id', 'is_deleted')
+        .annotate(total=models.Count('pk'))
+    )
+    TaskCounter.objects.bulk_create(
+        [
+            TaskCounter(user_id=row['user_id'], status_id=row['status_id'], category_id=row['category_id'],
+                        is_deleted=row['is_deleted'], count=row['total'])
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0007_task_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='tasks.category')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tasks.status')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='taskcounter',
+            constraint=models.UniqueConstraint(fields=('user', 'status', 'category', 'is_deleted'), name='taskcounter_unique_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskcounter',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('user', 'status', 'is_deleted'), name='taskcounter_unique_bucket_no_category'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 01:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_taskcounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['updated_at'], name='task_deleted_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-18 02:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_users(apps, schema_editor):
+    # dueño de la tarea de cada log existente
+    Task = apps.get_model('tasks', 'Task')
+    logTask = apps.get_model('tasks', 'logTask')
+    logTask.objects.update(
+        user_id=models.Subquery(Task.objects.filter(pk=models.OuterRef('task_id')).values('user_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0009_task_deleted_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logtask',
+            name='user',
+            field=models.ForeignKey(blank=True, editable=False, null=True, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(fill_users, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='logtask',
+            index=models.Index(fields=['user', 'id'], name='logtask_user_id_idx'),
+        ),
+    ]
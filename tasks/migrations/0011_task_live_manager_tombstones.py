@@ -0,0 +1,70 @@
+# Generated by Django 4.2 on 2026-10-18 02:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def reinstall_fts(apps, schema_editor):
+    # RemoveConstraint reconstruye tasks_task en sqlite y se lleva los triggers de FTS (ver 0007)
+    from tasks import search
+    connection = schema_editor.connection
+    if search.is_supported(connection):
+        search.install(connection)
+        search.rebuild(connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0010_logtask_user'),
+    ]
+
+    operations = [
+        # al revertir se ejecuta al final, después de reconstruir la tabla otra vez
+        migrations.RunPython(migrations.RunPython.noop, reinstall_fts),
+        migrations.CreateModel(
+            name='DeletedTask',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('deleted_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'ordering': ['-deleted_at', '-id'],
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='task',
+            name='task_unique_user_title',
+        ),
+        migrations.AlterField(
+            model_name='logtask',
+            name='task',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='tasks.task'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_deleted', False)), fields=('user', 'title'), name='task_unique_user_title'),
+        ),
+        migrations.AddField(
+            model_name='deletedtask',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tasks.category'),
+        ),
+        migrations.AddField(
+            model_name='deletedtask',
+            name='status',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tasks.status'),
+        ),
+        migrations.AddField(
+            model_name='deletedtask',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(reinstall_fts, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from users.models import User
 
 # Create your models here.
@@ -17,6 +18,26 @@ class Category(models.Model):
     def __str__(self):
         return self.name
     
+class TaskQuerySet(models.QuerySet):
+
+    def live(self):
+        return self.filter(is_deleted=False)
+
+    def deleted(self):
+        return self.filter(is_deleted=True)
+
+
+class LiveTaskManager(models.Manager.from_queryset(TaskQuerySet)):
+    """Manager por defecto: solo las tareas no borradas
+
+    el filtro coincide con la condición de los índices parciales, así sqlite puede
+    usarlos; las borradas se leen con Task.all_objects
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().live()
+
+
 class Task(models.Model):
     """Modelo para representar una tarea"""
     title = models.CharField(max_length=255)
@@ -26,6 +47,57 @@ class Task(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, blank=True, null=True)
     is_deleted = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # versión de la fila para GET condicionales; bulk_update/update() deben asignarlo a mano
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = LiveTaskManager()
+    # todas, incluidas las de borrado lógico (admin, feed de cambios, retención)
+    all_objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # lista de un admin y paginación por cursor (created_at, id), solo no borradas (índice parcial)
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(is_deleted=False),
+                name='task_created_id_idx',
+            ),
+            # lista de un cliente: user=? y no borradas, ordenada por fecha (índice parcial)
+            models.Index(
+                fields=['user', '-created_at', '-id'],
+                condition=models.Q(is_deleted=False),
+                name='task_user_live_created_idx',
+            ),
+            # purga de tareas borradas hace tiempo (tasks/retention.py), solo las borradas
+            models.Index(
+                fields=['updated_at'],
+                condition=models.Q(is_deleted=True),
+                name='task_deleted_updated_idx',
+            ),
+        ]
+        constraints = [
+            # un usuario no puede tener dos tareas vivas con el mismo título (ver TaskSerializer);
+            # el título de una tarea borrada se puede volver a usar
+            models.UniqueConstraint(
+                fields=['user', 'title'],
+                condition=models.Q(is_deleted=False),
+                name='task_unique_user_title',
+            ),
+        ]
+
+    # campos que definen el grupo de la tarea en TaskCounter (ver tasks/stats.py)
+    STATS_FIELDS = ('user_id', 'status_id', 'category_id', 'is_deleted')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # grupo tal como está guardado; stats lo compara con el actual después de cada escritura
+        self._stats_bucket = self._get_stats_bucket()
+
+    def _get_stats_bucket(self):
+        # solo si todos los campos están cargados, para no disparar consultas de campos diferidos
+        if all(field in self.__dict__ for field in self.STATS_FIELDS):
+            return tuple(self.__dict__[field] for field in self.STATS_FIELDS)
+        return None
 
     def __str__(self):
         return self.title
@@ -38,9 +110,100 @@ class logTask(models.Model):
         ('DELETED', 'Deleted'),
     ]
 
-    task = models.ForeignKey(Task, on_delete=models.CASCADE)
+    # sin FK en la base: los logs se conservan cuando la tarea pasa a DeletedTask y
+    # vuelven a apuntar a ella si se restaura (mismo id); retention los borra a mano.
+    # null=True solo para que los joins sean LEFT JOIN y no oculten esos logs
+    task = models.ForeignKey(Task, on_delete=models.DO_NOTHING, db_constraint=False, null=True)
+    # dueño de la tarea copiado al registrar el evento (no cambia), para el feed de cambios (tasks/changes.py)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, editable=False, related_name='+', db_index=False)
     action = models.CharField(max_length=255, choices=ACTION_CHOICES)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # default en vez de auto_now_add para conservar la hora del evento cuando se escribe en lote
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            # LogTaskViewSet ordena por timestamp descendente
+            models.Index(fields=['-timestamp'], name='logtask_timestamp_idx'),
+            # feed de cambios de un cliente: user=? y id > cursor, un solo rango del índice
+            models.Index(fields=['user', 'id'], name='logtask_user_id_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.user_id is None and self.task_id is not None:
+            self.user_id = self.task.user_id
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        try:
+            task = self.task
+        except Task.DoesNotExist:
+            # sin FK en la base: la tarea puede estar en DeletedTask o purgada, queda su id
+            task = None
+        return f"{self.timestamp} - {self.action} - {task.title if task is not None else self.task_id}"
+
+
+class DeletedTask(models.Model):
+    """Tarea borrada movida fuera de Task (tombstone, ver tasks/tombstones.py)
+
+    conserva el id y las columnas de la tarea para poder consultarla y restaurarla;
+    así Task y sus índices solo cargan con las tareas vivas y las borradas recientes
+    """
+    id = models.IntegerField(primary_key=True)
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    status = models.ForeignKey(Status, on_delete=models.CASCADE, related_name='+')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, blank=True, null=True, related_name='+')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    # momento del borrado lógico (el updated_at de la tarea al moverla)
+    deleted_at = models.DateTimeField(db_index=True)
+
+    # mismas columnas que Task, salvo is_deleted
+    TASK_FIELDS = ('id', 'title', 'description', 'user_id', 'status_id', 'category_id', 'created_at', 'updated_at')
+
+    # para leerla con TaskSerializer (feed de cambios)
+    is_deleted = True
+
+    class Meta:
+        ordering = ['-deleted_at', '-id']
+
+    @classmethod
+    def from_task(cls, task):
+        return cls(deleted_at=task.updated_at, **{field: getattr(task, field) for field in cls.TASK_FIELDS})
+
+    def to_task(self):
+        return Task(is_deleted=False, **{field: getattr(self, field) for field in self.TASK_FIELDS})
+
+    def __str__(self):
+        return self.title
+
+
+class TaskCounter(models.Model):
+    """Cantidad de tareas por (usuario, estado, categoría, borrada)
+
+    se mantiene incrementalmente desde tasks/stats.py; el comando
+    reconcile_task_stats la recalcula desde Task
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    status = models.ForeignKey(Status, on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, blank=True, null=True)
+    is_deleted = models.BooleanField(default=False)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'status', 'category', 'is_deleted'],
+                name='taskcounter_unique_bucket',
+            ),
+            # NULL no es igual a NULL en un índice único: las tareas sin categoría necesitan el suyo
+            models.UniqueConstraint(
+                fields=['user', 'status', 'is_deleted'],
+                condition=models.Q(category__isnull=True),
+                name='taskcounter_unique_bucket_no_category',
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.timestamp} - {self.action} - {self.task.title}"
+        return f"{self.user_id}/{self.status_id}/{self.category_id}/{self.is_deleted}: {self.count}"
@@ -0,0 +1,158 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .search import is_ranked
+
+
+class TaskKeysetPagination(BasePagination):
+    """Paginación por cursor (keyset) sobre (created_at, id) descendente.
+
+     - se activa solo si la petición incluye ?cursor= o ?page_size=, sin ellos
+       la lista se devuelve completa como hasta ahora
+     - cada página es un rango sobre el índice (created_at, id), por lo que
+       el costo no crece con la profundidad de la página y nunca se ejecuta COUNT(*)
+     - el cursor es opaco: base64 de "<created_at iso>|<id>" de la última fila entregada
+     - una búsqueda (?q= con FTS5) se ordena por relevancia, que no es una
+       columna: sus páginas avanzan por posición y el cursor es base64 de
+       "rank|<posición>"; el costo crece con la profundidad, pero solo recorre
+       las coincidencias de la búsqueda
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 200
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        # se pide una fila extra para saber si existe una página siguiente
+        if is_ranked(queryset):
+            self.offset = self.decode_offset(request)
+            rows = list(queryset[self.offset:self.offset + self.page_size + 1])
+        else:
+            self.offset = None
+            position = self.decode_cursor(request)
+            if position is not None:
+                created_at, pk = position
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                )
+            rows = list(queryset.order_by('-created_at', '-id')[:self.page_size + 1])
+
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def decode(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            return urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def decode_cursor(self, request):
+        raw = self.decode(request)
+        if raw is None:
+            return None
+        try:
+            created_at, pk = raw.rsplit('|', 1)
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+    def decode_offset(self, request):
+        raw = self.decode(request)
+        if raw is None:
+            return 0
+        kind, _, offset = raw.partition('|')
+        if kind != 'rank' or not offset.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+        return int(offset)
+
+    def encode(self, raw):
+        return urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def encode_cursor(self, instance):
+        return self.encode(f'{instance.created_at.isoformat()}|{instance.pk}')
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        if self.offset is None:
+            cursor = self.encode_cursor(self.page[-1])
+        else:
+            cursor = self.encode(f'rank|{self.offset + self.page_size}')
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_first_link(self):
+        url = self.request.build_absolute_uri()
+        return remove_query_param(url, self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('first', self.get_first_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'first': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Cursor opaco devuelto en "next" por la página anterior',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': f'Tamaño de página (máximo {self.max_page_size})',
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -0,0 +1,189 @@
+# aviso de cambios de tareas a clientes conectados (SSE y long-poll, solo bajo ASGI)
+#
+# los eventos son los mismos logTask que escribe tasks/audit.py: un único
+# watcher por proceso lee los logs nuevos por rango de id cada POLL_INTERVAL
+# segundos (una consulta por índice sin importar cuántos clientes haya, y ve
+# también lo que escribieron los otros workers o el sink buffered) y el Hub
+# reparte cada lote a las suscripciones del dueño de la tarea y de los admin.
+#  - una conexión en espera es una corrutina dormida sobre un asyncio.Event,
+#    sin consultas propias; el hilo no es gratis: el ASGIHandler de Django abre
+#    un ThreadSensitiveContext por petición y su hilo (ocioso) vive hasta que
+#    la respuesta termina, así que hay un hilo por conexión abierta
+#    (benchmarks/push.py lo mide)
+#  - el watcher arranca con la primera suscripción y se detiene con la última;
+#    siempre empieza en el último log existente, nunca desde lo que mande un cliente
+#  - cada evento lleva el id del último log; el cliente lo devuelve al
+#    reconectar (Last-Event-ID o ?after=) y missed_events() le busca a él solo
+#    lo que se perdió hasta ahí, sin atrasar los avisos de los demás
+# el aviso indica qué tareas cambiaron; los datos se piden a /api/tasks/changes/.
+
+import asyncio
+import logging
+
+from django.conf import settings
+from django.db.models import Max
+
+from .changes import visible_logs
+from .models import logTask
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'POLL_INTERVAL': 1.0,
+    # comentario SSE para que proxies y balanceadores no corten la conexión
+    'HEARTBEAT': 15.0,
+    # duración máxima de un stream SSE; EventSource reconecta solo con Last-Event-ID
+    'STREAM_TIMEOUT': 300.0,
+    'LONG_POLL_TIMEOUT': 25.0,
+    # espera de EventSource antes de reconectar (campo retry: del stream)
+    'RETRY': 3.0,
+    # logs leídos por vuelta del watcher
+    'BATCH_SIZE': 1000,
+    # eventos sin leer por suscripción; si se llena se conservan los más nuevos
+    'MAX_PENDING': 100,
+}
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'TASK_PUSH', {})}
+
+
+def build_event(rows):
+    """Evento a partir de filas (id, user_id, task_id, action) de logTask, en orden de id"""
+    last_action = {task_id: action for _, _, task_id, action in rows}
+    return {
+        'id': rows[-1][0],
+        'tasks': [{'id': task_id, 'action': action} for task_id, action in last_action.items()],
+    }
+
+
+class Subscription:
+    """Eventos pendientes de una conexión"""
+    __slots__ = ('_ready', '_pending', 'max_pending')
+
+    def __init__(self, max_pending):
+        self._ready = asyncio.Event()
+        self._pending = []
+        self.max_pending = max_pending
+
+    def put(self, event):
+        self._pending.append(event)
+        if len(self._pending) > self.max_pending:
+            del self._pending[:-self.max_pending]
+        self._ready.set()
+
+    async def get(self, timeout):
+        """Eventos pendientes, esperando a lo sumo `timeout` segundos; [] si no llegó nada"""
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        events, self._pending = self._pending, []
+        self._ready.clear()
+        return events
+
+
+class Hub:
+    """Suscripciones por usuario (None: admin, recibe todo) y el watcher de logTask"""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._watcher = None
+        self._started = None
+        self._loop = None
+        self._last_log = None
+
+    async def subscribe(self, user_id, admin=False):
+        """Suscripción a los cambios del usuario
+
+        vuelve cuando el watcher ya fijó el log desde el que lee: todo lo
+        posterior llega por la suscripción, y lo anterior que el cliente no
+        conozca se busca después con missed_events()
+        """
+        subscription = Subscription(get_options()['MAX_PENDING'])
+        self._subscribers.setdefault(None if admin else user_id, set()).add(subscription)
+        try:
+            await self._ensure_watcher()
+        except BaseException:
+            self.unsubscribe(user_id, subscription, admin)
+            raise
+        return subscription
+
+    def unsubscribe(self, user_id, subscription, admin=False):
+        key = None if admin else user_id
+        subscribers = self._subscribers.get(key)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[key]
+
+    @property
+    def connections(self):
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def dispatch(self, rows):
+        by_user = {}
+        for row in rows:
+            by_user.setdefault(row[1], []).append(row)
+        for user_id, user_rows in by_user.items():
+            if user_id in self._subscribers:
+                event = build_event(user_rows)
+                for subscription in self._subscribers[user_id]:
+                    subscription.put(event)
+        if None in self._subscribers:
+            event = build_event(rows)
+            for subscription in self._subscribers[None]:
+                subscription.put(event)
+
+    async def _ensure_watcher(self):
+        loop = asyncio.get_running_loop()
+        # un watcher por event loop (uvicorn usa uno por proceso; los tests, uno por llamada)
+        if self._watcher is None or self._watcher.done() or self._loop is not loop:
+            self._loop = loop
+            self._started = loop.create_future()
+            self._watcher = loop.create_task(self._watch(self._started))
+        # shield: si esta petición se cancela, el arranque sigue para las demás
+        await asyncio.shield(self._started)
+
+    async def _watch(self, started):
+        options = get_options()
+        try:
+            try:
+                self._last_log = (await logTask.objects.aaggregate(last=Max('pk')))['last'] or 0
+            except Exception as exc:
+                started.set_exception(exc)
+                return
+            started.set_result(self._last_log)
+            while self._subscribers:
+                await asyncio.sleep(options['POLL_INTERVAL'])
+                try:
+                    rows = [
+                        row async for row in logTask.objects.filter(pk__gt=self._last_log).order_by('pk')
+                        .values_list('pk', 'user_id', 'task_id', 'action')[:options['BATCH_SIZE']]
+                    ]
+                except Exception:
+                    logger.exception('No se pudieron leer los logs nuevos para las conexiones en espera')
+                    continue
+                if rows:
+                    self._last_log = rows[-1][0]
+                    self.dispatch(rows)
+        finally:
+            if self._watcher is asyncio.current_task():
+                self._watcher = None
+
+
+hub = Hub()
+
+
+async def missed_events(user, after):
+    """Evento con lo que el usuario se perdió desde el log `after` (una consulta por índice), o None"""
+    rows = [
+        row async for row in visible_logs(user).filter(pk__gt=after).order_by('pk')
+        .values_list('pk', 'user_id', 'task_id', 'action')[:get_options()['BATCH_SIZE']]
+    ]
+    return build_event(rows) if rows else None
+
+
+async def last_visible_log(user):
+    return (await visible_logs(user).aaggregate(last=Max('pk')))['last'] or 0
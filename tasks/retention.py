@@ -0,0 +1,172 @@
+# política de retención: archivado y borrado por lotes de registros viejos
+#
+#  - logTask con más de LOG_DAYS días
+#  - tareas con borrado lógico hace más de DELETED_TASK_DAYS días (según updated_at,
+#    que se actualiza al borrarlas), estén en Task o ya en DeletedTask (según
+#    deleted_at); se borran físicamente junto con sus logs
+# antes de eso, con TOMBSTONE_DAYS las borradas se mueven de Task a DeletedTask
+# (ver tasks/tombstones.py).
+# cada lote se escribe primero en un archivo NDJSON comprimido (gzip) y recién
+# después se borra en su propia transacción corta, así sqlite nunca retiene el
+# lock de escritura mucho tiempo. Cada lote es un miembro gzip completo que se
+# baja a disco (fsync) antes del borrado: un corte a mitad de camino no pierde
+# datos. Como mucho deja un último miembro truncado cuyas filas siguen en la
+# base (y se archivan en la próxima corrida), o un lote archivado dos veces.
+
+import gzip
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .export import iter_ndjson
+from .models import DeletedTask, Task, logTask
+
+DEFAULTS = {
+    'LOG_DAYS': 90,
+    'DELETED_TASK_DAYS': 30,
+    'ARCHIVE_DIR': Path(settings.BASE_DIR) / 'archive',
+    'BATCH_SIZE': 500,
+    # días tras el borrado lógico para mover la tarea a DeletedTask; None: no se mueven
+    'TOMBSTONE_DAYS': None,
+}
+
+LOG_FIELDS = {
+    'id': 'id',
+    'task_id': 'task_id',
+    'user_id': 'user_id',
+    'action': 'action',
+    'timestamp': 'timestamp',
+}
+
+TASK_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'user_id': 'user_id',
+    'status_id': 'status_id',
+    'category_id': 'category_id',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'TASK_RETENTION', {})}
+
+
+def cutoff(days):
+    return timezone.now() - timedelta(days=days)
+
+
+def expired_logs(days):
+    return logTask.objects.filter(timestamp__lt=cutoff(days))
+
+
+def expired_tasks(days):
+    return Task.all_objects.deleted().filter(updated_at__lt=cutoff(days))
+
+
+def expired_tombstones(days):
+    return DeletedTask.objects.filter(deleted_at__lt=cutoff(days))
+
+
+def _fsync_dir(path):
+    # la entrada del archivo nuevo en la carpeta también tiene que llegar a disco
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # pragma: no cover - Windows no abre carpetas
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Archive:
+    """Archivo NDJSON comprimido que se crea recién con la primera fila
+
+    cada write() agrega un miembro gzip cerrado (gzip.open lee todos los
+    miembros seguidos) y no vuelve hasta que está en disco
+    """
+
+    def __init__(self, directory, name):
+        stamp = timezone.now().strftime('%Y%m%dT%H%M%S')
+        self.path = Path(directory) / f'{name}-{stamp}.ndjson.gz'
+        self._file = None
+
+    def write(self, rows, columns):
+        if not rows:
+            return
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'ab')
+            _fsync_dir(self.path.parent)
+        self._file.write(gzip.compress(''.join(iter_ndjson(rows, columns)).encode('utf-8')))
+        # el lote tiene que estar en disco antes de borrarlo de la base
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def _batches(queryset, fields, batch_size):
+    # recorrido por id: cada lote es una consulta corta sobre lo que queda
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_id).order_by('pk').values_list(*fields.values())[:batch_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def archive_logs(days, archive_dir, batch_size, pause=0):
+    """Archiva y borra los logs con más de `days` días; devuelve la cantidad"""
+    archive = Archive(archive_dir, 'logtask')
+    total = 0
+    try:
+        for rows in _batches(expired_logs(days), LOG_FIELDS, batch_size):
+            archive.write(rows, list(LOG_FIELDS))
+            with transaction.atomic():
+                logTask.objects.filter(pk__in=[row[0] for row in rows]).delete()
+            total += len(rows)
+            time.sleep(pause)
+    finally:
+        archive.close()
+    return total
+
+
+def purge_deleted_tasks(days, archive_dir, batch_size, pause=0):
+    """Archiva y borra físicamente las tareas borradas hace más de `days` días y sus logs
+
+    devuelve (tareas, logs); el borrado en Task pasa por sus señales, así los
+    contadores de stats y las listas cacheadas quedan al día
+    """
+    tasks_archive = Archive(archive_dir, 'task')
+    logs_archive = Archive(archive_dir, 'task-logtask')
+    purged_tasks = purged_logs = 0
+    try:
+        # DeletedTask tiene las mismas columnas que TASK_FIELDS
+        for expired in (expired_tasks(days), expired_tombstones(days)):
+            for rows in _batches(expired, TASK_FIELDS, batch_size):
+                ids = [row[0] for row in rows]
+                logs = list(logTask.objects.filter(task_id__in=ids).order_by('pk').values_list(*LOG_FIELDS.values()))
+                tasks_archive.write(rows, list(TASK_FIELDS))
+                logs_archive.write(logs, list(LOG_FIELDS))
+                with transaction.atomic():
+                    logTask.objects.filter(task_id__in=ids).delete()
+                    expired.filter(pk__in=ids).delete()
+                purged_tasks += len(ids)
+                purged_logs += len(logs)
+                time.sleep(pause)
+    finally:
+        tasks_archive.close()
+        logs_archive.close()
+    return purged_tasks, purged_logs
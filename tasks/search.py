@@ -0,0 +1,125 @@
+# búsqueda de texto completo sobre título y descripción de las tareas
+#
+# en sqlite se usa una tabla virtual FTS5 de contenido externo (tasks_task_fts)
+# sincronizada con tasks_task mediante triggers, así también la mantienen
+# bulk_create, update() y los borrados físicos, que no emiten señales.
+# En otros motores se cae a un icontains sobre título y descripción.
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+FTS_TABLE = 'tasks_task_fts'
+
+FTS_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='tasks_task', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, coalesce(new.description, ''));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, coalesce(old.description, ''));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, coalesce(old.description, ''));
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, coalesce(new.description, ''));
+    END
+    """,
+]
+
+DROP_SCHEMA = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+# pesos de bm25 por columna: una coincidencia en el título vale más que en la descripción
+RANK = f'bm25({FTS_TABLE}, 10.0, 1.0)'
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def is_supported(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def install(using=connection):
+    """Crea (si no existen) la tabla FTS5 y sus triggers
+
+    las migraciones que reconstruyan tasks_task en sqlite eliminan los triggers;
+    después de ellas hay que volver a llamar a install() y reconstruir el índice
+    """
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        for statement in FTS_SCHEMA:
+            cursor.execute(statement)
+
+
+def uninstall(using=connection):
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        for statement in DROP_SCHEMA:
+            cursor.execute(statement)
+
+
+def rebuild(using=connection):
+    """Regenera el índice completo a partir de tasks_task"""
+    with using.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+def match_expression(text):
+    """Convierte el texto del usuario en una consulta FTS5 segura
+
+    cada palabra se cita (sin operadores del usuario) y se busca por prefijo;
+    todas las palabras deben aparecer
+    """
+    tokens = _TOKEN.findall(text)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def is_ranked(queryset):
+    """Si `queryset` viene de search() con FTS5 y por lo tanto está ordenado por relevancia"""
+    return 'search_rank' in queryset.query.extra_select
+
+
+def search(queryset, text):
+    """Filtra `queryset` por las tareas que coinciden con `text`, ordenadas por relevancia"""
+    expression = match_expression(text)
+    if not expression:
+        return queryset.none()
+
+    if not is_supported(connection):
+        words = _TOKEN.findall(text)
+        condition = Q()
+        for word in words:
+            condition &= Q(title__icontains=word) | Q(description__icontains=word)
+        return queryset.filter(condition)
+
+    # join con la tabla FTS: sqlite resuelve primero el MATCH y luego busca cada
+    # tarea por su clave primaria, aplicando encima los filtros de pertenencia
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = tasks_task.id', f'{FTS_TABLE} MATCH %s'],
+        params=[expression],
+        select={'search_rank': RANK},
+    ).order_by('search_rank', '-created_at', '-id')
@@ -1,6 +1,31 @@
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from .models import Task, Status, Category, logTask
+from .models import Task, Status, Category, logTask, DeletedTask
 from users.serializers import UserDetailSerializer
+from .lookups import statuses, categories
+from .fieldsets import SparseFieldsMixin
+
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField que valida contra una LookupTable en vez de consultar la base"""
+
+    def __init__(self, lookup, **kwargs):
+        self.lookup = lookup
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        instance = self.lookup.get(pk)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
 
 class StatusSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,43 +37,212 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = '__all__'
 
-class TaskSerializer(serializers.ModelSerializer):
-    user = UserDetailSerializer(read_only=True)
-    status = StatusSerializer(read_only=True)
-    category = CategorySerializer(read_only=True)
+class TaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # ids por defecto; ?expand=user,status,category anida los objetos (ver tasks/fieldsets.py)
+    user = serializers.PrimaryKeyRelatedField(read_only=True)
+    status = serializers.PrimaryKeyRelatedField(read_only=True)
+    category = serializers.PrimaryKeyRelatedField(read_only=True)
+    expandable_fields = {'user': UserDetailSerializer, 'status': StatusSerializer, 'category': CategorySerializer}
 
-    status_id = serializers.PrimaryKeyRelatedField(queryset=Status.objects.all(), source='status', write_only=True, required=False)
-    category_id = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), source='category', write_only=True)
+    status_id = CachedPrimaryKeyRelatedField(statuses, queryset=Status.objects.all(), source='status', write_only=True, required=False)
+    category_id = CachedPrimaryKeyRelatedField(categories, queryset=Category.objects.all(), source='category', write_only=True)
 
     class Meta:
         model = Task
-        fields = ['id', 'title', 'description', 'user', 'status', 'category', 'is_deleted', 'created_at', 'status_id', 'category_id']
-        read_only_fields = ['id', 'is_deleted', 'created_at']
+        fields = ['id', 'title', 'description', 'user', 'status', 'category', 'is_deleted', 'created_at', 'updated_at', 'status_id', 'category_id']
+        read_only_fields = ['id', 'is_deleted', 'created_at', 'updated_at']
 
     def create(self, validated_data):
         """fuerza el estado de la tarea a 'Pendiente' en la creación
-         y valida que el usuario no tenga otra tarea con el mismo título.
+         y valida que el usuario no tenga otra tarea con el mismo título
+         (lo garantiza la restricción única (user, title) de la base).
         """
         validated_data.pop('status', None)
 
         # intentar encontrar el estado existente llamado 'pendiente' (insensible a mayúsculas)
-        pending = Status.objects.filter(name__iexact='pendiente').first()
+        pending = statuses.get_by_name('pendiente')
         if not pending:
             # devolver un error si no existe el estado pendiente
             raise serializers.ValidationError("El estado 'Pendiente' no existe. Por favor, creelo primero.")
 
         validated_data['status'] = pending
+        return self._save_unique_title(super().create, validated_data)
 
-        #validar que el usuario no tenga una tarea con el mismo titulo
-        user = self.context['request'].user
-        if Task.objects.filter(user=user, title=validated_data['title']).exists():
-            raise serializers.ValidationError("Ya existe una tarea con el mismo título para este usuario.")
-        return super().create(validated_data)
+    def update(self, instance, validated_data):
+        return self._save_unique_title(super().update, instance, validated_data)
+
+    def _save_unique_title(self, save, *args):
+        # la restricción única reemplaza al exists() previo y no tiene carreras entre peticiones
+        try:
+            with transaction.atomic():
+                return save(*args)
+        except IntegrityError as exc:
+            if is_duplicate_title_error(exc):
+                raise serializers.ValidationError(DUPLICATE_TITLE_MESSAGE)
+            raise
 
-class LogTaskSerializer(serializers.ModelSerializer):
-    task = TaskSerializer(read_only=True)
+class DeletedTaskSerializer(serializers.ModelSerializer):
+    user = serializers.PrimaryKeyRelatedField(read_only=True)
+    status = serializers.PrimaryKeyRelatedField(read_only=True)
+    category = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = DeletedTask
+        fields = ['id', 'title', 'description', 'user', 'status', 'category', 'created_at', 'updated_at', 'deleted_at']
+        read_only_fields = fields
+
+class LogTaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # id de la tarea por defecto; ?expand=task (o task.user, ...) la anida
+    task = serializers.PrimaryKeyRelatedField(read_only=True)
+    expandable_fields = {'task': TaskSerializer}
 
     class Meta:
         model = logTask
         fields = ['id', 'task', 'action', 'timestamp']
         read_only_fields = ['id', 'timestamp']
+
+
+class TaskBulkCreateItemSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    category_id = serializers.IntegerField()
+
+
+class TaskBulkUpdateItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField(max_length=255, required=False)
+    description = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    status_id = serializers.IntegerField(required=False)
+    category_id = serializers.IntegerField(required=False)
+
+
+DUPLICATE_TITLE_MESSAGE = "Ya existe una tarea con el mismo título para este usuario."
+
+
+def is_duplicate_title_error(exc):
+    # sqlite informa las columnas, otros motores el nombre de la restricción
+    message = str(exc)
+    return 'task_unique_user_title' in message or 'tasks_task.title' in message
+
+
+MISSING_CATALOG_MESSAGE = "El estado o la categoría ya no existe."
+
+
+def is_foreign_key_error(exc):
+    return 'foreign key constraint' in str(exc).lower()
+
+
+@contextmanager
+def catalog_integrity():
+    """Convierte en error de validación una FK a un estado o categoría borrado en otro proceso
+
+    la copia en memoria de tasks/lookups.py puede conservarlo hasta LOOKUP_CACHE_TTL;
+    debe envolver la transacción más externa, porque la FK se verifica al hacer commit
+    """
+    try:
+        yield
+    except IntegrityError as exc:
+        if not is_foreign_key_error(exc):
+            raise
+        statuses.invalidate()
+        categories.invalidate()
+        raise serializers.ValidationError(MISSING_CATALOG_MESSAGE)
+
+
+def _missing_ids(lookup, ids):
+    # devuelve los ids que no existen en el catálogo, resuelto desde memoria
+    return lookup.missing(ids)
+
+
+class TaskBulkCreateSerializer(serializers.Serializer):
+    """valida un lote de tareas nuevas con consultas por conjunto:
+     - categorías y estado 'pendiente' desde la cache de catálogos
+     - títulos duplicados dentro del lote; contra las tareas del usuario los rechaza la base
+    """
+    MAX_ITEMS = 500
+
+    tasks = TaskBulkCreateItemSerializer(many=True, allow_empty=False, max_length=MAX_ITEMS)
+
+    def validate(self, attrs):
+        items = attrs['tasks']
+
+        missing = _missing_ids(categories, [item['category_id'] for item in items])
+        if missing:
+            raise serializers.ValidationError({'category_id': f'Categorías inexistentes: {sorted(missing)}'})
+
+        pending = statuses.get_by_name('pendiente')
+        if not pending:
+            raise serializers.ValidationError("El estado 'Pendiente' no existe. Por favor, creelo primero.")
+        attrs['status'] = pending
+
+        # los títulos ya usados por el usuario los rechaza la restricción única al insertar
+        titles = [item['title'] for item in items]
+        if len(set(titles)) != len(titles):
+            raise serializers.ValidationError(DUPLICATE_TITLE_MESSAGE)
+        return attrs
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        status = validated_data['status']
+        try:
+            with transaction.atomic():
+                return Task.objects.bulk_create([
+                    Task(
+                        title=item['title'],
+                        description=item.get('description'),
+                        category_id=item['category_id'],
+                        status=status,
+                        user_id=user.pk,
+                    )
+                    for item in validated_data['tasks']
+                ])
+        except IntegrityError as exc:
+            if is_duplicate_title_error(exc):
+                raise serializers.ValidationError(DUPLICATE_TITLE_MESSAGE)
+            raise
+
+
+class TaskBulkUpdateSerializer(serializers.Serializer):
+    """valida un lote de cambios parciales; la pertenencia de las tareas la resuelve el ViewSet"""
+    MAX_ITEMS = 500
+
+    tasks = TaskBulkUpdateItemSerializer(many=True, allow_empty=False, max_length=MAX_ITEMS)
+
+    def validate(self, attrs):
+        items = attrs['tasks']
+
+        ids = [item['id'] for item in items]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError({'id': 'Cada tarea solo puede aparecer una vez en el lote.'})
+
+        missing = _missing_ids(statuses, [item['status_id'] for item in items if 'status_id' in item])
+        if missing:
+            raise serializers.ValidationError({'status_id': f'Estados inexistentes: {sorted(missing)}'})
+
+        missing = _missing_ids(categories, [item['category_id'] for item in items if 'category_id' in item])
+        if missing:
+            raise serializers.ValidationError({'category_id': f'Categorías inexistentes: {sorted(missing)}'})
+        return attrs
+
+
+class TaskBulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=500)
+
+
+# respuesta de /api/tasks/changes/ (solo para documentar el esquema)
+class TaskChangesSerializer(serializers.Serializer):
+    results = TaskSerializer(many=True)
+    cursor = serializers.CharField()
+    has_more = serializers.BooleanField()
+
+
+# respuesta de /api/tasks/stats/ (solo para documentar el esquema)
+class TaskStatsItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField(allow_null=True)
+    name = serializers.CharField(allow_null=True)
+    count = serializers.IntegerField()
+
+class TaskStatsSerializer(serializers.Serializer):
+    total = serializers.IntegerField()
+    by_status = TaskStatsItemSerializer(many=True)
+    by_category = TaskStatsItemSerializer(many=True)
@@ -1,7 +1,9 @@
 # al crear o actualizar una tarea, crear un log de la acción
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Task, logTask
+from .models import Task, Status, Category
+from users.models import User
+from . import audit, cache, stats
 
 @receiver(post_save, sender=Task)
 def create_log_on_save(sender, instance, created, **kwargs):
@@ -9,7 +11,40 @@ def create_log_on_save(sender, instance, created, **kwargs):
     if not created and getattr(instance, 'is_deleted', False):
         return
 
-    action = 'CREATED' if created else 'UPDATED'
-    logTask.objects.create(task=instance, action=action)
+    # restore() reinserta con el mismo id una tarea que ya tiene su log CREATED
+    action = 'CREATED' if created and not getattr(instance, '_restored', False) else 'UPDATED'
+    audit.record(instance, action)
 
 
+# mover la tarea entre los contadores de /api/tasks/stats/ (alta, edición y borrado lógico)
+@receiver(post_save, sender=Task)
+def update_stats_on_save(sender, instance, created, **kwargs):
+    stats.track([instance], created=created)
+
+
+@receiver(post_delete, sender=Task)
+def update_stats_on_delete(sender, instance, **kwargs):
+    stats.forget([instance])
+
+
+# cualquier escritura de una tarea (incluido el borrado lógico) invalida las listas cacheadas
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_lists(sender, instance, **kwargs):
+    cache.invalidate_users([instance.user_id])
+
+
+# los nombres de estados y categorías van embebidos en las listas cacheadas
+@receiver(post_save, sender=Status)
+@receiver(post_delete, sender=Status)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_task_lists_on_catalog_change(sender, **kwargs):
+    cache.invalidate_catalogs()
+
+
+# el email y nombre del dueño también van embebidos en cada tarea
+@receiver(post_save, sender=User)
+def invalidate_task_lists_on_user_change(sender, instance, created, **kwargs):
+    if not created:
+        cache.invalidate_users([instance.pk])
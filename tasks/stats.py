@@ -0,0 +1,132 @@
+# contadores de tareas por (usuario, estado, categoría, borrada)
+#
+# /api/tasks/stats/ lee TaskCounter en vez de recorrer Task. Los contadores se
+# actualizan en la misma transacción que la escritura, desde los mismos puntos
+# que alimentan logTask:
+#  - señales post_save/post_delete de Task (alta, edición, borrado lógico y físico)
+#  - los endpoints en lote, que no emiten señales, llaman a track() directamente
+# cada tarea recuerda el grupo con el que se cargó (Task._stats_bucket) y al
+# escribir se resta uno de ese grupo y se suma uno al nuevo.
+# Si algo escribe tareas por fuera de estos caminos (update() a mano, SQL), el
+# comando reconcile_task_stats recalcula todo y reporta las diferencias.
+
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import Task, TaskCounter
+
+
+def bucket_filter(bucket):
+    user_id, status_id, category_id, is_deleted = bucket
+    return {'user_id': user_id, 'status_id': status_id, 'category_id': category_id, 'is_deleted': is_deleted}
+
+
+def apply(deltas):
+    """Suma cada delta a su contador; crea los que faltan (solo con delta positivo)"""
+    # orden fijo: dos transacciones que tocan los mismos grupos no se bloquean mutuamente
+    for bucket, delta in sorted(deltas.items(), key=lambda item: tuple(str(part) for part in item[0])):
+        if not delta:
+            continue
+        filters = bucket_filter(bucket)
+        updated = TaskCounter.objects.filter(**filters).update(count=F('count') + delta)
+        if updated or delta < 0:
+            # un grupo que no existe con delta negativo es una diferencia que corrige reconcile
+            continue
+        try:
+            with transaction.atomic():
+                TaskCounter.objects.create(count=delta, **filters)
+        except IntegrityError:
+            # otra escritura lo creó entre el UPDATE y el INSERT
+            TaskCounter.objects.filter(**filters).update(count=F('count') + delta)
+
+
+def track(tasks, created=False):
+    """Mueve cada tarea del grupo con que se cargó al grupo actual
+
+    llamar después de guardar; con created=True solo se suma al grupo nuevo
+    """
+    deltas = Counter()
+    for task in tasks:
+        old = None if created else task._stats_bucket
+        new = task._get_stats_bucket()
+        if old != new:
+            if old is not None:
+                deltas[old] -= 1
+            if new is not None:
+                deltas[new] += 1
+        task._stats_bucket = new
+    apply(deltas)
+
+
+def forget(tasks):
+    """Resta las tareas borradas físicamente de su grupo"""
+    deltas = Counter(task._stats_bucket for task in tasks if task._stats_bucket is not None)
+    apply({bucket: -count for bucket, count in deltas.items()})
+
+
+def summarize(counters):
+    """Totales por estado y por categoría a partir de un queryset de TaskCounter"""
+    from .lookups import categories, statuses
+
+    rows = counters.filter(count__gt=0).values('status_id', 'category_id').annotate(total=Sum('count'))
+    by_status, by_category = Counter(), Counter()
+    for row in rows:
+        by_status[row['status_id']] += row['total']
+        by_category[row['category_id']] += row['total']
+
+    def named(lookup, totals):
+        items = []
+        for pk, count in sorted(totals.items(), key=lambda item: (item[0] is None, item[0] or 0)):
+            row = lookup.get(pk)
+            items.append({'id': pk, 'name': row.name if row else None, 'count': count})
+        return items
+
+    return {
+        'total': sum(by_status.values()),
+        'by_status': named(statuses, by_status),
+        'by_category': named(categories, by_category),
+    }
+
+
+def compute():
+    """Contadores reales, recalculados recorriendo Task"""
+    rows = (
+        Task._base_manager.order_by()
+        .values('user_id', 'status_id', 'category_id', 'is_deleted')
+        .annotate(total=Count('pk'))
+    )
+    return {
+        (row['user_id'], row['status_id'], row['category_id'], row['is_deleted']): row['total']
+        for row in rows
+    }
+
+
+def stored():
+    return {
+        tuple(row[:4]): row[4]
+        for row in TaskCounter.objects.values_list('user_id', 'status_id', 'category_id', 'is_deleted', 'count')
+    }
+
+
+def drift():
+    """Grupos cuyo contador no coincide con Task: {grupo: (guardado, real)}"""
+    actual, current = compute(), stored()
+    return {
+        bucket: (current.get(bucket, 0), actual.get(bucket, 0))
+        for bucket in actual.keys() | current.keys()
+        if current.get(bucket, 0) != actual.get(bucket, 0)
+    }
+
+
+def rebuild():
+    """Reemplaza todos los contadores por los valores reales; devuelve la cantidad de grupos"""
+    with transaction.atomic():
+        actual = compute()
+        TaskCounter.objects.all().delete()
+        TaskCounter.objects.bulk_create(
+            [TaskCounter(count=count, **bucket_filter(bucket)) for bucket, count in actual.items()],
+            batch_size=500,
+        )
+    return len(actual)
@@ -0,0 +1,72 @@
+# tareas borradas fuera de la tabla Task (DeletedTask)
+#
+# el borrado lógico deja la fila en tasks_task con is_deleted=True, mezclada con
+# las vivas. Con TASK_RETENTION['TOMBSTONE_DAYS'], apply_retention mueve las
+# borradas hace más de esos días a DeletedTask, de a lotes cortos como el resto
+# de la retención:
+#  - la fila conserva el id y las columnas, y sus logs siguen apuntando a ese id
+#  - el borrado en Task pasa por las señales: contadores de stats, índice FTS
+#    (trigger) y cache de listas quedan al día
+#  - restore() la devuelve a Task con el mismo id, esté todavía en Task o ya en
+#    DeletedTask; en los dos casos el log es UPDATED (la tarea ya tiene su CREATED)
+# pasados DELETED_TASK_DAYS, retention archiva y elimina los tombstones con sus logs.
+
+import time
+
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import DeletedTask, Task
+from .retention import cutoff
+from .serializers import DUPLICATE_TITLE_MESSAGE, is_duplicate_title_error
+
+
+def movable_tasks(days):
+    return Task.all_objects.deleted().filter(updated_at__lt=cutoff(days))
+
+
+def move_deleted_tasks(days, batch_size, pause=0):
+    """Mueve a DeletedTask las tareas borradas hace más de `days` días; devuelve la cantidad"""
+    moved = 0
+    while True:
+        # leer y mover en la misma transacción: una restauración concurrente espera o gana
+        with transaction.atomic():
+            tasks = list(movable_tasks(days).order_by('pk')[:batch_size])
+            if not tasks:
+                return moved
+            DeletedTask.objects.bulk_create([DeletedTask.from_task(task) for task in tasks])
+            Task.all_objects.filter(pk__in=[task.pk for task in tasks], is_deleted=True).delete()
+        moved += len(tasks)
+        time.sleep(pause)
+
+
+def restore(pk):
+    """Devuelve a Task la tarea borrada `pk` (en Task o en DeletedTask); None si no existe
+
+    si el dueño ya tiene una tarea viva con el mismo título responde 400
+    """
+    try:
+        with transaction.atomic():
+            task = Task.all_objects.filter(pk=pk).first()
+            if task is not None:
+                if task.is_deleted:
+                    task.is_deleted = False
+                    task.save()
+                return task
+
+            tombstone = DeletedTask.objects.filter(pk=pk).first()
+            if tombstone is None:
+                return None
+            task = tombstone.to_task()
+            # para el historial es una edición de la misma tarea, no un alta (ver signals.py)
+            task._restored = True
+            task.save(force_insert=True)
+            # auto_now_add pisa la fecha de creación: se recupera la original
+            Task.all_objects.filter(pk=task.pk).update(created_at=tombstone.created_at)
+            task.created_at = tombstone.created_at
+            tombstone.delete()
+            return task
+    except IntegrityError as exc:
+        if is_duplicate_title_error(exc):
+            raise ValidationError(DUPLICATE_TITLE_MESSAGE)
+        raise
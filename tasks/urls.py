@@ -1,13 +1,28 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
-from .views import TaskViewSet, StatusViewSet, CategoryViewSet, LogTaskViewSet
+from .views import TaskViewSet, StatusViewSet, CategoryViewSet, LogTaskViewSet, DeletedTaskViewSet
 
 router = DefaultRouter()
 router.register(r'tasks', TaskViewSet)
 router.register(r'status', StatusViewSet)
 router.register(r'categories', CategoryViewSet)
 router.register(r'logs', LogTaskViewSet)
+router.register(r'deleted-tasks', DeletedTaskViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
 ]
+
+# bajo ASGI la lista y el detalle de tareas leen con el ORM async (tasks/async_views.py)
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import task_list, task_detail, task_events, task_events_poll
+
+    urlpatterns = [
+        path('tasks/', task_list, name='task-list-async'),
+        # avisos de cambios (tasks/push.py): necesitan el event loop de ASGI
+        path('tasks/events/', task_events, name='task-events'),
+        path('tasks/events/poll/', task_events_poll, name='task-events-poll'),
+        # solo ids numéricos: tasks/stats/, tasks/changes/, etc. siguen yendo a las acciones del router
+        re_path(r'^tasks/(?P<pk>[0-9]+)/$', task_detail, name='task-detail-async'),
+    ] + urlpatterns
@@ -1,8 +1,29 @@
 from django.shortcuts import render
-from rest_framework import viewsets, permissions
-from .models import Task, Status, Category, logTask
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import viewsets, permissions, status as http_status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from .models import Task, Status, Category, logTask, TaskCounter, DeletedTask
 from users.models import User
-from .serializers import TaskSerializer, StatusSerializer, CategorySerializer, LogTaskSerializer
+from .serializers import (
+    TaskSerializer, StatusSerializer, CategorySerializer, LogTaskSerializer, DeletedTaskSerializer,
+    TaskBulkCreateSerializer, TaskBulkUpdateSerializer, TaskBulkDeleteSerializer, TaskStatsSerializer, TaskChangesSerializer,
+    DUPLICATE_TITLE_MESSAGE, is_duplicate_title_error, catalog_integrity,
+)
+from .pagination import TaskKeysetPagination
+from .conditional import ConditionalGetMixin
+from .cache import CachedListMixin
+from .export import export_response
+from .search import search
+from .fieldsets import optimize
+from .fastlist import FastListMixin
+from . import cache
+from . import audit
+from . import stats
+from . import changes
+from . import tombstones
 from users.permissions import IsAdmin, IsClient
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 
@@ -56,28 +77,85 @@ class CategoryViewSet(viewsets.ModelViewSet):
             type=OpenApiTypes.INT,
             location=OpenApiParameter.QUERY,
         ),
+        OpenApiParameter(
+            name='q',
+            description='Búsqueda de texto completo en título y descripción, ordenada por relevancia',
+            required=False,
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+        ),
+        OpenApiParameter(
+            name='fields',
+            description='Campos a devolver separados por coma (por defecto todos)',
+            required=False,
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+        ),
+        OpenApiParameter(
+            name='expand',
+            description='Relaciones a anidar como objetos: user, status, category (por defecto solo sus ids)',
+            required=False,
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+        ),
+        OpenApiParameter(
+            name='include_deleted',
+            description='Solo admin: con true la lista incluye las tareas borradas que siguen en Task',
+            required=False,
+            type=OpenApiTypes.BOOL,
+            location=OpenApiParameter.QUERY,
+        ),
     ],
 )
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ConditionalGetMixin, CachedListMixin, FastListMixin, viewsets.ModelViewSet):
     """ViewSet para manejar las tareas
      - los administradores pueden ver, crear, actualizar y eliminar todas las tareas
      - los clientes pueden ver, crear, actualizar y eliminar solo sus propias tareas
-     - la eliminación de una tarea es un "borrado lógico"
+     - la eliminación de una tarea es un "borrado lógico"; un admin la restaura con POST /tasks/<id>/restore/
+       y las ve en la lista con ?include_deleted=true
      - Filtrado por estado y categoría mediante query params: ?status=<status_id>&category=<category_id>
+     - Búsqueda por texto con ?q=<palabras> (índice FTS5, resultados por relevancia)
+     - Paginación por cursor opcional: ?page_size=<n> y luego ?cursor=<next>
+     - Operaciones en lote sobre /tasks/bulk/: POST crea, PATCH actualiza y DELETE borra (lógico) varias tareas
+     - GET condicionales: lista (ETag) y detalle (ETag/Last-Modified) responden 304 si no hubo cambios
+     - la lista serializada se cachea por usuario, filtros y página (ver tasks/cache.py)
+     - /tasks/changes/?since=<cursor> devuelve solo las tareas que cambiaron desde el cursor (ver tasks/changes.py)
+     - /tasks/stats/ devuelve la cantidad de tareas por estado y por categoría (desde TaskCounter)
+     - /tasks/export/ descarga en streaming todas las tareas visibles (?output=ndjson|csv)
+     - ?fields=id,title elige los campos y ?expand=user,status,category anida esas relaciones (por defecto, ids)
     """
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [IsClient | IsAdmin]
+    pagination_class = TaskKeysetPagination
 
-    def get_queryset(self):
+    SPARSE_ACTIONS = ('list', 'retrieve')
+    # el cursor de la paginación se arma con created_at
+    ALWAYS_LOADED = ('created_at',)
+
+    def get_base_queryset(self):
+        # tareas visibles para el usuario, sin filtros de query params
         user = self.request.user
 
-        # base inicial: todo, ordenado por fecha de creación descendente
-        queryset = Task.objects.all().order_by('-created_at')
+        if user.is_admin:
+            # la lista de un admin son las no borradas (índice parcial task_created_id_idx);
+            # con ?include_deleted=true suma las borradas que siguen en Task, sin índice para el orden
+            if self.action == 'list' and self.request.query_params.get('include_deleted') != 'true':
+                return Task.objects.all()
+            # el resto (detalle, lotes, exportación) ve todas, incluidas las borradas
+            return Task.all_objects.all()
+        # un cliente, solo las suyas no borradas (Task.objects ya excluye las borradas)
+        return Task.objects.filter(user_id=user.pk)
 
-        # si no es admin, mostrar solo las suyas que no estén borradas
-        if not user.is_admin:
-            queryset = queryset.filter(user=user, is_deleted=False)
+    def get_queryset(self):
+        # base inicial: todo, ordenado por fecha de creación descendente
+        queryset = self.get_base_queryset().order_by('-created_at')
+        if self.action in self.SPARSE_ACTIONS:
+            # lecturas: solo las columnas de ?fields= y los joins de ?expand= (ver tasks/fieldsets.py)
+            queryset = optimize(queryset, TaskSerializer, self.request, always=self.ALWAYS_LOADED)
+        else:
+            # escrituras: la tarea completa (señales, stats) y sus relaciones por si se expanden en la respuesta
+            queryset = queryset.select_related('user', 'status', 'category')
 
         # aplicar filtros opcionales
         status_id = self.request.query_params.get('status')
@@ -88,30 +166,256 @@ class TaskViewSet(viewsets.ModelViewSet):
         if category_id:
             queryset = queryset.filter(category_id=category_id)
 
+        text = self.request.query_params.get('q')
+        if text:
+            queryset = search(queryset, text)
+
         return queryset
 
     def perform_create(self, serializer):
         # todas las tareas creadas se asignan al usuario autenticado y estado pendiente
-        serializer.save(user=self.request.user)
+        with catalog_integrity():
+            serializer.save(user=self.request.user)
+
+    def perform_update(self, serializer):
+        # la fila, los contadores de stats (señal) y el log se escriben juntos o no se escribe nada
+        with catalog_integrity(), transaction.atomic():
+            serializer.save()
 
     def perform_destroy(self, instance):
-        # realizar un "borrado lógico"
-        instance.is_deleted = True
-        instance.save()
-        # crear un log de la acción de borrado
-        logTask.objects.create(task=instance, action='DELETED')
+        with transaction.atomic():
+            # realizar un "borrado lógico"
+            instance.is_deleted = True
+            # save() dispara las señales que invalidan la cache de listas del dueño y mueven los contadores
+            instance.save()
+            # crear un log de la acción de borrado
+            audit.record(instance, 'DELETED')
+
+    def get_bulk_response(self, ids, status_code):
+        # una sola consulta para devolver las tareas afectadas ya serializadas
+        queryset = optimize(Task.all_objects.filter(pk__in=ids), TaskSerializer, self.request)
+        serializer = TaskSerializer(queryset.order_by('-created_at', '-id'), many=True, context=self.get_serializer_context())
+        return Response(serializer.data, status=status_code)
+
+    def get_owned_tasks(self, ids):
+        # mismas reglas de pertenencia que los endpoints individuales: lo que no se ve es 404
+        tasks = self.get_base_queryset().in_bulk(ids)
+        missing = set(ids) - set(tasks)
+        if missing:
+            raise NotFound(f'Tareas no encontradas: {sorted(missing)}')
+        return tasks
+
+    EXPORT_FIELDS = {
+        'id': 'id',
+        'title': 'title',
+        'description': 'description',
+        'user_id': 'user_id',
+        'user_email': 'user__email',
+        'status': 'status__name',
+        'category': 'category__name',
+        'is_deleted': 'is_deleted',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+
+    @extend_schema(
+        parameters=[OpenApiParameter(name='output', description='Formato: ndjson (por defecto) o csv', required=False, type=OpenApiTypes.STR)],
+        responses={(200, 'application/x-ndjson'): OpenApiTypes.STR, (200, 'text/csv'): OpenApiTypes.STR},
+    )
+    @action(detail=False, methods=['get'], url_path='export', pagination_class=None)
+    def export(self, request):
+        # mismas reglas de visibilidad y filtros que la lista, sin cargar todo en memoria
+        return export_response(request, self.get_queryset(), self.EXPORT_FIELDS, 'tasks')
+
+    @extend_schema(
+        parameters=[OpenApiParameter(name='user', description='Solo admin: limitar a las tareas de ese usuario', required=False, type=OpenApiTypes.INT)],
+        responses={200: TaskStatsSerializer},
+    )
+    @action(detail=False, methods=['get'], url_path='stats', pagination_class=None)
+    def statistics(self, request):
+        # se lee TaskCounter (una fila por grupo), nunca Task
+        counters = TaskCounter.objects.filter(is_deleted=False)
+        if not request.user.is_admin:
+            counters = counters.filter(user_id=request.user.pk)
+        else:
+            user_id = request.query_params.get('user')
+            if user_id:
+                if not user_id.isdigit():
+                    raise ValidationError({'user': 'Debe ser un id numérico.'})
+                counters = counters.filter(user_id=user_id)
+        return Response(stats.summarize(counters))
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='since', description='Cursor devuelto por la llamada anterior (vacío: desde el principio)', required=False, type=OpenApiTypes.STR),
+            OpenApiParameter(name='limit', description=f'Máximo de eventos a leer (por defecto {changes.DEFAULT_LIMIT}, hasta {changes.MAX_LIMIT})', required=False, type=OpenApiTypes.INT),
+        ],
+        responses={200: TaskChangesSerializer},
+    )
+    @action(detail=False, methods=['get'], url_path='changes', pagination_class=None)
+    def change_feed(self, request):
+        since, issued_at = changes.decode_cursor(request.query_params.get('since'))
+        changes.check_retention(issued_at)
+        limit = request.query_params.get('limit', str(changes.DEFAULT_LIMIT))
+        if not limit.isdigit() or int(limit) == 0:
+            raise ValidationError({'limit': 'Debe ser un entero positivo.'})
 
+        task_ids, last_log, has_more = changes.read_changes(
+            changes.visible_logs(request.user), since, min(int(limit), changes.MAX_LIMIT),
+        )
+        results = []
+        if task_ids:
+            # estado actual de cada tarea, incluidas las borradas; la pertenencia ya la filtraron los logs
+            tasks = optimize(Task.all_objects.all(), TaskSerializer, request).in_bulk(task_ids)
+            missing = [pk for pk in task_ids if pk not in tasks]
+            if missing:
+                # las que ya se movieron a DeletedTask salen igual, con is_deleted=true
+                tasks.update(DeletedTask.objects.select_related('user', 'status', 'category').in_bulk(missing))
+            ordered = [tasks[pk] for pk in task_ids if pk in tasks]
+            results = TaskSerializer(ordered, many=True, context=self.get_serializer_context()).data
+        return Response({'results': results, 'cursor': changes.encode_cursor(last_log), 'has_more': has_more})
 
-@extend_schema(tags=['LogTask'])
-class LogTaskViewSet(viewsets.ReadOnlyModelViewSet):
+    @extend_schema(request=None, responses={200: TaskSerializer})
+    @action(detail=True, methods=['post'], url_path='restore', permission_classes=[IsAdmin])
+    def restore(self, request, pk=None):
+        # la tarea puede seguir en Task (borrado lógico) o estar ya en DeletedTask
+        if not pk.isdigit():
+            raise NotFound()
+        task = tombstones.restore(int(pk))
+        if task is None:
+            raise NotFound()
+        task = optimize(Task.objects.filter(pk=task.pk), TaskSerializer, request).get()
+        return Response(TaskSerializer(task, context=self.get_serializer_context()).data)
+
+    @extend_schema(request=TaskBulkCreateSerializer, responses={201: TaskSerializer(many=True)})
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        serializer = TaskBulkCreateSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+
+        with catalog_integrity(), transaction.atomic():
+            created = serializer.save()
+            audit.record_many(created, 'CREATED')
+            stats.track(created, created=True)
+            cache.invalidate_users({task.user_id for task in created})
+
+        return self.get_bulk_response([task.pk for task in created], http_status.HTTP_201_CREATED)
+
+    @extend_schema(request=TaskBulkUpdateSerializer, responses={200: TaskSerializer(many=True)})
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        serializer = TaskBulkUpdateSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['tasks']
+
+        with catalog_integrity(), transaction.atomic():
+            tasks = self.get_owned_tasks([item['id'] for item in items])
+
+            fields = set()
+            for item in items:
+                task = tasks[item['id']]
+                for field in ('title', 'description', 'status_id', 'category_id'):
+                    if field in item:
+                        setattr(task, field, item[field])
+                        fields.add(field)
+
+            if fields:
+                now = timezone.now()
+                for task in tasks.values():
+                    task.updated_at = now
+                try:
+                    with transaction.atomic():
+                        Task.all_objects.bulk_update(tasks.values(), sorted(fields | {'updated_at'}))
+                except IntegrityError as exc:
+                    if is_duplicate_title_error(exc):
+                        raise ValidationError(DUPLICATE_TITLE_MESSAGE)
+                    raise
+                # como la señal del camino individual: editar una tarea borrada no deja log
+                audit.record_many([task for task in tasks.values() if not task.is_deleted], 'UPDATED')
+                stats.track(tasks.values())
+                cache.invalidate_users({task.user_id for task in tasks.values()})
+
+        return self.get_bulk_response(list(tasks), http_status.HTTP_200_OK)
+
+    @extend_schema(request=TaskBulkDeleteSerializer, responses={204: None})
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request):
+        serializer = TaskBulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            tasks = self.get_owned_tasks(serializer.validated_data['ids'])
+            # realizar un "borrado lógico" de todo el lote con un solo UPDATE
+            Task.all_objects.filter(pk__in=list(tasks)).update(is_deleted=True, updated_at=timezone.now())
+            for task in tasks.values():
+                task.is_deleted = True
+            audit.record_many(tasks.values(), 'DELETED')
+            stats.track(tasks.values())
+            cache.invalidate_users({task.user_id for task in tasks.values()})
+
+        return Response(status=http_status.HTTP_204_NO_CONTENT)
+
+
+@extend_schema(
+    tags=['LogTask'],
+    parameters=[
+        OpenApiParameter(
+            name='fields',
+            description='Campos a devolver separados por coma; task.<campo> elige los de la tarea',
+            required=False,
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+        ),
+        OpenApiParameter(
+            name='expand',
+            description='Relaciones a anidar: task, task.user, task.status, task.category (por defecto el id de la tarea)',
+            required=False,
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+        ),
+    ],
+)
+class LogTaskViewSet(FastListMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet para manejar los logs de las tareas
      - solo los administradores pueden ver los logs
+     - ?fields= y ?expand= igual que en las tareas (por defecto la tarea es su id)
+     - /logs/export/ descarga en streaming todos los logs (?output=ndjson|csv)
     """
     queryset = logTask.objects.all()
     serializer_class = LogTaskSerializer
     permission_classes = [IsAdmin]
 
     def get_queryset(self):
-        return logTask.objects.all().order_by('-timestamp')
+        queryset = logTask.objects.order_by('-timestamp')
+        if self.action in ('list', 'retrieve'):
+            queryset = optimize(queryset, LogTaskSerializer, self.request)
+        return queryset
     
 
+    EXPORT_FIELDS = {
+        'id': 'id',
+        'task_id': 'task_id',
+        'task_title': 'task__title',
+        'user_id': 'task__user_id',
+        'action': 'action',
+        'timestamp': 'timestamp',
+    }
+
+    @extend_schema(
+        parameters=[OpenApiParameter(name='output', description='Formato: ndjson (por defecto) o csv', required=False, type=OpenApiTypes.STR)],
+        responses={(200, 'application/x-ndjson'): OpenApiTypes.STR, (200, 'text/csv'): OpenApiTypes.STR},
+    )
+    @action(detail=False, methods=['get'], url_path='export', pagination_class=None)
+    def export(self, request):
+        return export_response(request, self.get_queryset(), self.EXPORT_FIELDS, 'logs')
+
+
+@extend_schema(tags=['Task'])
+class DeletedTaskViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet para consultar las tareas movidas a DeletedTask (ver tasks/tombstones.py)
+     - solo los administradores pueden verlas
+     - se restauran con POST /tasks/<id>/restore/
+    """
+    queryset = DeletedTask.objects.all()
+    serializer_class = DeletedTaskSerializer
+    permission_classes = [IsAdmin]
@@ -0,0 +1,22 @@
+# /api/users/me/ por el camino async (ver core/asyncviews.py)
+
+from core.asyncviews import hybrid_view, init_view, json_response
+from core.lookups import aload_all
+from .models import User
+from .serializers import UserDetailSerializer
+from .views import MeView
+
+
+async def get_me(request):
+    view = await init_view(MeView, request)
+    if view is None:
+        return None
+    try:
+        user = await User.objects.aget(pk=view.request.user.pk)
+    except User.DoesNotExist:
+        return None
+    await aload_all()
+    return json_response(UserDetailSerializer(user).data)
+
+
+me = hybrid_view(MeView.as_view(), get_me)
@@ -0,0 +1,162 @@
+# autenticación JWT sin consulta por petición
+#
+# los tokens emitidos con users/tokens.RoleRefreshToken llevan id, rol, estado y
+# versión de credenciales; ClaimsJWTAuthentication construye el usuario a partir
+# de esos claims y solo carga la fila de User si la vista la necesita. La
+# revocación se valida contra (token_version, is_active) guardados en un LRU en
+# memoria que se refresca cada STATE_TTL segundos.
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+DEFAULTS = {
+    'STATE_TTL': 30,
+    'STATE_CACHE_SIZE': 10000,
+}
+
+
+def _options():
+    return {**DEFAULTS, **getattr(settings, 'JWT_CLAIMS_AUTH', {})}
+
+
+class UserStateCache:
+    """LRU con expiración de (token_version, is_active) por id de usuario"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        state = self._cached(user_id)
+        if state is not None:
+            return state[0]
+        return self._store(user_id, self._query(user_id).first())
+
+    async def aget(self, user_id):
+        state = self._cached(user_id)
+        if state is not None:
+            return state[0]
+        return self._store(user_id, await self._query(user_id).afirst())
+
+    def _cached(self, user_id):
+        # (estado,) si hay una entrada vigente; la tupla distingue "no cacheado" de un usuario inexistente
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and time.monotonic() - entry[0] <= _options()['STATE_TTL']:
+                self._entries.move_to_end(user_id)
+                return (entry[1],)
+        return None
+
+    def _query(self, user_id):
+        return get_user_model().objects.filter(pk=user_id).values_list('token_version', 'is_active')
+
+    def _store(self, user_id, state):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), state)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > _options()['STATE_CACHE_SIZE']:
+                self._entries.popitem(last=False)
+        return state
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+user_states = UserStateCache()
+
+
+class ClaimsUser(SimpleLazyObject):
+    """Usuario autenticado a partir de los claims del token
+
+    id, pk, role_name, is_admin, is_client e is_active se responden sin consultar la
+    base; cualquier otro atributo carga la fila de User la primera vez que se usa.
+    Para filtrar consultas conviene usar `user_id=user.pk` en vez de `user=user`,
+    que obliga a cargar el modelo.
+    """
+
+    def __init__(self, user_id, role_name, is_active):
+        super().__init__(lambda: get_user_model().objects.get(pk=user_id))
+        self.__dict__.update(
+            id=user_id,
+            pk=user_id,
+            role_name=role_name,
+            is_active=is_active,
+            is_authenticated=True,
+            is_anonymous=False,
+        )
+
+    def __bool__(self):
+        # los permisos evalúan `request.user` como booleano; no debe cargar la fila
+        return True
+
+    @property
+    def is_admin(self):
+        return self.role_name == 'admin'
+
+    @property
+    def is_client(self):
+        return self.role_name == 'client'
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication que autoriza con los claims del token en vez de cargar el usuario
+
+    los tokens sin claim de rol (emitidos antes de este cambio) se resuelven como siempre
+    """
+
+    def get_user(self, validated_token):
+        if not self.has_claims(validated_token):
+            return super().get_user(validated_token)
+        user_id = self.get_user_id(validated_token)
+        return self.build_user(validated_token, user_states.get(user_id))
+
+    async def aauthenticate(self, request):
+        """Versión async de authenticate() para las vistas async (core/asyncviews.py)
+
+        devuelve None si no hay token o si el token no trae claims de rol; en ese
+        caso la vista usa el camino sync habitual
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if not self.has_claims(validated_token):
+            return None
+        user_id = self.get_user_id(validated_token)
+        return self.build_user(validated_token, await user_states.aget(user_id)), validated_token
+
+    def has_claims(self, validated_token):
+        # los tokens sin claim de rol (emitidos antes de este cambio) se resuelven como siempre
+        return 'role' in validated_token and 'ver' in validated_token
+
+    def get_user_id(self, validated_token):
+        # simplejwt serializa el id como texto en el token
+        return get_user_model()._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+
+    def build_user(self, validated_token, state):
+        if not validated_token.get('active', False):
+            raise AuthenticationFailed('El usuario está inactivo.', code='user_inactive')
+        if state is None:
+            raise AuthenticationFailed('Usuario no encontrado.', code='user_not_found')
+        token_version, is_active = state
+        if not is_active:
+            raise AuthenticationFailed('El usuario está inactivo.', code='user_inactive')
+        if token_version != validated_token['ver']:
+            raise AuthenticationFailed('El token fue revocado.', code='token_revoked')
+
+        return ClaimsUser(self.get_user_id(validated_token), validated_token['role'], is_active)
@@ -0,0 +1,5 @@
+from core.lookups import LookupTable
+from .models import Role
+
+# roles resueltos desde memoria, ver core/lookups.py
+roles = LookupTable(Role)
@@ -54,19 +54,50 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 	is_active = models.BooleanField(default=True)
 	is_staff = models.BooleanField(default=False)
+	# se incrementa al cambiar rol, estado o contraseña e invalida los tokens emitidos antes
+	token_version = models.PositiveIntegerField(default=0)
 
 	objects = UserManager()
 
 	USERNAME_FIELD = 'email'
 	REQUIRED_FIELDS = []
 
+	# campos que viajan (directa o indirectamente) en los claims del token
+	AUTH_STATE_FIELDS = ('role_id', 'is_active', 'password')
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self._auth_state = self._get_auth_state()
+
+	def _get_auth_state(self):
+		# solo los campos cargados, para no disparar consultas de campos diferidos
+		return {field: self.__dict__[field] for field in self.AUTH_STATE_FIELDS if field in self.__dict__}
+
+	def save(self, *args, **kwargs):
+		if self.pk is not None:
+			current = self._get_auth_state()
+			if any(current.get(field, value) != value for field, value in self._auth_state.items()):
+				self.token_version += 1
+				update_fields = kwargs.get('update_fields')
+				if update_fields is not None:
+					kwargs['update_fields'] = {*update_fields, 'token_version'}
+		super().save(*args, **kwargs)
+		self._auth_state = self._get_auth_state()
+
 	def __str__(self):
 		return self.email
 	
+	@property
+	def role_name(self):
+		# el rol se resuelve desde la cache de users/lookups.py, sin consultar la base
+		from .lookups import roles
+		role = roles.get(self.role_id)
+		return role.name if role else None
+
 	@property
 	def is_admin(self):
-		return self.role and self.role.name == 'admin'
+		return self.role_name == 'admin'
 	
 	@property
 	def is_client(self):
-		return self.role and self.role.name == 'client'
+		return self.role_name == 'client'
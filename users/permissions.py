@@ -5,8 +5,8 @@ from rest_framework.permissions import BasePermission
 
 class IsAdmin(BasePermission):
     def has_permission(self, request, view):
-        return bool(request.user and request.user.is_authenticated and request.user.role and request.user.role.name.lower() == 'admin')
+        return bool(request.user and request.user.is_authenticated and (request.user.role_name or '').lower() == 'admin')
     
 class IsClient(BasePermission):
     def has_permission(self, request, view):
-        return bool(request.user and request.user.is_authenticated and request.user.role and request.user.role.name.lower() == 'client')
\ No newline at end of file
+        return bool(request.user and request.user.is_authenticated and (request.user.role_name or '').lower() == 'client')
\ No newline at end of file
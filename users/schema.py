@@ -0,0 +1,13 @@
+# extensiones de drf-spectacular para las clases propias de autenticación
+from drf_spectacular.contrib.rest_framework_simplejwt import (
+    SimpleJWTScheme,
+    TokenObtainPairSerializerExtension,
+)
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    target_class = 'users.authentication.ClaimsJWTAuthentication'
+
+
+class RoleTokenObtainPairSerializerExtension(TokenObtainPairSerializerExtension):
+    target_class = 'users.serializers.RoleTokenObtainPairSerializer'
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Role
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .lookups import roles
+from .tokens import RoleRefreshToken
 
 
 User = get_user_model()
@@ -18,7 +20,7 @@ class RegisterSerializer(serializers.ModelSerializer):
         password = validated_data.pop('password')
         user = User.objects.create_user(password=password, **validated_data)
 
-        client_role = Role.objects.filter(name__iexact='client').first()
+        client_role = roles.get_by_name('client')
         if client_role and getattr(user, 'role_id', None) is None:
             setattr(user, 'role', client_role)
             user.save(update_fields=['role'])
@@ -26,6 +28,11 @@ class RegisterSerializer(serializers.ModelSerializer):
         return user
 
 
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    # emite tokens con rol y versión de credenciales (ver users/authentication.py)
+    token_class = RoleRefreshToken
+
+
 class RegisterResponseSerializer(serializers.Serializer):
     access = serializers.CharField()
     refresh = serializers.CharField()
@@ -36,4 +43,4 @@ class UserDetailSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'email', 'name', 'role_name']
     
-    role_name = serializers.CharField(source='role.name', read_only=True)
\ No newline at end of file
+    role_name = serializers.CharField(read_only=True)
\ No newline at end of file
@@ -0,0 +1,10 @@
+# al guardar un usuario, descartar su estado de autenticación cacheado en este proceso
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import User
+from .authentication import user_states
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_state(sender, instance, **kwargs):
+    user_states.invalidate(instance.pk)
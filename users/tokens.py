@@ -0,0 +1,17 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class RoleRefreshToken(RefreshToken):
+    """RefreshToken que además lleva el rol, el estado y la versión de credenciales del usuario
+
+    los claims se copian al access token derivado, así las peticiones pueden
+    autorizarse sin cargar el usuario (ver users/authentication.py)
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['role'] = user.role_name
+        token['active'] = user.is_active
+        token['ver'] = user.token_version
+        return token
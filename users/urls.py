@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 
 from .views import RegisterView, CustomTokenObtainPairView, CustomTokenRefreshView, MeView
@@ -8,3 +9,9 @@ urlpatterns = [
     path('token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
 ]
+
+# bajo ASGI /me/ lee con el ORM async (users/async_views.py)
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import me
+
+    urlpatterns.insert(0, path('me/', me, name='me'))
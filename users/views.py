@@ -2,14 +2,14 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import RoleRefreshToken
 from drf_spectacular.utils import extend_schema
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .models import User
 from .serializers import UserDetailSerializer
 from rest_framework.permissions import IsAuthenticated
 
-from .serializers import RegisterSerializer, RegisterResponseSerializer
+from .serializers import RegisterSerializer, RegisterResponseSerializer, RoleTokenObtainPairSerializer
 
 @extend_schema(tags=["Users"])
 class RegisterView(APIView):
@@ -25,7 +25,7 @@ class RegisterView(APIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
 
-        refresh = RefreshToken.for_user(user)
+        refresh = RoleRefreshToken.for_user(user)
         return Response({
             'refresh': str(refresh),
             'access': str(refresh.access_token),
@@ -34,7 +34,7 @@ class RegisterView(APIView):
 
 @extend_schema(tags=["Users"])
 class CustomTokenObtainPairView(TokenObtainPairView):
-    pass
+    serializer_class = RoleTokenObtainPairSerializer
 
 @extend_schema(tags=["Users"])
 class CustomTokenRefreshView(TokenRefreshView):